@@ -0,0 +1,175 @@
+"""
+Precomputed answer keys for the grading service.
+
+The key of a test (correct answer letter and points per position) is stored on
+Test.answer_key when the test is generated, and served from a process-local LRU,
+optionally backed by the shared Django cache EXAMS_ANSWER_KEY_CACHE. Edits to
+questions or answers clear the stored keys of every affected test; they are
+rebuilt on the next read. Other processes' LRUs are not cleared, so they can
+serve the previous key for up to EXAMS_ANSWER_KEY_LRU_TTL seconds.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .lru import LRUCache
+from .models import Test, TestQuestion
+
+# Define letters to label answers (up to 5 possible answers)
+LETTERS = ['A', 'B', 'C', 'D', 'E']
+
+_local_cache = LRUCache(
+    maxsize=getattr(settings, 'EXAMS_ANSWER_KEY_LRU_SIZE', 10000),
+    ttl=getattr(settings, 'EXAMS_ANSWER_KEY_LRU_TTL', 30),
+)
+
+
+def build_answer_key(sorted_test_questions):
+    """
+    Build the answer key of a test from its (position, question, answer_order) tuples,
+    with the answers prefetched.
+    Returns a dict with:
+    - "correct_answers": mapping of question positions to the correct answer letter (A-E).
+    - "points": mapping of question positions to the question's default score.
+    """
+    correct_answers_mapping = {}
+    points_mapping = {}
+
+    for pos, question, answer_order in sorted_test_questions:
+        position_key = str(pos)  # Convert position to string for the JSON mapping keys.
+
+        # Answers are lettered in the order the test shows them (by id unless they were shuffled).
+        correct_letter = None
+        for idx, answer in enumerate(question.ordered_answers(answer_order)):
+            if answer.is_correct:
+                if idx < len(LETTERS):
+                    correct_letter = LETTERS[idx]
+                else:
+                    correct_letter = "?"  # Fallback if more than 5 answers exist.
+                break
+
+        # If no correct answer is found, mark as "N/A".
+        if correct_letter is None:
+            correct_letter = "N/A"
+
+        correct_answers_mapping[position_key] = correct_letter
+        points_mapping[position_key] = float(question.default_score)
+
+    return {
+        "correct_answers": correct_answers_mapping,
+        "points": points_mapping,
+    }
+
+
+def compute_answer_keys(test_ids):
+    """Build and store the answer keys of several tests with a fixed number of queries."""
+    test_questions_by_test = defaultdict(list)
+    test_questions = (
+        TestQuestion.objects.filter(test_id__in=test_ids)
+        .select_related('question')
+        .prefetch_related('question__answers')
+        .order_by('test_id', 'position')
+    )
+    for tq in test_questions:
+        test_questions_by_test[tq.test_id].append((tq.position, tq.question, tq.answer_order))
+
+    answer_keys = {test_id: build_answer_key(test_questions_by_test[test_id]) for test_id in test_ids}
+    tests = [Test(id=test_id, answer_key=answer_key) for test_id, answer_key in answer_keys.items()]
+    Test.objects.bulk_update(tests, ['answer_key'])
+    return answer_keys
+
+
+def get_answer_key(assessment_id):
+    """Return the answer key of the test with this assessment id, or None if there is no such test."""
+    answer_key = _local_cache.get(assessment_id)
+    if answer_key is not None:
+        return answer_key
+
+    shared_cache = _shared_cache()
+    if shared_cache is not None:
+        answer_key = shared_cache.get(_cache_key(assessment_id))
+
+    if answer_key is None:
+        row = Test.objects.filter(assessment_id=assessment_id).values_list('id', 'answer_key').first()
+        if row is None:
+            return None
+        test_id, answer_key = row
+        if answer_key is None:
+            answer_key = compute_answer_keys([test_id])[test_id]
+        if shared_cache is not None:
+            shared_cache.set(_cache_key(assessment_id), answer_key)
+
+    _local_cache.set(assessment_id, answer_key)
+    return answer_key
+
+
+def iter_answer_keys(assessment_ids=None, group_id=None, chunk_size=None):
+    """
+    Yield (assessment_id, answer_key) for the given tests (by assessment ids, or by group id),
+    resolving them chunk_size tests at a time (all at once when chunk_size is None).
+    Each chunk takes one query, plus a fixed three when some of its keys still need computing.
+    Unknown assessment ids are skipped.
+    """
+    tests = Test.objects.order_by('id').values_list('id', 'assessment_id', 'answer_key')
+    if assessment_ids is not None:
+        assessment_ids = list(assessment_ids)
+        step = chunk_size or len(assessment_ids) or 1
+        for start in range(0, len(assessment_ids), step):
+            rows = list(tests.filter(assessment_id__in=assessment_ids[start:start + step]))
+            yield from _resolve_answer_keys(rows)
+        return
+
+    tests = tests.filter(group_id=group_id)
+    last_id = 0
+    while True:
+        chunk = tests.filter(id__gt=last_id)
+        rows = list(chunk[:chunk_size] if chunk_size else chunk)
+        yield from _resolve_answer_keys(rows)
+        if not rows or not chunk_size or len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def _resolve_answer_keys(rows):
+    missing = [test_id for test_id, _, answer_key in rows if answer_key is None]
+    computed = compute_answer_keys(missing) if missing else {}
+    for test_id, assessment_id, answer_key in rows:
+        yield assessment_id, answer_key if answer_key is not None else computed[test_id]
+
+
+def invalidate_answer_keys(assessment_ids):
+    """Drop the cached answer keys of these tests from the local and shared caches."""
+    assessment_ids = list(assessment_ids)
+    if not assessment_ids:
+        return
+
+    def clear_caches():
+        for assessment_id in assessment_ids:
+            _local_cache.delete(assessment_id)
+        shared_cache = _shared_cache()
+        if shared_cache is not None:
+            shared_cache.delete_many([_cache_key(assessment_id) for assessment_id in assessment_ids])
+
+    clear_caches()
+    # Clear again after commit, in case a reader cached the old key before the change was visible.
+    transaction.on_commit(clear_caches)
+
+
+def invalidate_question_answer_keys(question_id):
+    """Clear the stored and cached answer keys of every test that uses this question."""
+    tests = Test.objects.filter(test_questions__question_id=question_id)
+    assessment_ids = list(tests.values_list('assessment_id', flat=True).distinct())
+    if assessment_ids:
+        Test.objects.filter(assessment_id__in=assessment_ids).update(answer_key=None)
+        invalidate_answer_keys(assessment_ids)
+
+
+def _shared_cache():
+    alias = getattr(settings, 'EXAMS_ANSWER_KEY_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def _cache_key(assessment_id):
+    return f"exams:answer-key:{assessment_id}"
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ExamsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exams'
+
+    def ready(self):
+        # Register the cache invalidation signal handlers and the settings checks.
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,115 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks that need data create it inside rolled_back(), so running one
+against a real database leaves no rows behind (sequences still advance).
+Memory is measured as peak RSS: reset_peak_rss() before the work, then
+peak_rss_mb() after it.
+"""
+import resource
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def _proc_status_mb(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    raise OSError(f"{field} not found")
+
+
+def reset_peak_rss():
+    """Start a new peak RSS measurement where the platform allows it (Linux), and return the current RSS."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return _proc_status_mb('VmRSS')
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    try:
+        return _proc_status_mb('VmHWM')
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def time_calls(func, repeat):
+    """Call func() repeat times and return the (mean, min) duration in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(timings), min(timings)
+
+
+def synthetic_questions(count, answers=4, text_length=120):
+    """Question data in the shape bulk_create_questions takes, with texts of about text_length characters."""
+    filler = "which statement about the topic of this exam is correct? " * (text_length // 58 + 1)
+    return [
+        {
+            'text': f"Question {i}: {filler}"[:text_length],
+            'default_score': '1.50',
+            'answers': [
+                {'text': f"Answer option {j} of question {i}", 'is_correct': j == i % answers}
+                for j in range(answers)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_payload(questions, answers=5, variant='A'):
+    """A render payload (see documents.build_exam_payload) of a synthetic exam."""
+    return {
+        "subject_name": "Benchmark Subject",
+        "assessment_id": "12345",
+        "test_name": "Benchmark Exam",
+        "variant": variant,
+        "questions": [
+            (
+                pos,
+                f"Question {pos}: which of the following statements about the topic of this exam is correct? " * 2,
+                "1.50",
+                [f"Answer option {letter} with a typical amount of explanatory text" for letter in 'ABCDE'[:answers]],
+            )
+            for pos in range(1, questions + 1)
+        ],
+    }
+
+
+def create_pool(question_count, answers=4, subject=None):
+    """Create a question pool (and a subject, unless given) holding question_count synthetic questions."""
+    # Imported here: benchmark worker processes load this module before Django is set up.
+    from .bulk import bulk_create_questions
+    from .models import QuestionPool, Subject
+
+    if subject is None:
+        subject = Subject.objects.create(institution_id=0, name="Benchmark Subject", created_by=0)
+    pool = QuestionPool.objects.create(subject=subject, instructor_id=0, name=f"Benchmark pool of {question_count}")
+    bulk_create_questions(pool, synthetic_questions(question_count, answers))
+    return pool
@@ -0,0 +1,139 @@
+"""
+Bulk ingestion of questions together with their answers.
+
+Questions are inserted with batched bulk_create calls (PostgreSQL returns the
+new primary keys), and their answers follow in a second set of batched inserts.
+Very large imports on PostgreSQL can instead stream both tables through COPY.
+"""
+from io import StringIO
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Question, Answer
+from .sampling import invalidate_pool_index
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def bulk_create_questions(question_pool, questions_data, batch_size=DEFAULT_BATCH_SIZE, use_copy=None):
+    """
+    Insert every question in questions_data into question_pool.
+    questions_data: list of dicts of Question fields, each with an 'answers' list of Answer field dicts.
+    use_copy: force (True) or forbid (False) the COPY path; None picks it automatically
+    when running on PostgreSQL and the import reaches EXAMS_BULK_COPY_THRESHOLD.
+    Returns the created Question instances with their answers already cached,
+    so serializing them does not query the database again.
+    """
+    questions = []
+    answers_per_question = []
+    for question_data in questions_data:
+        question_data = dict(question_data)
+        answers_data = question_data.pop('answers', [])
+        questions.append(Question(question_pool=question_pool, **question_data))
+        answers_per_question.append([Answer(**answer_data) for answer_data in answers_data])
+
+    if use_copy is None:
+        threshold = getattr(settings, 'EXAMS_BULK_COPY_THRESHOLD', None)
+        use_copy = threshold is not None and len(questions) >= threshold
+    use_copy = use_copy and connection.vendor == 'postgresql'
+
+    with transaction.atomic():
+        if use_copy:
+            _copy_insert(questions, answers_per_question)
+        else:
+            _batched_insert(questions, answers_per_question, batch_size)
+        # bulk_create sends no post_save signals, so the pool's question index is invalidated here.
+        invalidate_pool_index(question_pool.id)
+
+    for question, answers in zip(questions, answers_per_question):
+        _cache_answers(question, answers)
+    return questions
+
+
+def _batched_insert(questions, answers_per_question, batch_size):
+    if connection.features.can_return_rows_from_bulk_insert:
+        Question.objects.bulk_create(questions, batch_size=batch_size)
+    else:
+        # Without RETURNING support the primary keys are only known after individual saves.
+        for question in questions:
+            question.save()
+
+    answers = []
+    for question, question_answers in zip(questions, answers_per_question):
+        for answer in question_answers:
+            answer.question = question
+            answers.append(answer)
+    Answer.objects.bulk_create(answers, batch_size=batch_size)
+
+
+def _copy_insert(questions, answers_per_question):
+    """
+    PostgreSQL-only fast path. Primary keys are reserved from the table sequences
+    up front so questions and answers can both be streamed through COPY.
+    """
+    now = timezone.now()
+    answers = [answer for question_answers in answers_per_question for answer in question_answers]
+
+    with connection.cursor() as cursor:
+        for model, objs in ((Question, questions), (Answer, answers)):
+            for obj, pk in zip(objs, _reserve_ids(cursor, model, len(objs))):
+                obj.pk = pk
+                obj.created_at = now
+                obj.updated_at = now
+        for question, question_answers in zip(questions, answers_per_question):
+            for answer in question_answers:
+                answer.question = question
+
+        _copy_rows(cursor, Question, ['id', 'question_pool', 'text', 'default_score', 'created_at', 'updated_at'], questions)
+        _copy_rows(cursor, Answer, ['id', 'question', 'text', 'is_correct', 'created_at', 'updated_at'], answers)
+
+
+def _reserve_ids(cursor, model, count):
+    if not count:
+        return []
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+        [model._meta.db_table, count],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _copy_rows(cursor, model, field_names, objs):
+    if not objs:
+        return
+    fields = [model._meta.get_field(name) for name in field_names]
+    buffer = StringIO()
+    for obj in objs:
+        buffer.write('\t'.join(_copy_value(getattr(obj, field.attname)) for field in fields))
+        buffer.write('\n')
+    buffer.seek(0)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+
+def _copy_value(value):
+    """Format a value for COPY's text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _cache_answers(question, answers):
+    """Store answers the way prefetch_related would, so question.answers.all() needs no query."""
+    queryset = question.answers.get_queryset()
+    queryset._result_cache = answers
+    queryset._prefetch_done = True
+    question._prefetched_objects_cache = {'answers': queryset}
@@ -0,0 +1,123 @@
+"""
+Response cache for read-mostly metadata (subjects, their pools and group ids, tests).
+
+Every cached resource, e.g. ("subject", 12), has a version token kept in the
+shared cache alias EXAMS_RESPONSE_CACHE (the cache is off unless it is set).
+Response data is stored under the resource and its current version, in a
+process-local LRU in front of the shared cache. A write only has to replace the
+version token: entries stored under older versions are never read again and age
+out. Hits and misses are counted per resource kind, per process.
+"""
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .lru import LRUCache
+
+SUBJECT = 'subject'
+SUBJECT_POOLS = 'subject-pools'
+SUBJECT_GROUPS = 'subject-groups'
+TEST = 'test'
+
+_local_cache = LRUCache(maxsize=getattr(settings, 'EXAMS_RESPONSE_CACHE_LRU_SIZE', 1000))
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+
+def _shared_cache():
+    alias = getattr(settings, 'EXAMS_RESPONSE_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def _version_key(resource, key):
+    return f"exams:version:{resource}:{key}"
+
+
+def _get_version(cache, resource, key):
+    version_key = _version_key(resource, key)
+    version = cache.get(version_key)
+    if version is None:
+        # A missing token (never set or evicted) gets a fresh one, so nothing stored
+        # under an earlier token can come back.
+        cache.add(version_key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+def _record(resource, outcome):
+    with _stats_lock:
+        _stats[resource][outcome] += 1
+
+
+def get_or_compute(resource, key, compute):
+    """
+    Return the cached data of a resource, or compute(), cache and return it.
+    With EXAMS_RESPONSE_CACHE set to None, compute() is always called.
+    """
+    cache = _shared_cache()
+    if cache is None:
+        return compute()
+
+    version = _get_version(cache, resource, key)
+    data_key = f"exams:response:{resource}:{key}:{version}"
+    data = _local_cache.get(data_key)
+    if data is None:
+        data = cache.get(data_key)
+        if data is not None:
+            _local_cache.set(data_key, data)
+    if data is not None:
+        _record(resource, 'hits')
+        return data
+
+    _record(resource, 'misses')
+    data = compute()
+    cache.set(data_key, data, timeout=getattr(settings, 'EXAMS_RESPONSE_CACHE_TIMEOUT', 300))
+    _local_cache.set(data_key, data)
+    return data
+
+
+def invalidate(resource, *keys):
+    """Give these resources new versions, now and again once the current transaction commits."""
+    cache = _shared_cache()
+    if cache is None or not keys:
+        return
+
+    def bump():
+        cache.set_many({_version_key(resource, key): uuid.uuid4().hex for key in keys}, timeout=None)
+
+    bump()
+    # Bump again after commit, in case a reader cached the old data before the change was visible.
+    transaction.on_commit(bump)
+
+
+def stats():
+    """Hit and miss counts of this process, per resource kind."""
+    with _stats_lock:
+        resources = {resource: dict(counts) for resource, counts in _stats.items()}
+    for counts in resources.values():
+        total = counts['hits'] + counts['misses']
+        counts['hit_rate'] = counts['hits'] / total if total else 0.0
+    return resources
+
+
+class CachedResponseMixin:
+    """
+    Serve a view's successful GET responses from the response cache.
+    get_cache_resource() returns the (resource, key) of the request, or None to skip the cache.
+    """
+
+    def get_cache_resource(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        cache_resource = self.get_cache_resource()
+        if cache_resource is None:
+            return super().get(request, *args, **kwargs)
+        # Errors such as a 404 are raised, so only successful responses are cached.
+        data = get_or_compute(*cache_resource, lambda: super(CachedResponseMixin, self).get(request, *args, **kwargs).data)
+        return Response(data)
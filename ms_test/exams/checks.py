@@ -0,0 +1,40 @@
+"""
+System checks for the exams settings.
+
+Cache aliases whose entries are invalidated on writes must be shared by every
+process serving the API; a per-process backend such as LocMemCache would only
+be invalidated in the process that handled the write.
+"""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+# Backends that keep their entries in the memory of the process that wrote them.
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Settings naming a cache alias that is invalidated on writes, with their check id.
+SHARED_CACHE_SETTINGS = {
+    'EXAMS_ANSWER_KEY_CACHE': 'exams.W001',
+    'EXAMS_RESPONSE_CACHE': 'exams.W002',
+}
+
+
+@register()
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    for setting, check_id in SHARED_CACHE_SETTINGS.items():
+        alias = getattr(settings, setting, None)
+        if not alias:
+            continue
+        if alias not in settings.CACHES:
+            errors.append(Error(f"{setting} names the cache alias {alias!r}, which is not in CACHES.", id='exams.E001'))
+        elif settings.CACHES[alias].get('BACKEND') in PER_PROCESS_BACKENDS:
+            errors.append(Warning(
+                f"{setting} uses the per-process cache backend {settings.CACHES[alias]['BACKEND']}.",
+                hint=f"Configure {alias!r} in CACHES with a backend shared by every process (Redis or Memcached), "
+                     f"or set {setting} to None.",
+                id=check_id,
+            ))
+    return errors
@@ -0,0 +1,194 @@
+"""
+Word document rendering for generated tests.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from docx import Document
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import parse_xml
+from docx.shared import Inches
+from docx.enum.section import WD_SECTION
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.enum.section import WD_ORIENTATION
+
+# Answer sheet appended as the last page of every exam.
+ANSWER_SHEET_IMAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img', 'blank_sheet.jpg')
+
+# Part of every payload fingerprint; bump it when render_exam's output changes so
+# that regeneration re-renders files produced by the previous layout.
+LAYOUT_VERSION = 1
+
+# Labels of the answers of a question; answers beyond the fifth are left out.
+ANSWER_LETTERS = ('A', 'B', 'C', 'D', 'E')
+
+# Precompiled exam templates, keyed by answer sheet image path.
+_templates = {}
+
+_executor = None
+_executor_workers = 0
+
+
+def create_word_file(subject_name, assessment_id, test_name, variant, sorted_test_questions, answer_sheet_image_path=ANSWER_SHEET_IMAGE_PATH):
+    """
+    Create a Word document with the given header and test questions.
+    sorted_test_questions: list of tuples (position, question, answer_order) in order.
+    Each question's answers are labeled from A to E (up to 5 answers).
+    The question text will also show the point value at the end.
+    """
+    payload = build_exam_payload(subject_name, assessment_id, test_name, variant, sorted_test_questions)
+    return render_exam(payload, answer_sheet_image_path)
+
+
+def build_exam_payload(subject_name, assessment_id, test_name, variant, sorted_test_questions):
+    """
+    Copy everything needed to render a test into plain, picklable data.
+    sorted_test_questions: list of tuples (position, question, answer_order) in order, with the answers prefetched.
+    """
+    return {
+        "subject_name": subject_name,
+        "assessment_id": assessment_id,
+        "test_name": test_name,
+        "variant": variant,
+        "questions": [
+            (pos, question.text, str(question.default_score), [answer.text for answer in question.ordered_answers(answer_order)])
+            for pos, question, answer_order in sorted_test_questions
+        ],
+    }
+
+
+def payload_fingerprint(payload):
+    """SHA-256 of everything a rendered exam depends on: the payload and the layout version."""
+    content = json.dumps([LAYOUT_VERSION, payload], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def render_exam(payload, answer_sheet_image_path=ANSWER_SHEET_IMAGE_PATH):
+    """
+    Render a payload built by build_exam_payload into the bytes of a Word document.
+    Works on plain data only, so it can run in a worker process.
+    Only the main document part is built per test; every other part of the package,
+    including the answer sheet image, is copied from a precompiled template.
+    """
+    template = _get_template(answer_sheet_image_path)
+    document = parse_xml(template.document_xml)
+
+    # Everything ahead of the answer sheet is inserted before the paragraph closing the first section.
+    section_break = next(p for p in document.body.p_lst if p.pPr is not None and p.pPr.sectPr is not None)
+
+    def add_paragraph(text, style=None):
+        p = section_break.add_p_before()
+        if style:
+            p.style = style
+        if text:
+            p.add_r().text = text
+
+    # Header
+    add_paragraph(f"{payload['subject_name']} - {payload['test_name']}", style='Title')
+    add_paragraph(f"Assessment ID: {payload['assessment_id']}")
+    add_paragraph(f"Variant: {payload['variant']}")
+    add_paragraph("")  # empty line
+
+    # For each test question, add the question text and its answers.
+    for pos, text, default_score, answer_texts in payload['questions']:
+        # Append the point cost to the question text.
+        # For example: "1. What is 2 + 2? (1 pt.)"
+        question_text_with_points = f"{pos}. {text} ({default_score} pt.)"
+        add_paragraph(question_text_with_points)
+        
+        # Label the answers A, B, C, etc.
+        for letter, answer_text in zip(ANSWER_LETTERS, answer_texts):
+            add_paragraph(f"   ({letter}) {answer_text}")
+
+    return template.build(serialize_part_xml(document))
+
+
+class _ExamTemplate:
+    """
+    The parts of an empty exam package whose answer sheet section, with its image,
+    is already built. New documents are produced by swapping in the main document part.
+    """
+    DOCUMENT_PART = 'word/document.xml'
+
+    def __init__(self, docx_bytes):
+        with zipfile.ZipFile(BytesIO(docx_bytes)) as zip_file:
+            self.parts = [(info.filename, zip_file.read(info)) for info in zip_file.infolist()]
+        self.document_xml = dict(self.parts)[self.DOCUMENT_PART]
+
+    def build(self, document_xml):
+        file_stream = BytesIO()
+        with zipfile.ZipFile(file_stream, 'w') as zip_file:
+            for name, data in self.parts:
+                if name == self.DOCUMENT_PART:
+                    data = document_xml
+                zip_file.writestr(self.zip_info(name), data)
+        return file_stream.getvalue()
+
+    @staticmethod
+    def zip_info(name):
+        # A fixed timestamp keeps the output byte-identical for identical content,
+        # so the stored checksum (and ETag) only changes when the exam does.
+        info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+        # Images are already compressed; deflating them again only costs time.
+        info.compress_type = zipfile.ZIP_STORED if name.startswith('word/media/') else zipfile.ZIP_DEFLATED
+        return info
+
+
+def _get_template(answer_sheet_image_path):
+    """Return the exam template for an answer sheet, built once per process."""
+    template = _templates.get(answer_sheet_image_path)
+    if template is not None:
+        return template
+
+    document = Document()
+
+    # Add a new section for the answer sheet image
+    section = document.add_section(WD_SECTION.NEW_PAGE)
+    section.orientation = WD_ORIENTATION.PORTRAIT
+    section.page_width = Inches(8.5)
+    section.page_height = Inches(11)
+    # Set margins to zero so the image covers the entire page
+    section.top_margin = Inches(0)
+    section.bottom_margin = Inches(0)
+    section.left_margin = Inches(0)
+    section.right_margin = Inches(0)
+
+    # Add the answer sheet image
+    paragraph = document.add_paragraph()
+    run = paragraph.add_run()
+    run.add_picture(answer_sheet_image_path, width=Inches(8.5), height=Inches(11))
+    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    file_stream = BytesIO()
+    document.save(file_stream)
+    template = _templates[answer_sheet_image_path] = _ExamTemplate(file_stream.getvalue())
+    return template
+
+
+def render_exams(payloads, max_workers=0, render=render_exam):
+    """
+    Render several payloads with render (render_exam or another renderer of payloads,
+    see exams.exports), returning the documents in the same order.
+    With max_workers > 1 the documents are rendered in parallel on a process pool,
+    since building them is CPU-bound and would otherwise serialize on the GIL.
+    """
+    if max_workers <= 1 or len(payloads) <= 1:
+        return [render(payload) for payload in payloads]
+    return list(_get_executor(max_workers).map(render, payloads))
+
+
+def _get_executor(max_workers):
+    """Return the process pool of this process, created on first use and kept for later renders."""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != max_workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        # Spawned workers only import this module, never the Django process state.
+        _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        _executor_workers = max_workers
+    return _executor
@@ -0,0 +1,49 @@
+"""
+Server-side caching of prebuilt group ZIP downloads.
+
+Cached archives are keyed by the group ZIP ETag (see exams.exam_files), which is
+derived from the stored checksums and payload fingerprints of the files, so
+requests are answered without reading or rendering any of them.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from .exports import KINDS
+
+
+def _group_zip_cache():
+    alias = getattr(settings, 'EXAMS_GROUP_ZIP_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def _group_zip_key(group_id, kind):
+    return f"exams:group-zip:{group_id}:{kind}"
+
+
+def get_cached_group_zip(group_id, etag, kind='docx'):
+    """Return the prebuilt ZIP of a group's files of this kind (see exams.exports) if it is cached for this ETag, otherwise None."""
+    cache = _group_zip_cache()
+    if cache is None or etag is None:
+        return None
+    cached = cache.get(_group_zip_key(group_id, kind))
+    if cached is None or cached[0] != etag:
+        return None
+    return cached[1]
+
+
+def should_cache_group_zip(etag):
+    return _group_zip_cache() is not None and etag is not None
+
+
+def cache_group_zip(group_id, etag, data, kind='docx'):
+    """Keep a prebuilt group ZIP, unless it is larger than EXAMS_GROUP_ZIP_CACHE_MAX_SIZE."""
+    cache = _group_zip_cache()
+    if cache is None or len(data) > getattr(settings, 'EXAMS_GROUP_ZIP_CACHE_MAX_SIZE', 0):
+        return
+    cache.set(_group_zip_key(group_id, kind), (etag, data))
+
+
+def invalidate_group_zip(group_id):
+    cache = _group_zip_cache()
+    if cache is not None:
+        cache.delete_many([_group_zip_key(group_id, kind) for kind in KINDS])
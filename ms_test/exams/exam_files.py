@@ -0,0 +1,167 @@
+"""
+Resolution of the file served for a test, in one of the export formats of exams.exports.
+
+Pinned tests keep their rendered file in the blob store (a GeneratedTestLink),
+as every test did before lazy rendering. Tests generated with render_mode
+"lazy" store nothing: their file is rendered from the TestQuestion rows on
+first download and memoized in a per-process LRU bounded by
+EXAMS_RENDERED_FILE_CACHE_MAX_SIZE bytes. The LRU is keyed by the payload
+fingerprint, so edited questions never hit a stale entry, and that fingerprint
+doubles as the file's ETag (rendering is byte-identical for identical payloads).
+Stored files are Word documents, so other formats are always rendered on demand.
+
+The conditional request validators of the download endpoints live here too,
+since they need the same resolution.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+
+from .documents import payload_fingerprint
+from .exports import DEFAULT_FORMAT, STORED_KIND, get_export_format
+from .lru import LRUCache
+from .models import GeneratedTestLink, Test
+from .rendering import build_test_payload, load_tests_questions, render_payloads
+
+_rendered_files = LRUCache(maxsize=getattr(settings, 'EXAMS_RENDERED_FILE_CACHE_MAX_SIZE', 64 * 1024 * 1024), weigh=len)
+
+
+class ExamFile:
+    """The file of one test in an export format: a stored GeneratedTestLink, or a payload rendered on demand."""
+
+    def __init__(self, test, export_format, link=None, payload=None, content_hash=None):
+        self.test = test
+        self.export_format = export_format
+        self.link = link
+        self.payload = payload
+        self.content_hash = content_hash
+
+    @property
+    def cache_key(self):
+        return (self.export_format.kind, self.content_hash)
+
+    @property
+    def etag(self):
+        if self.link is not None:
+            return self.link.checksum
+        if self.export_format.kind == STORED_KIND:
+            # Matches the checksum-less ETag of the same file before it is pinned.
+            return self.content_hash
+        return f"{self.content_hash}.{self.export_format.kind}"
+
+    @property
+    def last_modified(self):
+        # A lazily rendered file changes whenever its questions do, which no single timestamp tracks.
+        return self.link.generated_at if self.link is not None else None
+
+    @property
+    def is_rendered(self):
+        return self.link is not None or _rendered_files.get(self.cache_key) is not None
+
+    def read(self):
+        if self.link is not None:
+            return self.link.read_file()
+        data = _rendered_files.get(self.cache_key)
+        if data is None:
+            data = self.export_format.render(self.payload)
+            _rendered_files.set(self.cache_key, data)
+        return data
+
+    def open(self):
+        if self.link is not None:
+            return self.link.open_file()
+        return BytesIO(self.read())
+
+
+def get_exam_files(tests, export_format=DEFAULT_FORMAT):
+    """
+    Return the ExamFile of each test (their subject should be select_related) in export_format, in the same order.
+    Tests without a usable stored file are resolved from their questions; those without questions are left out.
+    """
+    tests = list(tests)
+    links = {}
+    if export_format.kind == STORED_KIND:
+        for link in GeneratedTestLink.objects.filter(test_id__in=[test_obj.id for test_obj in tests]).defer('exam_file').order_by('-id'):
+            # In descending id order the lowest id of each test is kept, as in rendering.regenerate_tests.
+            links[link.test_id] = link
+    sorted_by_test = load_tests_questions([test_obj.id for test_obj in tests if test_obj.id not in links])
+
+    exam_files = []
+    for test_obj in tests:
+        if test_obj.id in links:
+            exam_files.append(ExamFile(test_obj, export_format, link=links[test_obj.id]))
+        elif sorted_by_test.get(test_obj.id):
+            payload = build_test_payload(test_obj, sorted_by_test[test_obj.id])
+            exam_files.append(ExamFile(test_obj, export_format, payload=payload, content_hash=payload_fingerprint(payload)))
+    return exam_files
+
+
+def render_missing(exam_files, max_workers=None):
+    """Render the lazy files not yet in the LRU together, in parallel when EXAMS_RENDER_PROCESSES allows."""
+    missing = {}
+    for exam_file in exam_files:
+        if not exam_file.is_rendered:
+            missing.setdefault(exam_file.export_format, {})[exam_file.cache_key] = exam_file.payload
+    for export_format, payloads in missing.items():
+        for cache_key, data in zip(payloads, render_payloads(list(payloads.values()), max_workers, export_format.render)):
+            _rendered_files.set(cache_key, data)
+
+
+def _memoized(request, attr, compute):
+    # django.views.decorators.http.condition asks for the ETag and Last-Modified
+    # separately; both come from the same queries.
+    if not hasattr(request, attr):
+        setattr(request, attr, compute())
+    return getattr(request, attr)
+
+
+def request_format(request):
+    """Return the ExportFormat asked for by the request's `format` query parameter, or None if it is unknown."""
+    return get_export_format(request.GET.get('format'))
+
+
+def request_test_file(request, test_id):
+    """Return the ExamFile of a test in the requested format, or None, resolved once per request."""
+    def compute():
+        export_format = request_format(request)
+        if export_format is None:
+            return None
+        exam_files = get_exam_files(Test.objects.select_related('subject').filter(id=test_id), export_format)
+        return exam_files[0] if exam_files else None
+    return _memoized(request, '_exams_test_file', compute)
+
+
+def request_group_files(request, group_id):
+    """Return the ExamFiles of a group's tests in the requested format and id order, resolved once per request."""
+    def compute():
+        export_format = request_format(request)
+        if export_format is None:
+            return []
+        return get_exam_files(Test.objects.select_related('subject').filter(group_id=group_id).order_by('id'), export_format)
+    return _memoized(request, '_exams_group_files', compute)
+
+
+def test_file_etag(request, test_id, *args, **kwargs):
+    exam_file = request_test_file(request, test_id)
+    return exam_file.etag if exam_file else None
+
+
+def test_file_last_modified(request, test_id, *args, **kwargs):
+    exam_file = request_test_file(request, test_id)
+    return exam_file.last_modified if exam_file else None
+
+
+def group_zip_etag(request, group_id, *args, **kwargs):
+    exam_files = request_group_files(request, group_id)
+    # Without a checksum for every file (legacy rows), the archive cannot be validated.
+    if not exam_files or any(exam_file.etag is None for exam_file in exam_files):
+        return None
+    return hashlib.sha256(repr([(exam_file.test.id, exam_file.etag) for exam_file in exam_files]).encode()).hexdigest()
+
+
+def group_zip_last_modified(request, group_id, *args, **kwargs):
+    timestamps = [exam_file.last_modified for exam_file in request_group_files(request, group_id)]
+    if not timestamps or None in timestamps:
+        return None
+    return max(timestamps)
@@ -0,0 +1,39 @@
+"""
+Export formats of exam files, chosen with the `format` query parameter of the
+download endpoints.
+
+- docx (default): the Word document of documents.render_exam, which is also
+  the format of the files stored for pinned tests.
+- ooxml: the same Word document, byte for byte, written by the streaming
+  writer in exams.ooxml. It shares the docx files' ETags, cache entries and
+  stored files, and only renders missing files faster and in less memory.
+- pdf: a PDF version of the exam (see exams.pdf).
+"""
+from collections import namedtuple
+
+from .documents import render_exam
+from .ooxml import render_ooxml
+from .pdf import render_pdf
+
+# kind: formats of the same kind produce identical bytes, so they share files and cache entries.
+ExportFormat = namedtuple('ExportFormat', ['name', 'kind', 'extension', 'content_type', 'render'])
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+FORMATS = {
+    'docx': ExportFormat('docx', 'docx', 'docx', DOCX_CONTENT_TYPE, render_exam),
+    'ooxml': ExportFormat('ooxml', 'docx', 'docx', DOCX_CONTENT_TYPE, render_ooxml),
+    'pdf': ExportFormat('pdf', 'pdf', 'pdf', 'application/pdf', render_pdf),
+}
+DEFAULT_FORMAT = FORMATS['docx']
+
+# Kind of the files kept in the blob store for pinned tests.
+STORED_KIND = 'docx'
+KINDS = sorted({export_format.kind for export_format in FORMATS.values()})
+
+
+def get_export_format(name):
+    """Return the ExportFormat called name (the default one for an empty name), or None if there is none."""
+    if not name:
+        return DEFAULT_FORMAT
+    return FORMATS.get(name)
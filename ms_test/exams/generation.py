@@ -0,0 +1,130 @@
+"""
+Planning and persistence for test generation.
+
+All variants are drawn in one seeded pass (see exams.variants) from the cached
+id index of each question pool (see exams.sampling), only the chosen questions
+are loaded, and the resulting rows are written with bulk inserts so the
+transaction holding the locks stays short.
+"""
+from . import cache
+from .answer_keys import build_answer_key
+from .models import Test, TestQuestion, GeneratedTestLink
+from .sampling import get_pool_indexes, load_questions
+from .variants import VariantBuilder, VariantConstraintError, shuffle_answer_orders
+
+
+class GenerationError(Exception):
+    """Raised when the requested question selections cannot be satisfied."""
+
+
+class QuestionPoolNotFound(GenerationError):
+    """Raised when a question selection names a question pool that does not exist."""
+
+
+def plan_variants(variants, question_selections, seed, max_overlap=None, balance_scores=False, shuffle_answers=False):
+    """
+    Draw the questions of every variant in a single seeded pass (see exams.variants).
+    question_selections: list of dicts with a question_pool id and a list of positions.
+    The same seed, options and pool contents always give the same variants.
+    Returns a list of (variant, sorted_test_questions) pairs, where sorted_test_questions
+    is a list of (position, question, answer_order) tuples ordered by position;
+    answer_order is None unless shuffle_answers is set.
+    Raises QuestionPoolNotFound if a selected pool does not exist, and GenerationError
+    if the selections cannot be satisfied.
+    """
+    seen_positions = set()
+    for qs in question_selections:
+        for pos in qs['positions']:
+            if pos in seen_positions:
+                raise GenerationError(f"Duplicate position {pos} specified across question selections.")
+            seen_positions.add(pos)
+
+    pool_ids = {qs['question_pool'] for qs in question_selections}
+    indexes = get_pool_indexes(pool_ids)
+    if set(indexes) != pool_ids:
+        raise QuestionPoolNotFound(f"No QuestionPool matches the given query: {sorted(pool_ids - set(indexes))}")
+
+    # An index built while a write to its pool was committing can still list a deleted
+    # question; build the indexes again, at the pools' current versions, if one is gone.
+    for attempt in range(2):
+        id_plans, questions = _sample_variants(len(variants), question_selections, indexes, seed, max_overlap, balance_scores)
+        complete = all(question_id in questions for mapping in id_plans for question_id in mapping.values())
+        if complete or attempt:
+            break
+        indexes = get_pool_indexes(pool_ids, refresh=True)
+    if not complete:
+        raise GenerationError("The question pools changed while the test was being generated; please retry.")
+
+    if shuffle_answers:
+        answer_orders = shuffle_answer_orders(seed, id_plans, questions)
+    else:
+        answer_orders = [{} for _ in id_plans]
+    return [
+        (variant, [(pos, questions[question_id], orders.get(pos)) for pos, question_id in sorted(mapping.items())])
+        for variant, mapping, orders in zip(variants, id_plans, answer_orders)
+    ]
+
+
+def _sample_variants(variant_count, question_selections, indexes, seed, max_overlap, balance_scores):
+    """Draw the question ids of every variant from the pool indexes, then load just those questions."""
+    for qs in question_selections:
+        if len(indexes[qs['question_pool']].ids) < len(qs['positions']):
+            raise GenerationError(
+                f"Not enough questions in QuestionPool {qs['question_pool']} to fill positions {qs['positions']}"
+            )
+
+    builder = VariantBuilder(indexes, seed, max_overlap=max_overlap, balance_scores=balance_scores)
+    try:
+        id_plans = builder.build(variant_count, question_selections)
+    except VariantConstraintError as exc:
+        raise GenerationError(str(exc))
+
+    pool_by_position = {pos: qs['question_pool'] for qs in question_selections for pos in qs['positions']}
+    sampled = {
+        question_id: pool_by_position[pos]
+        for mapping in id_plans
+        for pos, question_id in mapping.items()
+    }
+    return id_plans, load_questions(sampled)
+
+
+def save_generated_tests(subject, instructor_id, group_id, test_name, notes, instructions, generated, generation_seed=None, pinned=True):
+    """
+    Persist the Test, TestQuestion and GeneratedTestLink rows of a generation with bulk inserts.
+    generated: list of dicts with the variant, assessment_id, sorted_test_questions and stored_file,
+    the blob store description of the rendered file returned by put_exam_file.
+    Items whose stored_file is None get no GeneratedTestLink (their file is rendered later,
+    by a render job when pinned or on download otherwise).
+    Must be called inside a transaction. Returns the created Test instances in the same order.
+    """
+    tests = Test.objects.bulk_create([
+        Test(
+            subject=subject,
+            instructor_id=instructor_id,
+            group_id=group_id,
+            assessment_id=item['assessment_id'],
+            name=test_name,
+            variant=item['variant'],
+            notes=notes,
+            instructions=instructions,
+            answer_key=build_answer_key(item['sorted_test_questions']),
+            generation_seed=generation_seed,
+            pinned=pinned,
+        )
+        for item in generated
+    ])
+
+    TestQuestion.objects.bulk_create([
+        TestQuestion(test=test_obj, question=question, position=pos, answer_order=answer_order)
+        for test_obj, item in zip(tests, generated)
+        for pos, question, answer_order in item['sorted_test_questions']
+    ])
+
+    GeneratedTestLink.objects.bulk_create([
+        GeneratedTestLink(test=test_obj, **item['stored_file'])
+        for test_obj, item in zip(tests, generated)
+        if item['stored_file'] is not None
+    ])
+    # bulk_create sends no post_save signals; the new group id changes the subject's group list.
+    cache.invalidate(cache.SUBJECT_GROUPS, subject.id)
+    return tests
@@ -0,0 +1,91 @@
+"""
+Vectorized scoring of student response sheets against precomputed answer keys.
+
+The sheets of one test are turned into a (students x positions) matrix of answer
+codes, compared against the key in one operation, and the resulting correctness
+matrix is multiplied by the points vector to get every student's total.
+"""
+import numpy as np
+
+from .answer_keys import LETTERS
+
+# Answer codes: 0 is a blank (or unreadable) answer, 1-5 are the letters A-E.
+_CODES = {letter: code for code, letter in enumerate(LETTERS, start=1)}
+# Byte -> answer code lookup table for sheets given as strings.
+_CODE_TABLE = np.zeros(256, dtype=np.int8)
+for _letter, _code in _CODES.items():
+    _CODE_TABLE[ord(_letter)] = _code
+    _CODE_TABLE[ord(_letter.lower())] = _code
+
+
+def response_matrix(sheets, positions):
+    """
+    Build the (students x positions) int8 matrix of answer codes.
+    Each sheet's "answers" is either a mapping of position to letter, or a string with
+    one character per position in position order ("-" or " " for a blank answer).
+    """
+    responses = np.zeros((len(sheets), len(positions)), dtype=np.int8)
+    columns = {position: col for col, position in enumerate(positions)}
+
+    string_rows = [row for row, sheet in enumerate(sheets) if isinstance(sheet['answers'], str)]
+    if string_rows:
+        # Pad or truncate every string to the number of positions, then map all bytes at once.
+        width = len(positions)
+        raw = b''.join(
+            sheets[row]['answers'].encode('ascii', 'replace')[:width].ljust(width, b'-')
+            for row in string_rows
+        )
+        responses[string_rows] = _CODE_TABLE[np.frombuffer(raw, dtype=np.uint8)].reshape(len(string_rows), width)
+
+    for row, sheet in enumerate(sheets):
+        if isinstance(sheet['answers'], str):
+            continue
+        for position, letter in sheet['answers'].items():
+            col = columns.get(str(position))
+            if col is not None:
+                responses[row, col] = _CODES.get(str(letter).upper(), 0)
+    return responses
+
+
+def grade_sheets(answer_key, sheets):
+    """
+    Score sheets (dicts with "answers") against an answer key built by exams.answer_keys.
+    Returns (scores, question_stats):
+    - scores: one dict per sheet with its score, number of correct and answered questions.
+    - question_stats: one dict per position with how often it was answered, answered
+      correctly, and how often each letter was chosen.
+    """
+    positions = sorted(answer_key['correct_answers'], key=int)
+    # Positions without a usable correct letter ("N/A", "?") get -1, which never matches.
+    key = np.array([_CODES.get(answer_key['correct_answers'][p], -1) for p in positions], dtype=np.int8)
+    points = np.array([answer_key['points'][p] for p in positions], dtype=np.float64)
+
+    responses = response_matrix(sheets, positions)
+    correct = responses == key
+    answered = responses != 0
+    totals = correct @ points
+
+    correct_counts = correct.sum(axis=0)
+    answered_counts = answered.sum(axis=0)
+    choice_counts = {letter: (responses == code).sum(axis=0) for letter, code in _CODES.items()}
+    student_count = len(sheets)
+
+    scores = [
+        {"score": float(total), "correct": int(n_correct), "answered": int(n_answered)}
+        for total, n_correct, n_answered in zip(totals, correct.sum(axis=1), answered.sum(axis=1))
+    ]
+    question_stats = [
+        {
+            "position": int(position),
+            "correct_count": int(correct_counts[col]),
+            "answered_count": int(answered_counts[col]),
+            "correct_rate": float(correct_counts[col]) / student_count if student_count else 0.0,
+            "choices": {letter: int(counts[col]) for letter, counts in choice_counts.items()},
+        }
+        for col, position in enumerate(positions)
+    ]
+    return scores, question_stats
+
+
+def max_score(answer_key):
+    return float(sum(answer_key['points'].values()))
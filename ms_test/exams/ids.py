@@ -0,0 +1,117 @@
+"""
+Allocation of group and assessment IDs.
+
+IDs are drawn from a shared counter stored in IdSequence. Each process reserves
+a block of counter values at a time (one locked update per block), and each
+counter value is mapped through a keyed permutation of the current digit space.
+The IDs therefore look random but can never collide, and no query is needed to
+check them. The permutation keys are stored with the counter, so they stay the
+same for the lifetime of the database (unlike SECRET_KEY, which may be
+rotated). The 5-digit space (which the answer sheet's Assessment field holds)
+is used first; once it is exhausted, allocation widens to 6 digits, and so on
+up to the width of the ID columns.
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import IdSequence, Test
+
+SEQUENCE_NAME = 'public_id'
+MIN_DIGITS = 5
+MAX_DIGITS = Test._meta.get_field('assessment_id').max_length
+FEISTEL_ROUNDS = 4
+
+_lock = threading.Lock()
+_block = [0, 0]  # [next counter value, end of the reserved block]
+_keys = {}  # Permutation key of each ID width, loaded with the first block.
+_legacy_ids = None
+
+
+class IdSpaceExhausted(Exception):
+    """Raised when every ID that fits the ID columns has been allocated."""
+
+
+def allocate_id():
+    """Return a new, never before allocated ID as a string of digits."""
+    legacy_ids = _get_legacy_ids()
+    with _lock:
+        while True:
+            if _block[0] >= _block[1]:
+                _block[0], _block[1], keys = _reserve_block()
+                _keys.update(keys)
+            counter = _block[0]
+            _block[0] += 1
+            allocated = _counter_to_id(counter, _keys)
+            # Tests created before the allocator carry random 5-digit IDs; skip those.
+            if allocated not in legacy_ids:
+                return allocated
+
+
+def _reserve_block():
+    """Reserve the next block of counter values. Returns (start, end, {digits: permutation key})."""
+    block_size = getattr(settings, 'EXAMS_ID_BLOCK_SIZE', 20)
+    with transaction.atomic():
+        sequence, _ = IdSequence.objects.select_for_update().get_or_create(name=SEQUENCE_NAME)
+        start = sequence.next_value
+        sequence.next_value = start + block_size
+        update_fields = ['next_value']
+        # A width gets its key the first time the sequence is used with it, under the row lock.
+        missing = [digits for digits in range(MIN_DIGITS, MAX_DIGITS + 1) if str(digits) not in sequence.permutation_keys]
+        if missing:
+            for digits in missing:
+                sequence.permutation_keys[str(digits)] = secrets.token_hex(32)
+            update_fields.append('permutation_keys')
+        sequence.save(update_fields=update_fields)
+    keys = {int(digits): bytes.fromhex(key) for digits, key in sequence.permutation_keys.items()}
+    return start, start + block_size, keys
+
+
+def _get_legacy_ids():
+    """IDs handed out by the old random generator, loaded once per process."""
+    global _legacy_ids
+    if _legacy_ids is None:
+        cutoff = IdSequence.objects.filter(name=SEQUENCE_NAME).values_list('legacy_test_id', flat=True).first() or 0
+        legacy_ids = set()
+        for group_id, assessment_id in Test.objects.filter(id__lte=cutoff).values_list('group_id', 'assessment_id'):
+            legacy_ids.add(group_id)
+            legacy_ids.add(assessment_id)
+        _legacy_ids = frozenset(legacy_ids)
+    return _legacy_ids
+
+
+def _counter_to_id(counter, keys):
+    """
+    Map a counter value to an ID: counters fill the d-digit space before moving to d + 1 digits.
+    keys: the permutation key of each width, as returned by _reserve_block.
+    """
+    offset = counter
+    for digits in range(MIN_DIGITS, MAX_DIGITS + 1):
+        low = 10 ** (digits - 1)
+        size = 10 ** digits - low
+        if offset < size:
+            return str(low + _permute(offset, size, keys[digits]))
+        offset -= size
+    raise IdSpaceExhausted(f"All IDs of up to {MAX_DIGITS} digits have been allocated.")
+
+
+def _permute(value, size, key):
+    """
+    Keyed permutation of range(size): a Feistel network over the smallest even
+    number of bits covering size, with cycle-walking to stay inside the range.
+    """
+    half_bits = ((size - 1).bit_length() + 1) // 2
+    mask = (1 << half_bits) - 1
+    while True:
+        left, right = value >> half_bits, value & mask
+        for round_number in range(FEISTEL_ROUNDS):
+            digest = hmac.new(key, f"{round_number}:{right}".encode(), hashlib.sha256).digest()
+            left, right = right, left ^ (int.from_bytes(digest[:8], 'big') & mask)
+        value = (left << half_bits) | right
+        if value < size:
+            return value
+
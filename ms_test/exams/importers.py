@@ -0,0 +1,288 @@
+"""
+Streaming import of question banks from CSV, JSONL and Moodle XML files.
+
+The parsers read the file incrementally and yield one question at a time, in
+the shape bulk_create_questions takes. import_questions validates the questions
+as they arrive and writes every chunk_size valid ones with bulk_create_questions,
+each chunk in its own transaction, so memory stays bounded by the chunk size
+rather than the size of the bank. Invalid questions are skipped and reported
+with their line (CSV, JSONL) or question number (Moodle XML).
+
+File layouts:
+- CSV: a header row with a `text` column, optional `default_score` and
+  `correct` columns, and one column per answer whose name starts with
+  `answer` (e.g. answer_a ... answer_e), in order. `correct` lists the correct
+  answers by letter or 1-based number, separated by commas or semicolons
+  (e.g. "B" or "A;C").
+- JSONL: one object per line, as accepted by questions/bulk/:
+  {"text": ..., "default_score": ..., "answers": [{"text": ..., "is_correct": ...}]}.
+- Moodle XML: multichoice and truefalse questions of a Moodle quiz export.
+  Answers with a positive fraction are correct; HTML is reduced to plain text.
+  Categories are ignored.
+"""
+import csv
+import html
+import io
+import json
+import os
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from decimal import Decimal, InvalidOperation
+
+from .bulk import bulk_create_questions
+from .documents import ANSWER_LETTERS
+from .models import Question
+
+DEFAULT_CHUNK_SIZE = 1000
+# Only the first errors are kept in the report, so a bad file cannot grow it without bound.
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ('csv', 'jsonl', 'moodle')
+_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.xml': 'moodle'}
+_MOODLE_TYPES = {'multichoice', 'truefalse'}
+
+_SCORE_FIELD = Question._meta.get_field('default_score')
+_CENTS = Decimal('0.01')
+# Block-level tags separate words; other tags are dropped without a trace.
+_BLOCK_TAGS = re.compile(r'<(?:br|/?(?:p|div|li|tr|td|h[1-6]))\b[^>]*>', re.IGNORECASE)
+_TAGS = re.compile(r'<[^>]*>')
+_SPACES = re.compile(r'\s+')
+
+
+class ImportFormatError(Exception):
+    """Raised when a file cannot be parsed any further. report holds what was imported before."""
+
+    def __init__(self, message, report=None):
+        super().__init__(message)
+        self.report = report
+
+
+def detect_format(filename):
+    """Return the import format matching a file name's extension, or None."""
+    return _EXTENSIONS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def clean_question(data):
+    """Validate a parsed question and return it with typed fields. Raises ValueError with the reason."""
+    if not isinstance(data, dict):
+        raise ValueError("Expected an object.")
+    text = data.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("A question needs a non-empty text.")
+
+    score = data.get('default_score')
+    if score is None or score == '':
+        score = Decimal(str(_SCORE_FIELD.default)).quantize(_CENTS)
+    else:
+        try:
+            score = Decimal(str(score).strip())
+            valid = score.is_finite() and score == score.quantize(_CENTS)
+        except InvalidOperation:
+            valid = False
+        if not valid:
+            raise ValueError(f"default_score must be a number with at most 2 decimal places: {data['default_score']!r}.")
+        score = score.quantize(_CENTS)
+        if abs(score) >= 10 ** (_SCORE_FIELD.max_digits - _SCORE_FIELD.decimal_places):
+            raise ValueError(f"default_score is too large: {data['default_score']!r}.")
+
+    answers = data.get('answers')
+    if not isinstance(answers, list) or not answers:
+        raise ValueError("A question needs at least one answer.")
+    if len(answers) > len(ANSWER_LETTERS):
+        raise ValueError(f"A question can have at most {len(ANSWER_LETTERS)} answers, got {len(answers)}.")
+    cleaned_answers = []
+    for answer in answers:
+        if not isinstance(answer, dict) or not isinstance(answer.get('text'), str) or not answer['text'].strip():
+            raise ValueError("Every answer needs a non-empty text.")
+        is_correct = answer.get('is_correct', False)
+        if not isinstance(is_correct, bool):
+            raise ValueError(f"is_correct must be true or false: {is_correct!r}.")
+        cleaned_answers.append({'text': answer['text'], 'is_correct': is_correct})
+    if not any(answer['is_correct'] for answer in cleaned_answers):
+        raise ValueError("A question needs at least one correct answer.")
+    return {'text': text, 'default_score': score, 'answers': cleaned_answers}
+
+
+def _text_lines(binary_file, newline=None):
+    # utf-8-sig drops the byte order mark spreadsheet exports often start with.
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline=newline)
+
+
+def parse_csv(binary_file):
+    """Yield (line number, question data or None, error or None) for every data row of a CSV file."""
+    # The csv module handles line endings itself, including those inside quoted fields.
+    reader = csv.reader(_text_lines(binary_file, newline=''))
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [name.strip().lower() for name in header]
+    if 'text' not in columns:
+        raise ImportFormatError("The CSV header needs a 'text' column.")
+    text_index = columns.index('text')
+    score_index = columns.index('default_score') if 'default_score' in columns else None
+    correct_index = columns.index('correct') if 'correct' in columns else None
+    answer_indexes = [i for i, name in enumerate(columns) if name.startswith('answer')]
+
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            correct = _parse_correct(_cell(row, correct_index), len(answer_indexes))
+        except ValueError as exc:
+            yield reader.line_num, None, str(exc)
+            continue
+        yield reader.line_num, {
+            'text': _cell(row, text_index),
+            'default_score': _cell(row, score_index),
+            'answers': [
+                {'text': _cell(row, index), 'is_correct': position in correct}
+                for position, index in enumerate(answer_indexes)
+                if _cell(row, index)
+            ],
+        }, None
+
+
+def _cell(row, index):
+    # Short rows leave their trailing cells empty.
+    return row[index].strip() if index is not None and index < len(row) else ''
+
+
+def _parse_correct(value, answer_count):
+    """Return the 0-based positions listed in a CSV `correct` cell, e.g. "B", "2" or "A;C"."""
+    positions = set()
+    for token in re.split(r'[,;\s]+', value):
+        if not token:
+            continue
+        if token.isdigit():
+            position = int(token) - 1
+        elif len(token) == 1 and token.isalpha():
+            position = ord(token.upper()) - ord('A')
+        else:
+            raise ValueError(f"Invalid correct answer: {token!r}.")
+        if not 0 <= position < answer_count:
+            raise ValueError(f"Correct answer {token!r} has no answer column.")
+        positions.add(position)
+    return positions
+
+
+def parse_jsonl(binary_file):
+    """Yield (line number, question data or None, error or None) for every non-blank line of a JSONL file."""
+    for line, text in enumerate(_text_lines(binary_file), start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text), None
+        except ValueError as exc:
+            yield line, None, f"Invalid JSON: {exc}."
+
+
+def _moodle_text(element):
+    """Return the plain text of a Moodle element holding a <text> child (and a format attribute)."""
+    if element is None:
+        return ''
+    text = element.findtext('text') or ''
+    if element.get('format', 'html') == 'html':
+        text = html.unescape(_TAGS.sub('', _BLOCK_TAGS.sub(' ', text)))
+    return _SPACES.sub(' ', text).strip()
+
+
+def parse_moodle_xml(binary_file):
+    """
+    Yield (question number, question data or None, error or None) for every question of a Moodle XML export.
+    Each <question> element is dropped from the tree once read, so the whole document is never held.
+    """
+    number = 0
+    root = None
+    try:
+        for event, element in ElementTree.iterparse(binary_file, events=('start', 'end')):
+            if root is None:
+                root = element
+            if event != 'end' or element.tag != 'question':
+                continue
+            question_type = element.get('type')
+            if question_type != 'category':
+                number += 1
+                if question_type in _MOODLE_TYPES:
+                    yield number, {
+                        'text': _moodle_text(element.find('questiontext')),
+                        'default_score': (element.findtext('defaultgrade') or '').strip(),
+                        'answers': [
+                            {'text': _moodle_text(answer), 'is_correct': _fraction(answer) > 0}
+                            for answer in element.findall('answer')
+                        ],
+                    }, None
+                else:
+                    yield number, None, f"Unsupported question type: {question_type!r}."
+            root.clear()
+    except ElementTree.ParseError as exc:
+        raise ImportFormatError(f"Invalid Moodle XML: {exc}.")
+
+
+def _fraction(answer):
+    try:
+        return float(answer.get('fraction', '0'))
+    except ValueError:
+        return 0.0
+
+
+PARSERS = {'csv': parse_csv, 'jsonl': parse_jsonl, 'moodle': parse_moodle_xml}
+
+
+def import_questions(question_pool, binary_file, import_format, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Import the questions of binary_file (a file opened in binary mode) into question_pool.
+    Valid questions are written chunk_size at a time with bulk_create_questions, unless dry_run is set.
+    progress, if given, is called with the running report after each chunk.
+    Returns the report: counts of processed, imported (with dry_run: valid) and skipped questions,
+    the first MAX_REPORTED_ERRORS errors with their line or question number, and throughput.
+    Raises ImportFormatError, carrying the report so far, if the file cannot be parsed further.
+    """
+    report = {
+        "format": import_format,
+        "dry_run": dry_run,
+        "processed": 0,
+        "imported": 0,
+        "skipped": 0,
+        "errors": [],
+        "seconds": 0.0,
+        "questions_per_second": 0.0,
+    }
+    started = time.perf_counter()
+
+    def flush(chunk):
+        if chunk and not dry_run:
+            bulk_create_questions(question_pool, chunk)
+        report["imported"] += len(chunk)
+        elapsed = time.perf_counter() - started
+        report["seconds"] = round(elapsed, 3)
+        report["questions_per_second"] = round(report["processed"] / elapsed, 2) if elapsed else 0.0
+        if progress is not None:
+            progress(report)
+
+    chunk = []
+    try:
+        for number, data, error in PARSERS[import_format](binary_file):
+            report["processed"] += 1
+            if error is None:
+                try:
+                    chunk.append(clean_question(data))
+                except ValueError as exc:
+                    error = str(exc)
+            if error is not None:
+                report["skipped"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append({"row": number, "error": error})
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+    except ImportFormatError as exc:
+        # Chunks written so far stay imported; the report says how far the file got.
+        flush(chunk)
+        exc.report = report
+        raise
+    except (UnicodeDecodeError, csv.Error) as exc:
+        flush(chunk)
+        raise ImportFormatError(f"Cannot read the {import_format} file: {exc}.", report)
+    flush(chunk)
+    return report
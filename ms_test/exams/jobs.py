@@ -0,0 +1,148 @@
+"""
+Database-backed queue for rendering Word files outside the request cycle.
+
+Jobs are plain RenderJob rows, so no external broker is needed: any number of
+`manage.py process_render_jobs` workers (or the optional in-process threads
+started after a commit) claim pending rows with SELECT ... FOR UPDATE SKIP LOCKED.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import RenderJob, Test
+from .documents import payload_fingerprint, render_exam
+from .rendering import build_test_payload, save_test_file
+
+logger = logging.getLogger(__name__)
+
+# A job is retried up to this many times before it is marked as failed.
+MAX_ATTEMPTS = 3
+# Running jobs untouched for this long are assumed to belong to a dead worker and are picked up again.
+STALE_AFTER = timedelta(minutes=10)
+
+_local_executor = None
+
+
+def enqueue_render_jobs(tests):
+    """Queue one render job per test and return the batch id shared by all of them."""
+    batch_id = uuid.uuid4()
+    RenderJob.objects.bulk_create([RenderJob(batch_id=batch_id, test=test_obj) for test_obj in tests])
+    transaction.on_commit(start_local_workers)
+    return batch_id
+
+
+def claim_next_job():
+    """Atomically mark the oldest runnable job as running and return it, or None if the queue is empty."""
+    stale_cutoff = timezone.now() - STALE_AFTER
+    with transaction.atomic():
+        job = (
+            RenderJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=RenderJob.STATUS_PENDING) | Q(status=RenderJob.STATUS_RUNNING, updated_at__lt=stale_cutoff))
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = RenderJob.STATUS_RUNNING
+        job.attempts += 1
+        job.save(update_fields=['status', 'attempts', 'updated_at'])
+    return job
+
+
+def run_job(job):
+    """Render and store the Word file of the job's test, recording the outcome on the job."""
+    try:
+        test_obj = Test.objects.select_related('subject').get(id=job.test_id)
+        payload = build_test_payload(test_obj)
+        word_file_bytes = render_exam(payload)
+        with transaction.atomic():
+            save_test_file(test_obj, word_file_bytes, payload_fingerprint(payload))
+            job.status = RenderJob.STATUS_DONE
+            job.error = None
+            job.save(update_fields=['status', 'error', 'updated_at'])
+    except Exception as exc:
+        logger.exception("Render job %s failed for test %s", job.id, job.test_id)
+        job.status = RenderJob.STATUS_PENDING if job.attempts < MAX_ATTEMPTS else RenderJob.STATUS_FAILED
+        job.error = str(exc)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+    return job
+
+
+def process_pending_jobs():
+    """Run queued jobs until the queue is empty. Returns the number of jobs processed."""
+    processed = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            return processed
+        run_job(job)
+        processed += 1
+
+
+def start_local_workers():
+    """
+    Drain the queue on EXAMS_RENDER_LOCAL_WORKERS background threads of this process.
+    With the default of 0, jobs are left for `manage.py process_render_jobs`.
+    """
+    global _local_executor
+    workers = getattr(settings, 'EXAMS_RENDER_LOCAL_WORKERS', 0)
+    if not workers:
+        return
+    if _local_executor is None:
+        _local_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render-job')
+    for _ in range(workers):
+        _local_executor.submit(_local_worker)
+
+
+def _local_worker():
+    try:
+        process_pending_jobs()
+    finally:
+        # Worker threads own their database connections.
+        connection.close()
+
+
+def batch_status(batch_id):
+    """
+    Summarize the jobs of a batch, or return None if the batch does not exist.
+    A test is ready once its exam file has been stored.
+    """
+    jobs = list(RenderJob.objects.filter(batch_id=batch_id).select_related('test').order_by('id'))
+    if not jobs:
+        return None
+    ready_test_ids = set(
+        Test.objects.filter(id__in=[job.test_id for job in jobs], generated_links__isnull=False)
+        .values_list('id', flat=True)
+    )
+
+    statuses = {job.status for job in jobs}
+    if statuses == {RenderJob.STATUS_DONE}:
+        overall = RenderJob.STATUS_DONE
+    elif RenderJob.STATUS_FAILED in statuses and not statuses & {RenderJob.STATUS_PENDING, RenderJob.STATUS_RUNNING}:
+        overall = RenderJob.STATUS_FAILED
+    elif statuses == {RenderJob.STATUS_PENDING}:
+        overall = RenderJob.STATUS_PENDING
+    else:
+        overall = RenderJob.STATUS_RUNNING
+
+    return {
+        "job_id": str(batch_id),
+        "status": overall,
+        "tests": [
+            {
+                "test_id": job.test_id,
+                "assessment_id": job.test.assessment_id,
+                "variant": job.test.variant,
+                "status": job.status,
+                "ready": job.test_id in ready_test_ids,
+                "error": job.error,
+            }
+            for job in jobs
+        ],
+    }
@@ -0,0 +1,65 @@
+"""
+Small thread-safe LRU cache for per-process memoization.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Keeps at most maxsize entries, evicting the least recently used one first.
+    With a ttl (in seconds), entries older than ttl are treated as missing, which
+    bounds how long a process can serve a value invalidated by another process.
+    With a weigh function, maxsize bounds the total weight of the entries instead
+    of their number (e.g. weigh=len keeps at most maxsize bytes).
+    """
+
+    def __init__(self, maxsize, ttl=None, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigh = weigh
+        self._entries = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, stored_at, _ = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                self._pop(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        weight = self.weigh(value) if self.weigh else 1
+        with self._lock:
+            self._pop(key)
+            # An entry that could never fit would only flush everything else.
+            if weight > self.maxsize:
+                return
+            self._entries[key] = (value, time.monotonic(), weight)
+            self._weight += weight
+            while self._weight > self.maxsize:
+                _, (_, _, evicted_weight) = self._entries.popitem(last=False)
+                self._weight -= evicted_weight
+
+    def delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, _MISSING)
+        if entry is not _MISSING:
+            self._weight -= entry[2]
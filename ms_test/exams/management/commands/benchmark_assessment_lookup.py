@@ -0,0 +1,112 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from exams.benchmarking import create_pool, rolled_back, time_calls
+from exams.models import Question, Test, TestQuestion
+
+METHODS = ('copied', 'copied_indexed', 'join')
+
+TEST_QUESTION = TestQuestion._meta.db_table
+QUESTION = Question._meta.db_table
+TEST = Test._meta.db_table
+
+# The SQL of ListTestQuestionsByAssessmentIdView's queryset, so both lookups skip the ORM alike.
+JOIN_SQL = (
+    Question.objects.filter(test_questions__test__assessment_id='')
+    .order_by('test_questions__position')
+    .values_list('id', 'text')
+    .query.sql_with_params()[0]
+)
+
+
+def _add_copied_assessment_ids(cursor):
+    """Recreate the assessment_id column every TestQuestion carried before migration 0015, filled from Test."""
+    if connection.vendor == 'postgresql':
+        # Deferred foreign key checks of the new rows must run before the table can be altered.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    cursor.execute(f"ALTER TABLE {TEST_QUESTION} ADD COLUMN assessment_id varchar(6) NOT NULL DEFAULT ''")
+    cursor.execute(
+        f"UPDATE {TEST_QUESTION} SET assessment_id = "
+        f"(SELECT assessment_id FROM {TEST} WHERE {TEST}.id = {TEST_QUESTION}.test_id)"
+    )
+
+
+def _copied_lookup(cursor, assessment_id):
+    """The previous ListTestQuestionsByAssessmentIdView query: the copied ids, then an id__in subquery (in id order)."""
+    cursor.execute(
+        f"SELECT id, text FROM {QUESTION} WHERE id IN "
+        f"(SELECT question_id FROM {TEST_QUESTION} WHERE assessment_id = %s)",
+        [assessment_id],
+    )
+    return cursor.fetchall()
+
+
+def _join_lookup(cursor, assessment_id):
+    """The current query: the unique Test.assessment_id, then the test's rows in position order."""
+    cursor.execute(JOIN_SQL, [assessment_id])
+    return cursor.fetchall()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the lookup of a test's questions by assessment ID: through the assessment_id copied onto "
+        "every TestQuestion as before migration 0015, without an index (copied) and with the index of "
+        "migration 0013 (copied_indexed), and through the join from the unique Test.assessment_id (join). "
+        "The tests and the copied column are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tests', type=int, default=2000, help="Number of tests.")
+        parser.add_argument('--questions', type=int, default=30, help="Number of questions per test.")
+        parser.add_argument('--lookups', type=int, default=200, help="Number of assessment IDs looked up per timed run.")
+        parser.add_argument('--repeat', type=int, default=5, help="Number of timed runs per method.")
+
+    def handle(self, *args, **options):
+        if options['tests'] < 1 or options['repeat'] < 1:
+            raise CommandError("--tests and --repeat must be at least 1.")
+        rng = random.Random(0)
+        with rolled_back(), connection.cursor() as cursor:
+            pool = create_pool(max(options['questions'] * 4, 100), answers=2)
+            question_ids = list(Question.objects.filter(question_pool=pool).values_list('id', flat=True))
+            tests = Test.objects.bulk_create([
+                Test(subject=pool.subject, instructor_id=0, group_id=str(i // 4), assessment_id=str(100000 + i),
+                     name="Benchmark Exam", variant='ABCD'[i % 4])
+                for i in range(options['tests'])
+            ])
+            TestQuestion.objects.bulk_create([
+                TestQuestion(test=test, question_id=question_id, position=position)
+                for test in tests
+                for position, question_id in enumerate(rng.sample(question_ids, options['questions']), start=1)
+            ], batch_size=5000)
+            _add_copied_assessment_ids(cursor)
+            if connection.vendor == 'postgresql':
+                cursor.execute("ANALYZE")
+            lookups = [test.assessment_id for test in rng.sample(tests, min(options['lookups'], len(tests)))]
+
+            self.stdout.write(
+                f"{options['tests']} tests of {options['questions']} questions ({options['tests'] * options['questions']} "
+                f"TestQuestion rows) on {connection.vendor}, {len(lookups)} lookups per run, {options['repeat']} runs per method."
+            )
+            self.stdout.write(f"{'method':<16}{'mean ms/lookup':>16}{'min ms/lookup':>15}{'lookups/s':>11}")
+            for method in METHODS:
+                if method == 'copied_indexed':
+                    cursor.execute(
+                        f"CREATE INDEX benchmark_testquestion_assessment_id ON {TEST_QUESTION} (assessment_id, question_id)"
+                    )
+                    if connection.vendor == 'postgresql':
+                        cursor.execute(f"ANALYZE {TEST_QUESTION}")
+                lookup = _join_lookup if method == 'join' else _copied_lookup
+
+                def run():
+                    for assessment_id in lookups:
+                        if len(lookup(cursor, assessment_id)) != options['questions']:
+                            raise CommandError(f"Lookup of {assessment_id} by {method} returned the wrong questions.")
+
+                run()
+                mean_ms, min_ms = time_calls(run, options['repeat'])
+                self.stdout.write(
+                    f"{method:<16}{mean_ms / len(lookups):>16.3f}{min_ms / len(lookups):>15.3f}"
+                    f"{len(lookups) / (mean_ms / 1000):>11.0f}"
+                )
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from exams.benchmarking import create_pool, rolled_back, synthetic_questions, time_calls
+from exams.bulk import bulk_create_questions
+from exams.models import Answer, Question
+
+METHODS = ('loop', 'bulk_create', 'copy')
+
+
+def _insert_one_by_one(question_pool, questions_data):
+    """The previous import path: one INSERT per question and one per answer."""
+    for question_data in questions_data:
+        question_data = dict(question_data)
+        answers_data = question_data.pop('answers')
+        question = Question.objects.create(question_pool=question_pool, **question_data)
+        for answer_data in answers_data:
+            Answer.objects.create(question=question, **answer_data)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how many rows per second a question bank import inserts with one INSERT per row (loop), "
+        "with batched bulk_create, and with COPY (PostgreSQL only). Every import runs in a transaction "
+        "that is rolled back, so the database is left as it was."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=2000, help="Number of questions per import.")
+        parser.add_argument('--answers', type=int, default=4, help="Number of answers per question.")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of timed imports per method.")
+        parser.add_argument('--method', action='append', dest='methods', choices=METHODS, help="Method to measure (repeatable; all by default).")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        questions_data = synthetic_questions(options['questions'], options['answers'])
+        rows = options['questions'] * (1 + options['answers'])
+        inserts = {
+            'loop': lambda pool: _insert_one_by_one(pool, questions_data),
+            'bulk_create': lambda pool: bulk_create_questions(pool, questions_data, use_copy=False),
+            'copy': lambda pool: bulk_create_questions(pool, questions_data, use_copy=True),
+        }
+
+        self.stdout.write(
+            f"{options['questions']} questions with {options['answers']} answers each ({rows} rows) "
+            f"on {connection.vendor}, {options['repeat']} timed imports per method."
+        )
+        self.stdout.write(f"{'method':<13}{'mean ms':>10}{'min ms':>10}{'rows/s':>12}{'speedup':>9}")
+        baseline = None
+        for method in options['methods'] or METHODS:
+            if method == 'copy' and connection.vendor != 'postgresql':
+                self.stdout.write(f"{method:<13}  skipped: COPY needs PostgreSQL")
+                continue
+
+            def run():
+                with rolled_back():
+                    pool = create_pool(0)
+                    inserts[method](pool)
+
+            mean_ms, min_ms = time_calls(run, options['repeat'])
+            rows_per_second = rows / (mean_ms / 1000)
+            baseline = baseline or rows_per_second
+            self.stdout.write(f"{method:<13}{mean_ms:>10.1f}{min_ms:>10.1f}{rows_per_second:>12.0f}{rows_per_second / baseline:>8.1f}x")
@@ -0,0 +1,75 @@
+import tracemalloc
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from docx import Document
+from docx.enum.section import WD_ORIENTATION, WD_SECTION
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Inches
+
+from exams.benchmarking import synthetic_payload, time_calls
+from exams.documents import ANSWER_LETTERS, ANSWER_SHEET_IMAGE_PATH, render_exam
+
+
+def _render_from_scratch(payload, answer_sheet_image_path=ANSWER_SHEET_IMAGE_PATH):
+    """The previous renderer: a new Document per exam, with the answer sheet image added from disk."""
+    document = Document()
+    document.add_heading(f"{payload['subject_name']} - {payload['test_name']}", level=0)
+    document.add_paragraph(f"Assessment ID: {payload['assessment_id']}")
+    document.add_paragraph(f"Variant: {payload['variant']}")
+    document.add_paragraph("")
+    for pos, text, default_score, answer_texts in payload['questions']:
+        document.add_paragraph(f"{pos}. {text} ({default_score} pt.)")
+        for letter, answer_text in zip(ANSWER_LETTERS, answer_texts):
+            document.add_paragraph(f"   ({letter}) {answer_text}")
+
+    section = document.add_section(WD_SECTION.NEW_PAGE)
+    section.orientation = WD_ORIENTATION.PORTRAIT
+    section.page_width = Inches(8.5)
+    section.page_height = Inches(11)
+    section.top_margin = section.bottom_margin = section.left_margin = section.right_margin = Inches(0)
+    paragraph = document.add_paragraph()
+    paragraph.add_run().add_picture(answer_sheet_image_path, width=Inches(8.5), height=Inches(11))
+    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    file_stream = BytesIO()
+    document.save(file_stream)
+    return file_stream.getvalue()
+
+
+RENDERERS = {'scratch': _render_from_scratch, 'template': render_exam}
+
+
+def _peak_allocated_kb(render, payload):
+    tracemalloc.start()
+    try:
+        render(payload)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure Word documents rendered per second, and the memory allocated while rendering one, "
+        "building every document from scratch with python-docx (scratch) and filling the precompiled "
+        "per-process exam template (template)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=50, help="Number of questions per exam.")
+        parser.add_argument('--answers', type=int, default=5, help="Number of answers per question (up to 5).")
+        parser.add_argument('--repeat', type=int, default=20, help="Number of timed renders per renderer.")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        payload = synthetic_payload(options['questions'], options['answers'])
+        self.stdout.write(f"{options['questions']} questions, {options['answers']} answers each, {options['repeat']} timed renders per renderer.")
+        self.stdout.write(f"{'renderer':<10}{'mean ms':>10}{'min ms':>10}{'docs/s':>10}{'peak alloc KB':>15}")
+        for name, render in RENDERERS.items():
+            # The first render builds the template; it is not timed.
+            render(payload)
+            mean_ms, min_ms = time_calls(lambda: render(payload), options['repeat'])
+            allocated_kb = _peak_allocated_kb(render, payload)
+            self.stdout.write(f"{name:<10}{mean_ms:>10.1f}{min_ms:>10.1f}{1000 / mean_ms:>10.1f}{allocated_kb:>15.0f}")
@@ -0,0 +1,62 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.benchmarking import peak_rss_mb, reset_peak_rss, synthetic_payload
+from exams.exports import FORMATS
+
+
+def _measure(format_name, questions, answers, repeat):
+    """Runs in a fresh process, so the peak RSS only reflects this format."""
+    export_format = FORMATS[format_name]
+    payload = synthetic_payload(questions, answers)
+    baseline = reset_peak_rss()
+    # The first render also builds the per-process template, which later renders reuse, so it is timed apart.
+    start = time.perf_counter()
+    data = export_format.render(payload)
+    first = time.perf_counter() - start
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        export_format.render(payload)
+        timings.append(time.perf_counter() - start)
+    peak = peak_rss_mb()
+    return {
+        "first_ms": first * 1000,
+        "mean_ms": sum(timings) / len(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "size_kb": len(data) / 1024,
+        "peak_rss_mb": peak,
+        "rss_growth_mb": peak - baseline,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the render time and peak memory of each export format on a synthetic exam. "
+        "Each format runs in its own process so their peak RSS figures do not mix; "
+        "the RSS growth is the peak while rendering (template build included) above the memory in use before."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=200, help="Number of questions in the exam.")
+        parser.add_argument('--answers', type=int, default=5, help="Number of answers per question (up to 5).")
+        parser.add_argument('--repeat', type=int, default=5, help="Number of timed renders per format.")
+        parser.add_argument('--format', action='append', dest='formats', choices=sorted(FORMATS), help="Format to measure (repeatable; all by default).")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        context = multiprocessing.get_context('spawn')
+        self.stdout.write(
+            f"{options['questions']} questions, {options['answers']} answers each, {options['repeat']} timed renders per format."
+        )
+        self.stdout.write(f"{'format':<8}{'first ms':>10}{'mean ms':>10}{'min ms':>10}{'size KB':>10}{'peak RSS MB':>13}{'RSS growth MB':>15}")
+        for format_name in options['formats'] or list(FORMATS):
+            with context.Pool(1) as pool:
+                result = pool.apply(_measure, (format_name, options['questions'], options['answers'], options['repeat']))
+            self.stdout.write(
+                f"{format_name:<8}{result['first_ms']:>10.1f}{result['mean_ms']:>10.1f}{result['min_ms']:>10.1f}"
+                f"{result['size_kb']:>10.0f}{result['peak_rss_mb']:>13.1f}{result['rss_growth_mb']:>15.1f}"
+            )
@@ -0,0 +1,97 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from exams.answer_keys import LETTERS
+from exams.benchmarking import rolled_back, time_calls
+from exams.grading import grade_sheets
+from exams.models import Subject, Test
+from exams.views import GradeSheetsView
+
+METHODS = ('loop', 'vectorized', 'endpoint')
+
+
+def _synthetic_answer_key(questions, rng):
+    return {
+        "correct_answers": {str(pos): rng.choice(LETTERS) for pos in range(1, questions + 1)},
+        "points": {str(pos): rng.choice((1.0, 1.5, 2.0)) for pos in range(1, questions + 1)},
+    }
+
+
+def _synthetic_sheets(answer_key, count, rng):
+    """Sheets answering about 70% of the questions correctly and leaving 5% blank, as position-ordered strings."""
+    correct = [answer_key['correct_answers'][str(pos)] for pos in range(1, len(answer_key['correct_answers']) + 1)]
+    sheets = []
+    for student in range(count):
+        answers = ''.join(
+            letter if draw < 0.7 else '-' if draw > 0.95 else rng.choice(LETTERS)
+            for letter, draw in zip(correct, (rng.random() for _ in correct))
+        )
+        sheets.append({"student_id": student, "answers": answers})
+    return sheets
+
+
+def _grade_in_a_loop(answer_key, sheets):
+    """Scoring the way consumers of the correct answers endpoint did it: one sheet and one question at a time."""
+    positions = sorted(answer_key['correct_answers'], key=int)
+    scores = []
+    for sheet in sheets:
+        score = 0.0
+        for position, letter in zip(positions, sheet['answers']):
+            if letter == answer_key['correct_answers'][position]:
+                score += answer_key['points'][position]
+        scores.append(score)
+    return scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how fast response sheets are graded: scored one by one in Python (loop), with the "
+        "vectorized exams.grading.grade_sheets (vectorized), and through POST grade/ including JSON "
+        "parsing, validation and rendering (endpoint; its test is created in a transaction that is rolled back)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sheets', type=int, default=100000, help="Number of response sheets.")
+        parser.add_argument('--questions', type=int, default=50, help="Number of questions per test.")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of timed gradings per method.")
+        parser.add_argument('--method', action='append', dest='methods', choices=METHODS, help="Method to measure (repeatable; all by default).")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        rng = random.Random(0)
+        answer_key = _synthetic_answer_key(options['questions'], rng)
+        sheets = _synthetic_sheets(answer_key, options['sheets'], rng)
+
+        self.stdout.write(f"{options['sheets']} sheets of {options['questions']} questions, {options['repeat']} timed gradings per method.")
+        self.stdout.write(f"{'method':<12}{'mean ms':>10}{'min ms':>10}{'sheets/s':>12}")
+        for method in options['methods'] or METHODS:
+            if method == 'loop':
+                mean_ms, min_ms = time_calls(lambda: _grade_in_a_loop(answer_key, sheets), options['repeat'])
+            elif method == 'vectorized':
+                mean_ms, min_ms = time_calls(lambda: grade_sheets(answer_key, sheets), options['repeat'])
+            else:
+                mean_ms, min_ms = self._time_endpoint(answer_key, sheets, options['repeat'])
+            self.stdout.write(f"{method:<12}{mean_ms:>10.1f}{min_ms:>10.1f}{len(sheets) / (mean_ms / 1000):>12.0f}")
+
+    def _time_endpoint(self, answer_key, sheets, repeat):
+        view = GradeSheetsView.as_view()
+        factory = APIRequestFactory()
+        with rolled_back():
+            subject = Subject.objects.create(institution_id=0, name="Benchmark Subject", created_by=0)
+            test = Test.objects.create(
+                subject=subject, instructor_id=0, group_id='0', assessment_id='0',
+                name="Benchmark Exam", variant='A', answer_key=answer_key,
+            )
+            body = json.dumps({"assessment_id": test.assessment_id, "sheets": sheets})
+
+            def grade():
+                response = view(factory.post('/api/test/grade/', body, content_type='application/json'))
+                response.render()
+                if response.status_code != 200:
+                    raise CommandError(f"Grading failed with status {response.status_code}: {response.content[:200]!r}")
+
+            return time_calls(grade, repeat)
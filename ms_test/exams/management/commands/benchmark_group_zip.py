@@ -0,0 +1,94 @@
+import hashlib
+import multiprocessing
+import tempfile
+import time
+import zipfile
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.benchmarking import peak_rss_mb, reset_peak_rss, synthetic_payload
+from exams.documents import render_exam
+from exams.storage import LocalBlobStore
+from exams.zipstream import stream_zip
+
+METHODS = ('buffered', 'streaming')
+
+
+def _buffered(store, files):
+    """The previous group download: every file loaded, zipped into a BytesIO, then copied out of it."""
+    contents = [(name, store.read(key)) for name, key in files]
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
+        for name, content in contents:
+            zip_file.writestr(name, content)
+    return [zip_buffer.getvalue()]
+
+
+def _streaming(store, files):
+    """GetDownloadLinkByGroupIdView: each file opened when its entry is written, chunks sent as they are compressed."""
+    return stream_zip((name, lambda key=key: store.open(key)) for name, key in files)
+
+
+def _measure(method, root, files):
+    """Runs in a fresh process, so the peak RSS only reflects this method."""
+    store = LocalBlobStore(root)
+    download = {'buffered': _buffered, 'streaming': _streaming}[method]
+    baseline = reset_peak_rss()
+    start = time.perf_counter()
+    first_byte_ms = None
+    size = 0
+    # Consume the response body the way the WSGI server does, chunk by chunk.
+    for chunk in download(store, files):
+        if first_byte_ms is None:
+            first_byte_ms = (time.perf_counter() - start) * 1000
+        size += len(chunk)
+    total_ms = (time.perf_counter() - start) * 1000
+    peak = peak_rss_mb()
+    return {
+        "first_byte_ms": first_byte_ms,
+        "total_ms": total_ms,
+        "size_kb": size / 1024,
+        "peak_rss_mb": peak,
+        "rss_growth_mb": peak - baseline,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the peak memory and time to first byte of a group ZIP download, built in memory as before "
+        "(buffered) and streamed as GetDownloadLinkByGroupIdView does (streaming). The variants' Word files "
+        "are rendered into a temporary blob store; each method runs in its own process so their peak RSS "
+        "figures do not mix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variants', type=int, default=30, help="Number of variants (files) in the group.")
+        parser.add_argument('--questions', type=int, default=50, help="Number of questions per variant.")
+
+    def handle(self, *args, **options):
+        if options['variants'] < 1:
+            raise CommandError("--variants must be at least 1.")
+        context = multiprocessing.get_context('spawn')
+        with tempfile.TemporaryDirectory() as root:
+            store = LocalBlobStore(root)
+            files = []
+            total_size = 0
+            for i in range(options['variants']):
+                variant = f"{chr(ord('A') + i % 26)}{i // 26 or ''}"
+                data = render_exam(synthetic_payload(options['questions'], variant=variant))
+                files.append((f"Benchmark Exam_Variant_{variant}.docx", store.save(data, hashlib.sha256(data).hexdigest())))
+                total_size += len(data)
+
+            self.stdout.write(
+                f"{options['variants']} variants of {options['questions']} questions, "
+                f"{total_size / 1024 / 1024:.1f} MB of Word files in total."
+            )
+            self.stdout.write(f"{'method':<11}{'first byte ms':>15}{'total ms':>10}{'size KB':>10}{'peak RSS MB':>13}{'RSS growth MB':>15}")
+            for method in METHODS:
+                with context.Pool(1) as pool:
+                    result = pool.apply(_measure, (method, root, files))
+                self.stdout.write(
+                    f"{method:<11}{result['first_byte_ms']:>15.1f}{result['total_ms']:>10.1f}{result['size_kb']:>10.0f}"
+                    f"{result['peak_rss_mb']:>13.1f}{result['rss_growth_mb']:>15.1f}"
+                )
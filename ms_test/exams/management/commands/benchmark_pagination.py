@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.pagination import Cursor, LimitOffsetPagination
+from rest_framework.test import APIRequestFactory
+
+from exams.benchmarking import create_pool, rolled_back, time_calls
+from exams.models import Question
+from exams.pagination import OptionalCursorPagination
+from exams.views import ListQuestionsByQuestionPoolView
+
+METHODS = ('keyset', 'offset')
+
+
+class _OffsetListQuestionsView(ListQuestionsByQuestionPoolView):
+    """The same listing paged with LIMIT/OFFSET, for comparison."""
+    pagination_class = LimitOffsetPagination
+
+
+def _keyset_url(path, page_size, page, ids):
+    """URL of the page-th page as reached by following `next` links: a cursor positioned after the previous page."""
+    if page == 1:
+        return f"{path}?page_size={page_size}"
+    paginator = OptionalCursorPagination()
+    paginator.base_url = f"{path}?page_size={page_size}"
+    return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(ids[(page - 1) * page_size - 1])))
+
+
+def _offset_url(path, page_size, page, ids):
+    return f"{path}?limit={page_size}&offset={(page - 1) * page_size}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency of GET questions/question-pool/<id>/ on the first and on later pages of a large "
+        "pool, with the keyset (cursor) pagination of the list endpoints and with LIMIT/OFFSET. The pool is "
+        "created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=1000, help="Number of pages in the pool; the last one is measured.")
+        parser.add_argument('--page-size', type=int, default=20, help="Number of questions per page.")
+        parser.add_argument('--repeat', type=int, default=20, help="Number of timed requests per page.")
+        parser.add_argument('--method', action='append', dest='methods', choices=METHODS, help="Pagination to measure (repeatable; both by default).")
+
+    def handle(self, *args, **options):
+        if options['pages'] < 1 or options['page_size'] < 1 or options['repeat'] < 1:
+            raise CommandError("--pages, --page-size and --repeat must be at least 1.")
+        pages = sorted({page for page in (1, 10, 100, 1000, 10000) if page < options['pages']} | {options['pages']})
+        factory = APIRequestFactory()
+        views = {
+            'keyset': (ListQuestionsByQuestionPoolView.as_view(), _keyset_url),
+            'offset': (_OffsetListQuestionsView.as_view(), _offset_url),
+        }
+
+        with rolled_back():
+            pool = create_pool(options['pages'] * options['page_size'])
+            ids = list(Question.objects.filter(question_pool=pool).order_by('id').values_list('id', flat=True))
+            path = f"/api/test/questions/question-pool/{pool.id}/"
+            self.stdout.write(
+                f"{len(ids)} questions on {connection.vendor}, {options['page_size']} per page, "
+                f"{options['repeat']} timed requests per page."
+            )
+            self.stdout.write(f"{'method':<8}{'page':>7}{'mean ms':>10}{'min ms':>10}")
+            for method in options['methods'] or METHODS:
+                view, url_for = views[method]
+                for page in pages:
+                    url = url_for(path, options['page_size'], page, ids)
+
+                    def request():
+                        response = view(factory.get(url), question_pool_id=pool.id)
+                        response.render()
+                        if response.status_code != 200 or len(response.data['results']) != options['page_size']:
+                            raise CommandError(f"Unexpected response to {url}: {response.status_code}")
+
+                    request()
+                    mean_ms, min_ms = time_calls(request, options['repeat'])
+                    self.stdout.write(f"{method:<8}{page:>7}{mean_ms:>10.2f}{min_ms:>10.2f}")
@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.benchmarking import synthetic_payload, time_calls
+from exams.documents import render_exams
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the wall-clock time of rendering the Word files of a generation's variants "
+        "one after another and on a process pool (as EXAMS_RENDER_PROCESSES does), for several "
+        "variant counts. The pool is started and warmed up before it is timed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=50, help="Number of questions per variant.")
+        parser.add_argument('--variants', type=int, action='append', help="Number of variants (repeatable; 2, 4 and 8 by default).")
+        parser.add_argument('--processes', type=int, default=os.cpu_count(), help="Size of the process pool (the number of CPUs by default).")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of timed renders per variant count and mode.")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        if options['processes'] < 2:
+            raise CommandError("--processes must be at least 2 for the documents to be rendered in parallel.")
+        variant_counts = options['variants'] or [2, 4, 8]
+        processes = options['processes']
+
+        # Start the workers and build their templates outside the timings.
+        render_exams([synthetic_payload(1)] * processes, max_workers=processes)
+
+        self.stdout.write(
+            f"{options['questions']} questions per variant, {processes} processes on {os.cpu_count()} CPUs, "
+            f"{options['repeat']} timed renders each."
+        )
+        self.stdout.write(f"{'variants':<10}{'serial ms':>11}{'parallel ms':>13}{'speedup':>9}")
+        for count in variant_counts:
+            payloads = [synthetic_payload(options['questions'], variant=chr(ord('A') + i % 26)) for i in range(count)]
+            serial_ms, _ = time_calls(lambda: render_exams(payloads, max_workers=0), options['repeat'])
+            parallel_ms, _ = time_calls(lambda: render_exams(payloads, max_workers=processes), options['repeat'])
+            self.stdout.write(f"{count:<10}{serial_ms:>11.1f}{parallel_ms:>13.1f}{serial_ms / parallel_ms:>8.2f}x")
@@ -0,0 +1,86 @@
+import cProfile
+import pstats
+from io import StringIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+from exams.benchmarking import create_pool, rolled_back, time_calls
+from exams.models import Question, Test
+from exams.read_models import QuestionReadModel, TestReadModel
+from exams.renderers import FastJSONRenderer, orjson
+from exams.serializers import QuestionSerializer, TestSerializer
+
+METHODS = ('serializer', 'read_model')
+
+
+def _listings(pool):
+    """Per listing: (queryset, serializer class, read model)."""
+    return {
+        'questions': (Question.objects.filter(question_pool=pool).prefetch_related('answers'), QuestionSerializer, QuestionReadModel()),
+        'tests': (Test.objects.filter(subject=pool.subject).select_related('subject'), TestSerializer, TestReadModel()),
+    }
+
+
+def _serialize(queryset, serializer_class):
+    """The previous list response body: a DRF serializer per object, encoded by DRF's JSONRenderer."""
+    return JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+
+
+def _read_model(queryset, read_model):
+    """The body ReadModelListMixin builds: dicts from .values() rows, encoded by FastJSONRenderer."""
+    return FastJSONRenderer().render(read_model.to_representation(read_model.rows(queryset.all())))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the objects per second of the question and test listings, built with the DRF serializers "
+        "(serializer) and with the read models of exams.read_models (read_model), from the query to the JSON "
+        "bytes. One run of each is profiled with cProfile to count the Python function calls per object; "
+        "--profile prints the functions they spend the most time in. The data is created in a transaction "
+        "that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=2000, help="Number of questions in the pool.")
+        parser.add_argument('--tests', type=int, default=2000, help="Number of tests in the subject.")
+        parser.add_argument('--repeat', type=int, default=5, help="Number of timed listings per method.")
+        parser.add_argument('--profile', type=int, default=0, metavar='N', help="Print the N functions with the most cumulative time per method.")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        with rolled_back():
+            pool = create_pool(options['questions'])
+            Test.objects.bulk_create([
+                Test(subject=pool.subject, instructor_id=0, group_id=str(i // 4), assessment_id=str(i),
+                     name="Benchmark Exam", variant='ABCD'[i % 4])
+                for i in range(options['tests'])
+            ])
+            self.stdout.write(
+                f"{options['questions']} questions with 4 answers and {options['tests']} tests on {connection.vendor}, "
+                f"{options['repeat']} timed listings per method; JSON encoded with {'orjson' if orjson else 'json'}."
+            )
+            self.stdout.write(f"{'listing':<11}{'method':<12}{'mean ms':>10}{'objects/s':>12}{'calls/object':>14}")
+            for listing, (queryset, serializer_class, read_model) in _listings(pool).items():
+                count = queryset.count()
+                builds = {
+                    'serializer': lambda: _serialize(queryset, serializer_class),
+                    'read_model': lambda: _read_model(queryset, read_model),
+                }
+                for method in METHODS:
+                    build = builds[method]
+                    build()
+                    mean_ms, _ = time_calls(build, options['repeat'])
+                    profiler = cProfile.Profile()
+                    profiler.runcall(build)
+                    stats = pstats.Stats(profiler)
+                    self.stdout.write(
+                        f"{listing:<11}{method:<12}{mean_ms:>10.1f}{count / (mean_ms / 1000):>12.0f}"
+                        f"{stats.total_calls / count:>14.0f}"
+                    )
+                    if options['profile']:
+                        output = StringIO()
+                        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(options['profile'])
+                        self.stdout.write(output.getvalue())
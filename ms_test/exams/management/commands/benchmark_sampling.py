@@ -0,0 +1,69 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from exams import sampling
+from exams.benchmarking import create_pool, rolled_back, time_calls
+from exams.generation import plan_variants
+from exams.models import Question
+
+METHODS = ('full_load', 'cold', 'warm')
+
+
+def _full_load(pool, variants, questions):
+    """The previous generation: every question row of the pool loaded, then sampled in memory."""
+    pool_questions = list(Question.objects.filter(question_pool=pool))
+    rng = random.Random(0)
+    return [rng.sample(pool_questions, questions) for _ in variants]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how long drawing the questions of a test takes as the pool grows: loading every question "
+        "row as before (full_load), and with exams.generation.plan_variants when the process has not built "
+        "the pool's question index yet (cold) or has (warm). Each pool is created in a transaction that "
+        "is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help="Comma-separated pool sizes (number of questions).")
+        parser.add_argument('--questions', type=int, default=30, help="Number of questions per variant.")
+        parser.add_argument('--variants', type=int, default=4, help="Number of variants drawn.")
+        parser.add_argument('--repeat', type=int, default=5, help="Number of timed draws per method and size.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+        if options['repeat'] < 1 or min(sizes) < options['questions'] * options['variants']:
+            raise CommandError("--repeat must be at least 1 and every size at least --questions x --variants.")
+        variants = [chr(ord('A') + i % 26) for i in range(options['variants'])]
+
+        self.stdout.write(
+            f"{options['variants']} variants of {options['questions']} questions on {connection.vendor}, "
+            f"{options['repeat']} timed draws per method and size."
+        )
+        self.stdout.write(f"{'pool size':>10}  {'method':<11}{'mean ms':>10}{'min ms':>10}")
+        for size in sizes:
+            with rolled_back():
+                pool = create_pool(size, answers=2)
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute("ANALYZE")
+                selections = [{'question_pool': pool.id, 'positions': list(range(1, options['questions'] + 1))}]
+
+                def cold():
+                    sampling._indexes.clear()
+                    plan_variants(variants, selections, seed=0)
+
+                draws = {
+                    'full_load': lambda: _full_load(pool, variants, options['questions']),
+                    'cold': cold,
+                    'warm': lambda: plan_variants(variants, selections, seed=0),
+                }
+                for method in METHODS:
+                    draws[method]()
+                    mean_ms, min_ms = time_calls(draws[method], options['repeat'])
+                    self.stdout.write(f"{size:>10}  {method:<11}{mean_ms:>10.2f}{min_ms:>10.2f}")
@@ -0,0 +1,32 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.storage import delete_unreferenced_blobs, get_blob_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the blobs of the exam file store that no GeneratedTestLink points at, e.g. those left "
+        "by deleted tests. Blobs saved within EXAMS_BLOB_DELETE_GRACE_PERIOD seconds are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Number of blob keys checked against the database at a time.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report the blobs that would be deleted.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        keys = get_blob_store().keys()
+        checked = 0
+        deleted = 0
+        while True:
+            batch = list(islice(keys, options['batch_size']))
+            if not batch:
+                break
+            checked += len(batch)
+            deleted += len(delete_unreferenced_blobs(batch, dry_run=options['dry_run']))
+            self.stdout.write(f"Checked {checked} blob(s) so far.")
+        action = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{action} {deleted} of {checked} blob(s)."))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.importers import DEFAULT_CHUNK_SIZE, FORMATS, ImportFormatError, detect_format, import_questions
+from exams.models import QuestionPool
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a question bank file (CSV, JSONL or Moodle XML) into a question pool. "
+        "The file is parsed as a stream and written in chunks, so memory use does not grow with its size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import.")
+        parser.add_argument('--pool', type=int, required=True, help="Id of the question pool to import into.")
+        parser.add_argument('--format', choices=FORMATS, help="File format (guessed from the extension by default).")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Number of questions validated and written at a time.")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the file.")
+
+    def handle(self, *args, **options):
+        try:
+            pool = QuestionPool.objects.get(id=options['pool'])
+        except QuestionPool.DoesNotExist:
+            raise CommandError(f"Question pool {options['pool']} does not exist.")
+        import_format = options['format'] or detect_format(options['path'])
+        if import_format is None:
+            raise CommandError("Cannot tell the file format from its extension; pass --format.")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        def progress(report):
+            self.stdout.write(
+                f"{report['processed']} question(s) read, {report['imported']} valid, {report['skipped']} skipped "
+                f"({report['questions_per_second']} questions/s)."
+            )
+
+        try:
+            with open(options['path'], 'rb') as bank:
+                report = import_questions(
+                    pool, bank, import_format,
+                    chunk_size=options['chunk_size'], dry_run=options['dry_run'], progress=progress,
+                )
+        except OSError as exc:
+            raise CommandError(f"Cannot open {options['path']}: {exc}")
+        except ImportFormatError as exc:
+            imported = exc.report['imported'] if exc.report and not options['dry_run'] else 0
+            raise CommandError(f"{exc} {imported} question(s) were imported before the error.")
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+        if report['skipped'] > len(report['errors']):
+            self.stderr.write(f"... and {report['skipped'] - len(report['errors'])} more invalid row(s).")
+        action = "would be imported" if options['dry_run'] else "imported"
+        summary = f"{report['imported']} question(s) {action} into pool {pool.id}, {report['skipped']} skipped in {report['seconds']}s."
+        self.stdout.write(self.style.WARNING(summary) if report['skipped'] else self.style.SUCCESS(summary))
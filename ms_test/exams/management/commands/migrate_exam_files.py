@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from exams.models import GeneratedTestLink
+from exams.storage import put_exam_file
+
+
+class Command(BaseCommand):
+    help = "Move exam files stored inline in GeneratedTestLink.exam_file to the configured blob store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help="Number of files loaded from the database at a time.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = GeneratedTestLink.objects.filter(file_key__isnull=True, exam_file__isnull=False).order_by('id')
+        last_id = 0
+        moved = 0
+        moved_bytes = 0
+        while True:
+            # Only one batch of blobs is held in memory at a time.
+            batch = list(pending.filter(id__gt=last_id).only('id', 'exam_file')[:batch_size])
+            if not batch:
+                break
+            for link in batch:
+                stored_file = put_exam_file(link.exam_file)
+                GeneratedTestLink.objects.filter(id=link.id).update(exam_file=None, **stored_file)
+                moved += 1
+                moved_bytes += stored_file['file_size']
+            last_id = batch[-1].id
+            self.stdout.write(f"Moved {moved} file(s) so far ({moved_bytes} bytes).")
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} exam file(s) to the blob store."))
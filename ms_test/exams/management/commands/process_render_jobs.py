@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exams.jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Render queued exam documents. Runs until stopped unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit as soon as the queue is empty.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to wait between polls of an empty queue.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending_jobs()
+            if processed:
+                self.stdout.write(f"Processed {processed} render job(s).")
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
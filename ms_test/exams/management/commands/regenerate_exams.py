@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from exams.regeneration import DEFAULT_BATCH_SIZE, regenerate_in_batches, select_tests
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate the Word files of the tests of a subject or group, or of the tests using "
+        "given or recently changed questions. Tests whose content did not change are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', type=int, help="Regenerate every test of this subject id.")
+        parser.add_argument('--group', help="Regenerate every test of this group id.")
+        parser.add_argument('--question', type=int, action='append', dest='questions', help="Regenerate the tests using this question id (repeatable).")
+        parser.add_argument('--changed-since', help="Regenerate the tests using questions or answers updated since this ISO 8601 datetime.")
+        parser.add_argument('--stale', action='store_true', help="Regenerate the tests whose answer key was cleared by a question or answer edit.")
+        parser.add_argument('--force', action='store_true', help="Render every selected test, even if its content did not change.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Number of tests loaded, rendered and written at a time.")
+        parser.add_argument('--processes', type=int, help="Number of render worker processes (defaults to EXAMS_RENDER_PROCESSES).")
+
+    def handle(self, *args, **options):
+        changed_since = None
+        if options['changed_since']:
+            changed_since = parse_datetime(options['changed_since'])
+            if changed_since is None:
+                raise CommandError(f"Invalid --changed-since datetime: {options['changed_since']}")
+
+        test_ids = select_tests(
+            subject_id=options['subject'],
+            group_id=options['group'],
+            question_ids=options['questions'],
+            changed_since=changed_since,
+            stale=options['stale'],
+        )
+        if not test_ids:
+            self.stdout.write("No tests matched.")
+            return
+        self.stdout.write(f"Regenerating {len(test_ids)} test(s).")
+
+        def progress(report):
+            done = report['regenerated'] + report['unchanged'] + report['empty'] + report['failed']
+            self.stdout.write(f"{done}/{report['total']} test(s) processed ({report['tests_per_second']} tests/s).")
+
+        report = regenerate_in_batches(
+            test_ids,
+            batch_size=options['batch_size'],
+            force=options['force'],
+            max_workers=options['processes'],
+            progress=progress,
+        )
+        for failure in report['failures']:
+            self.stderr.write(f"Failed tests {failure['test_ids']}: {failure['error']}")
+        summary = (
+            f"{report['regenerated']} regenerated, {report['unchanged']} unchanged, {report['empty']} without questions, "
+            f"{report['failed']} failed in {report['seconds']}s ({report['rendered_per_second']} renders/s)."
+        )
+        self.stdout.write(self.style.ERROR(summary) if report['failed'] else self.style.SUCCESS(summary))
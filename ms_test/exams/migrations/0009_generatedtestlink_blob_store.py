@@ -0,0 +1,53 @@
+# Generated by Django 5.1.5 on 2026-10-17 19:49
+
+from django.db import migrations, models
+
+
+def restore_inline_files(apps, schema_editor):
+    """
+    Before exam_file becomes required again, copy stored files back into it.
+    Files the blob store cannot return are left empty rather than blocking the rollback.
+    """
+    from exams.storage import get_blob_store
+
+    GeneratedTestLink = apps.get_model('exams', 'GeneratedTestLink')
+    links = GeneratedTestLink.objects.filter(exam_file__isnull=True).only('id', 'file_key')
+    for link in links.iterator():
+        data = b''
+        if link.file_key:
+            try:
+                data = get_blob_store().read(link.file_key)
+            except Exception:
+                pass
+        GeneratedTestLink.objects.filter(id=link.id).update(exam_file=data)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_renderjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedtestlink',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedtestlink',
+            name='file_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedtestlink',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='generatedtestlink',
+            name='exam_file',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_inline_files),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0009_generatedtestlink_blob_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedtestlink',
+            name='generated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
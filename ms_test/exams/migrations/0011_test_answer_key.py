@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0010_generatedtestlink_generated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='answer_key',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
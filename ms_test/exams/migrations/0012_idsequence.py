@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-17 19:55
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_sequence(apps, schema_editor):
+    # Tests that already exist carry random IDs, which the allocator has to skip.
+    Test = apps.get_model('exams', 'Test')
+    IdSequence = apps.get_model('exams', 'IdSequence')
+    legacy_test_id = Test.objects.aggregate(last=Max('id'))['last'] or 0
+    IdSequence.objects.create(name='public_id', legacy_test_id=legacy_test_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0011_test_answer_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField(default=0)),
+                ('legacy_test_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_sequence, migrations.RunPython.noop),
+    ]
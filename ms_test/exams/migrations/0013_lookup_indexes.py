@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-17 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0012_idsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='generatedtestlink',
+            index=models.Index(fields=['assessment_id'], name='exams_gener_assessm_079865_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['created_by', 'id'], name='exams_subje_created_accd6f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['group_id', 'id'], name='exams_test_group_i_dba29e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['subject', 'group_id'], name='exams_test_subject_ede354_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testquestion',
+            index=models.Index(fields=['test', 'position'], name='exams_testq_test_id_df66c8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testquestion',
+            index=models.Index(fields=['assessment_id', 'question'], name='exams_testq_assessm_498162_idx'),
+        ),
+    ]
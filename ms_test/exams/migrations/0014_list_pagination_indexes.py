@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-17 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0013_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['question_pool', 'id'], name='exams_quest_questio_6649e3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionpool',
+            index=models.Index(fields=['subject', 'id'], name='exams_quest_subject_536a38_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['subject', 'id'], name='exams_test_subject_44f66c_idx'),
+        ),
+    ]
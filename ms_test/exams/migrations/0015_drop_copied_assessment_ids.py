@@ -0,0 +1,50 @@
+# Generated by Django 5.1.5 on 2026-10-17 19:59
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def restore_assessment_ids(apps, schema_editor):
+    # Reverse only: copy each test's assessment_id back onto its rows.
+    Test = apps.get_model('exams', 'Test')
+    assessment_id = Subquery(Test.objects.filter(id=OuterRef('test_id')).values('assessment_id')[:1])
+    for model_name in ('TestQuestion', 'GeneratedTestLink'):
+        apps.get_model('exams', model_name).objects.update(assessment_id=assessment_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0014_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='generatedtestlink',
+            name='exams_gener_assessm_079865_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='testquestion',
+            name='exams_testq_assessm_498162_idx',
+        ),
+        # A default lets the columns be re-added to existing rows when migrating backwards.
+        migrations.AlterField(
+            model_name='generatedtestlink',
+            name='assessment_id',
+            field=models.CharField(default='', max_length=6),
+        ),
+        migrations.AlterField(
+            model_name='testquestion',
+            name='assessment_id',
+            field=models.CharField(default='', max_length=6),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_assessment_ids),
+        migrations.RemoveField(
+            model_name='generatedtestlink',
+            name='assessment_id',
+        ),
+        migrations.RemoveField(
+            model_name='testquestion',
+            name='assessment_id',
+        ),
+    ]
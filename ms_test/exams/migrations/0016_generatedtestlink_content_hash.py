@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0015_drop_copied_assessment_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedtestlink',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0016_generatedtestlink_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='generation_seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='testquestion',
+            name='answer_order',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
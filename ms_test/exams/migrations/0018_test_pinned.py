@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-17 20:09
+
+from django.db import migrations, models
+
+
+def pin_existing_tests(apps, schema_editor):
+    # Every test generated so far had its file rendered and stored eagerly.
+    Test = apps.get_model('exams', 'Test')
+    Test.objects.update(pinned=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0017_variant_seed_and_answer_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='pinned',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(pin_existing_tests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-17 20:42
+
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def keep_current_permutation(apps, schema_editor):
+    """
+    Sequences that already handed out IDs keep the permutation they used, whose keys
+    were derived from SECRET_KEY; storing them makes later SECRET_KEY rotations safe.
+    Unused sequences get random keys on first use.
+    """
+    IdSequence = apps.get_model('exams', 'IdSequence')
+    Test = apps.get_model('exams', 'Test')
+    max_digits = Test._meta.get_field('assessment_id').max_length
+    keys = {
+        str(digits): hmac.new(settings.SECRET_KEY.encode(), f"exams-ids:{digits}".encode(), hashlib.sha256).hexdigest()
+        for digits in range(5, max_digits + 1)
+    }
+    IdSequence.objects.filter(next_value__gt=0).update(permutation_keys=keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0018_test_pinned'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idsequence',
+            name='permutation_keys',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(keep_current_permutation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-17 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0019_idsequence_permutation_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('answer_key__isnull', True)), fields=['id'], name='exams_test_stale_idx'),
+        ),
+    ]
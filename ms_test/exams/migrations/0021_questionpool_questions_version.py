@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0020_stale_tests_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionpool',
+            name='questions_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0021_questionpool_questions_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['updated_at'], name='exams_answe_updated_93cd67_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['updated_at'], name='exams_quest_updated_c2677f_idx'),
+        ),
+    ]
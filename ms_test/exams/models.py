@@ -1,5 +1,9 @@
+from io import BytesIO
+
 from django.db import models
 
+from .storage import get_blob_store, put_exam_file
+
 class Subject(models.Model):
     institution_id = models.IntegerField()
     name = models.CharField(max_length=255)
@@ -8,6 +12,9 @@ class Subject(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['created_by', 'id'])]
+
     def __str__(self):
         return self.name
 
@@ -16,9 +23,14 @@ class QuestionPool(models.Model):
     instructor_id = models.IntegerField()  # Referenced via user_id from UserService
     name = models.CharField(max_length=255)
     description = models.CharField(max_length=255, blank=True, null=True)
+    # Incremented by every write to the pool's questions; each process keys its sampling index by it (see exams.sampling).
+    questions_version = models.BigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['subject', 'id'])]
+
     def __str__(self):
         return self.name
 
@@ -29,9 +41,28 @@ class Question(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['question_pool', 'id']),
+            # Questions edited since a date, selected by regenerate-tests with "changed_since".
+            models.Index(fields=['updated_at']),
+        ]
+
     def __str__(self):
         return self.text[:50]
 
+    def ordered_answers(self, answer_order=None):
+        """
+        Return the answers (prefetch them with prefetch_related('answers')), in answer_order
+        when given: the answer ids in the order a test shows them. Answers added since come
+        last and deleted ones are left out.
+        """
+        answers = list(self.answers.all())
+        if not answer_order:
+            return answers
+        rank = {answer_id: i for i, answer_id in enumerate(answer_order)}
+        return sorted(answers, key=lambda answer: rank.get(answer.id, len(rank)))
+
 class Answer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
     text = models.TextField()
@@ -41,6 +72,7 @@ class Answer(models.Model):
 
     class Meta:
         ordering = ['id']  # Ensure consistent ordering when retrieving answers
+        indexes = [models.Index(fields=['updated_at'])]
 
     def __str__(self):
         return self.text[:50]
@@ -48,15 +80,31 @@ class Answer(models.Model):
 class Test(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='tests')
     instructor_id = models.IntegerField()  # Referenced via user_id from UserService
-    group_id = models.CharField(max_length=6)  # Randomly generated 5-digit string
-    assessment_id = models.CharField(max_length=6, unique=True)  # Randomly generated 5-digit string
+    group_id = models.CharField(max_length=6)  # Allocated by exams.ids (5 digits until that space runs out)
+    assessment_id = models.CharField(max_length=6, unique=True)  # Allocated by exams.ids (5 digits until that space runs out)
     name = models.CharField(max_length=255)
     variant = models.CharField(max_length=2)
     notes = models.CharField(max_length=255, blank=True, null=True)
     instructions = models.CharField(max_length=255, blank=True, null=True)
+    # Precomputed {"correct_answers": ..., "points": ...} served to the grading service (see exams.answer_keys).
+    answer_key = models.JSONField(blank=True, null=True)
+    # Seed the variants of the generation were drawn with (see exams.variants); shared by the group.
+    generation_seed = models.BigIntegerField(blank=True, null=True)
+    # Pinned tests keep their rendered file in the blob store; the others are rendered on download (see exams.exam_files).
+    pinned = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['group_id', 'id']),
+            models.Index(fields=['subject', 'id']),
+            # Covers the distinct group ids of a subject without reading the table.
+            models.Index(fields=['subject', 'group_id']),
+            # Only the tests whose answer key was cleared by an edit, selected by regenerate-tests with "stale".
+            models.Index(fields=['id'], condition=models.Q(answer_key__isnull=True), name='exams_test_stale_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} (Variant {self.variant})"
 
@@ -64,15 +112,91 @@ class TestQuestion(models.Model):
     test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='test_questions')
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='test_questions')
     position = models.IntegerField()
-    assessment_id = models.CharField(max_length=6)  # Add this line
+    # Answer ids in the order this test shows them; None keeps the answers' own order.
+    answer_order = models.JSONField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['test', 'position'])]
 
     def __str__(self):
         return f"{self.test.name} - {self.question.text} (Position {self.position})"
 
 class GeneratedTestLink(models.Model):
     test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='generated_links')
-    exam_file = models.BinaryField()
-    assessment_id = models.CharField(max_length=6)  # Add this line
+    # Legacy inline copy of the file; `manage.py migrate_exam_files` moves it to the blob store.
+    exam_file = models.BinaryField(blank=True, null=True)
+    # Location of the file in the blob store (see exams.storage), with its size and SHA-256 checksum.
+    file_key = models.CharField(max_length=255, blank=True, null=True)
+    file_size = models.BigIntegerField(blank=True, null=True)
+    checksum = models.CharField(max_length=64, blank=True, null=True)
+    # Fingerprint of the render payload the file was built from (see exams.documents.payload_fingerprint).
+    content_hash = models.CharField(max_length=64, blank=True, null=True)
+    generated_at = models.DateTimeField(auto_now=True, null=True)
+
+    def __str__(self):
+        return f"Generated link for {self.test.name} (Variant {self.test.variant})"
+
+    def store_file(self, data):
+        """Write data to the blob store and point this link at it (the row still needs saving)."""
+        for field, value in put_exam_file(data).items():
+            setattr(self, field, value)
+        self.exam_file = None
+
+    def open_file(self):
+        """Return a readable binary file-like object for the exam file."""
+        if self.file_key:
+            return get_blob_store().open(self.file_key)
+        return BytesIO(bytes(self.exam_file or b''))
+
+    def read_file(self):
+        """Return the bytes of the exam file."""
+        if self.file_key:
+            return get_blob_store().read(self.file_key)
+        return bytes(self.exam_file or b'')
+
+class RenderJob(models.Model):
+    """
+    A queued request to render the Word file of one test.
+    Jobs created by the same generation request share a batch_id, which is the
+    job id handed back to the client.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    batch_id = models.UUIDField(db_index=True)
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='render_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'])]
+
+    def __str__(self):
+        return f"Render job {self.batch_id} for {self.test.name} (Variant {self.test.variant}): {self.status}"
+
+class IdSequence(models.Model):
+    """
+    Shared counter behind the group and assessment IDs (see exams.ids).
+    Tests with an id up to legacy_test_id got random IDs before the counter existed.
+    permutation_keys holds the hex key of the permutation of each ID width ({"5": ..., "6": ...}).
+    Keys are generated on first use and never rotated: a new key would map the counter
+    onto IDs that were already handed out.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=0)
+    legacy_test_id = models.BigIntegerField(default=0)
+    permutation_keys = models.JSONField(default=dict)
 
     def __str__(self):
-        return f"Generated link for {self.test.name} (Variant {self.test.variant})"
\ No newline at end of file
+        return f"{self.name}: {self.next_value}"
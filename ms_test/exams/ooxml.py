@@ -0,0 +1,96 @@
+"""
+Streaming OOXML writer for exam documents.
+
+Produces the same Word document as documents.render_exam, but without building
+an XML tree: the paragraphs of document.xml are formatted as strings and
+written straight into the compressed ZIP entry, one question at a time. The
+other parts of the package are copied from the precompiled exam template.
+"""
+import re
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml import parse_xml
+
+from .documents import ANSWER_SHEET_IMAGE_PATH, ANSWER_LETTERS, _get_template
+
+# Characters XML 1.0 does not allow; python-docx would refuse them.
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# Tabs and line breaks become their own run elements, as python-docx does.
+_RUN_SPECIAL = re.compile('([\t\n\r])')
+_MARKER = 'exams-ooxml-split'
+
+# Document part halves around the inserted paragraphs, keyed by answer sheet image path.
+_halves = {}
+
+
+def _document_halves(answer_sheet_image_path):
+    """Split the template's document.xml where the exam paragraphs go (before the first section break)."""
+    halves = _halves.get(answer_sheet_image_path)
+    if halves is None:
+        document = parse_xml(_get_template(answer_sheet_image_path).document_xml)
+        section_break = next(p for p in document.body.p_lst if p.pPr is not None and p.pPr.sectPr is not None)
+        section_break.add_p_before().add_r().text = _MARKER
+        marker = f'<w:p><w:r><w:t>{_MARKER}</w:t></w:r></w:p>'.encode()
+        head, tail = serialize_part_xml(document).split(marker)
+        halves = _halves[answer_sheet_image_path] = (head, tail)
+    return halves
+
+
+def _run(text):
+    parts = []
+    for piece in _RUN_SPECIAL.split(_INVALID_XML_CHARS.sub('', text)):
+        if piece == '\t':
+            parts.append('<w:tab/>')
+        elif piece in ('\n', '\r'):
+            parts.append('<w:br/>')
+        elif piece:
+            space = ' xml:space="preserve"' if len(piece.strip()) < len(piece) else ''
+            parts.append(f'<w:t{space}>{escape(piece)}</w:t>')
+    return f'<w:r>{"".join(parts)}</w:r>'
+
+
+def _paragraph(text, style=None):
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+    if not text:
+        return f'<w:p>{properties}</w:p>' if properties else '<w:p/>'
+    return f'<w:p>{properties}{_run(text)}</w:p>'
+
+
+def iter_exam_paragraphs(payload):
+    """Yield the document.xml bytes of the exam paragraphs, one chunk per header or question."""
+    yield ''.join([
+        _paragraph(f"{payload['subject_name']} - {payload['test_name']}", style='Title'),
+        _paragraph(f"Assessment ID: {payload['assessment_id']}"),
+        _paragraph(f"Variant: {payload['variant']}"),
+        _paragraph(''),
+    ]).encode()
+    for pos, text, default_score, answer_texts in payload['questions']:
+        chunk = [_paragraph(f"{pos}. {text} ({default_score} pt.)")]
+        for letter, answer_text in zip(ANSWER_LETTERS, answer_texts):
+            chunk.append(_paragraph(f"   ({letter}) {answer_text}"))
+        yield ''.join(chunk).encode()
+
+
+def render_ooxml(payload, answer_sheet_image_path=ANSWER_SHEET_IMAGE_PATH):
+    """
+    Render a payload built by documents.build_exam_payload into the bytes of a Word document.
+    Works on plain data only, so it can run in a worker process.
+    """
+    template = _get_template(answer_sheet_image_path)
+    head, tail = _document_halves(answer_sheet_image_path)
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w') as zip_file:
+        for name, data in template.parts:
+            info = template.zip_info(name)
+            if name != template.DOCUMENT_PART:
+                zip_file.writestr(info, data)
+                continue
+            with zip_file.open(info, 'w') as part:
+                part.write(head)
+                for chunk in iter_exam_paragraphs(payload):
+                    part.write(chunk)
+                part.write(tail)
+    return output.getvalue()
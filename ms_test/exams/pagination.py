@@ -0,0 +1,23 @@
+"""
+Keyset pagination for the list endpoints.
+
+Pages are fetched with `WHERE id > <last id> ORDER BY id LIMIT n`, so the cost
+of a page does not grow with how far into the list it is. Pagination is opt-in:
+requests without `cursor` or `page_size` still get the whole list as a plain
+array, as before.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size = getattr(settings, 'EXAMS_PAGE_SIZE', 100)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'EXAMS_MAX_PAGE_SIZE', 1000)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
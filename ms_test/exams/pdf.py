@@ -0,0 +1,216 @@
+"""
+Minimal PDF renderer for exam payloads.
+
+Writes the PDF objects by hand: text set in the standard Helvetica fonts (no
+font embedding, WinAnsi encoding) with a simple line wrapper, and the answer
+sheet JPEG embedded as is through the DCTDecode filter on the last page. No
+layout engine or document model is involved, so rendering a 200-question exam
+costs little more than formatting its text.
+"""
+import zlib
+
+from .documents import ANSWER_LETTERS, ANSWER_SHEET_IMAGE_PATH
+
+# US Letter in points, with the margins of the Word template (1" top and bottom, 1.25" left and right).
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN_X, MARGIN_Y = 90, 72
+
+BODY_FONT, BODY_SIZE, BODY_LEADING = 'F1', 11, 14
+TITLE_FONT, TITLE_SIZE, TITLE_LEADING = 'F2', 20, 26
+QUESTION_SPACING = 6
+ANSWER_INDENT = 18
+
+# Helvetica glyph widths (1/1000 em) of the printable ASCII characters; others use _DEFAULT_WIDTH.
+_HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_DEFAULT_WIDTH = 556
+_WIDTHS = [_HELVETICA_WIDTHS[c - 32] if 32 <= c < 127 else _DEFAULT_WIDTH for c in range(256)]
+# Helvetica-Bold runs about this much wider; close enough for wrapping titles.
+_BOLD_FACTOR = 1.08
+
+# JPEG start-of-frame markers, which carry the image size and number of components.
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_COLOR_SPACES = {1: '/DeviceGray', 3: '/DeviceRGB', 4: '/DeviceCMYK'}
+
+# Answer sheet images as (jpeg bytes, width, height, components), keyed by path.
+_images = {}
+
+
+def _answer_sheet(path):
+    image = _images.get(path)
+    if image is None:
+        with open(path, 'rb') as image_file:
+            data = image_file.read()
+        image = _images[path] = (data, *_jpeg_size(data))
+    return image
+
+
+def _jpeg_size(data):
+    """Return (width, height, components) read from a JPEG's start-of-frame segment."""
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            raise ValueError("Invalid JPEG segment.")
+        marker = data[i + 1]
+        if marker in _SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], 'big')
+            width = int.from_bytes(data[i + 7:i + 9], 'big')
+            return width, height, data[i + 9]
+        i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+    raise ValueError("JPEG without a start-of-frame segment.")
+
+
+def _encode(text):
+    return text.replace('\t', '    ').encode('cp1252', 'replace')
+
+
+def _width(encoded, size, font):
+    units = sum(map(_WIDTHS.__getitem__, encoded))
+    if font == TITLE_FONT:
+        units *= _BOLD_FACTOR
+    return units * size / 1000
+
+
+def _wrap(text, max_width, size, font):
+    """Split text into encoded lines no wider than max_width, breaking at spaces where possible."""
+    space = _width(b' ', size, font)
+    lines = []
+    for paragraph in _encode(text).replace(b'\r\n', b'\n').replace(b'\r', b'\n').split(b'\n'):
+        line, line_width = [], 0
+        for word in paragraph.split(b' '):
+            word_width = _width(word, size, font)
+            if not line or line_width + space + word_width <= max_width:
+                if line:
+                    line_width += space
+                line.append(word)
+                line_width += word_width
+                if line_width <= max_width:
+                    continue
+                # Only a single word wider than the line gets here.
+                line.pop()
+            if line:
+                lines.append(b' '.join(line))
+            # A word wider than the line is broken between characters.
+            while word_width > max_width and len(word) > 1:
+                cut = len(word) - 1
+                while cut > 1 and _width(word[:cut], size, font) > max_width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = _width(word, size, font)
+            line, line_width = [word], word_width
+        lines.append(b' '.join(line))
+    return lines
+
+
+def _escape(encoded):
+    return encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _blocks(payload):
+    """
+    Lay the exam text out as blocks of (font, size, leading, indent, encoded line) tuples.
+    A block (the header, or a question with its answers) is kept on one page when it fits.
+    """
+    text_width = PAGE_WIDTH - 2 * MARGIN_X
+
+    def lines(text, font, size, leading, indent=0):
+        return [(font, size, leading, indent, line) for line in _wrap(text, text_width - indent, size, font)]
+
+    header = lines(f"{payload['subject_name']} - {payload['test_name']}", TITLE_FONT, TITLE_SIZE, TITLE_LEADING)
+    header += lines(f"Assessment ID: {payload['assessment_id']}", BODY_FONT, BODY_SIZE, BODY_LEADING)
+    header += lines(f"Variant: {payload['variant']}", BODY_FONT, BODY_SIZE, BODY_LEADING)
+    yield header
+
+    for pos, text, default_score, answer_texts in payload['questions']:
+        block = lines(f"{pos}. {text} ({default_score} pt.)", BODY_FONT, BODY_SIZE, BODY_LEADING)
+        for letter, answer_text in zip(ANSWER_LETTERS, answer_texts):
+            block += lines(f"({letter}) {answer_text}", BODY_FONT, BODY_SIZE, BODY_LEADING, ANSWER_INDENT)
+        yield block
+
+
+def _text_pages(payload):
+    """Return the content streams of the text pages."""
+    pages, commands = [], []
+    top, bottom = PAGE_HEIGHT - MARGIN_Y, MARGIN_Y
+    y = top
+    for block in _blocks(payload):
+        height = sum(leading for _, _, leading, _, _ in block) + QUESTION_SPACING
+        if y != top:
+            if y - height < bottom and height <= top - bottom:
+                pages.append(b'\n'.join(commands))
+                commands, y = [], top
+            else:
+                y -= QUESTION_SPACING
+        for font, size, leading, indent, line in block:
+            if y - leading < bottom:
+                pages.append(b'\n'.join(commands))
+                commands, y = [], top
+            y -= leading
+            commands.append(b'BT /%s %d Tf %d %.2f Td (%s) Tj ET' % (font.encode(), size, MARGIN_X + indent, y + (leading - size) / 2, _escape(line)))
+    pages.append(b'\n'.join(commands))
+    return pages
+
+
+class _Writer:
+    """Collects numbered PDF objects and the byte offsets the cross-reference table needs."""
+
+    def __init__(self):
+        self.chunks = [b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n']
+        self.size = len(self.chunks[0])
+        self.offsets = {}
+
+    def _write(self, data):
+        self.chunks.append(data)
+        self.size += len(data)
+
+    def add(self, number, dictionary, stream=None):
+        self.offsets[number] = self.size
+        self._write(b'%d 0 obj\n' % number)
+        if stream is None:
+            self._write(dictionary + b'\nendobj\n')
+            return
+        self._write(dictionary[:-2] + b' /Length %d >>\nstream\n' % len(stream))
+        self._write(stream)
+        self._write(b'\nendstream\nendobj\n')
+
+    def finish(self, root):
+        count = max(self.offsets) + 1
+        xref_offset = self.size
+        self._write(b'xref\n0 %d\n0000000000 65535 f \n' % count)
+        self._write(b''.join(b'%010d 00000 n \n' % self.offsets[number] for number in range(1, count)))
+        self._write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (count, root, xref_offset))
+        return b''.join(self.chunks)
+
+
+def render_pdf(payload, answer_sheet_image_path=ANSWER_SHEET_IMAGE_PATH):
+    """
+    Render a payload built by documents.build_exam_payload into the bytes of a PDF document.
+    Works on plain data only, so it can run in a worker process.
+    """
+    image, image_width, image_height, components = _answer_sheet(answer_sheet_image_path)
+    contents = _text_pages(payload)
+    # The answer sheet covers the whole last page.
+    contents.append(b'q %d 0 0 %d 0 0 cm /Im1 Do Q' % (PAGE_WIDTH, PAGE_HEIGHT))
+
+    # Objects 1-5 are shared; each page then takes a content stream and a page object.
+    page_numbers = [7 + 2 * i for i in range(len(contents))]
+    writer = _Writer()
+    writer.add(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    writer.add(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % n for n in page_numbers), len(page_numbers)))
+    writer.add(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+    writer.add(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+    writer.add(5, b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s /BitsPerComponent 8 /Filter /DCTDecode >>' % (
+        image_width, image_height, _COLOR_SPACES[components].encode()), image)
+    resources = b'<< /Font << /F1 3 0 R /F2 4 0 R >> /XObject << /Im1 5 0 R >> >>'
+    for content, page_number in zip(contents, page_numbers):
+        writer.add(page_number - 1, b'<< /Filter /FlateDecode >>', zlib.compress(content))
+        writer.add(page_number, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>' % (
+            PAGE_WIDTH, PAGE_HEIGHT, resources, page_number - 1))
+    return writer.finish(root=1)
@@ -0,0 +1,127 @@
+"""
+Fast read paths for the large list endpoints.
+
+A read model turns a queryset into the same JSON-ready dicts the matching DRF
+serializer produces, but it builds them from `.values()` rows. No model
+instances or serializer field trees are created per object. Views opt in with
+ReadModelListMixin and a read_model attribute.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import Answer
+
+_CENTS = Decimal('0.01')
+
+
+def _datetime(value, tz):
+    # Same output as DRF's DateTimeField: ISO 8601 in the current time zone tz, "Z" for UTC.
+    if value is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _score(value):
+    # Same output as DRF's DecimalField with decimal_places=2: a string like "1.50".
+    if value is None:
+        return ''
+    return '{:f}'.format(Decimal(value).quantize(_CENTS))
+
+
+class ReadModel:
+    """Maps a queryset to a list of dicts through .values(*fields) and represent()."""
+    fields = ()
+
+    def rows(self, queryset):
+        return queryset.prefetch_related(None).values(*self.fields)
+
+    def to_representation(self, rows):
+        return [self.represent(row) for row in rows]
+
+    def represent(self, row):
+        return dict(row)
+
+
+class QuestionReadModel(ReadModel):
+    """Output of QuestionSerializer: questions with their answers."""
+    fields = ('id', 'question_pool_id', 'text', 'default_score', 'created_at', 'updated_at')
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        # Looked up once: timezone.localtime() per value would cost more than the rest of the row.
+        tz = timezone.get_current_timezone()
+        answers_by_question = defaultdict(list)
+        answers = (
+            Answer.objects.filter(question_id__in=[row['id'] for row in rows])
+            .order_by('id')
+            .values_list('question_id', 'id', 'text', 'is_correct', 'created_at', 'updated_at')
+        )
+        for question_id, answer_id, text, is_correct, created_at, updated_at in answers:
+            answers_by_question[question_id].append({
+                'id': answer_id,
+                'text': text,
+                'is_correct': is_correct,
+                'created_at': _datetime(created_at, tz),
+                'updated_at': _datetime(updated_at, tz),
+            })
+        return [
+            {
+                'id': row['id'],
+                'question_pool': row['question_pool_id'],
+                'text': row['text'],
+                'default_score': _score(row['default_score']),
+                'answers': self.row_answers(row, answers_by_question[row['id']]),
+                'created_at': _datetime(row['created_at'], tz),
+                'updated_at': _datetime(row['updated_at'], tz),
+            }
+            for row in rows
+        ]
+
+    def row_answers(self, row, answers):
+        return answers
+
+
+class TestQuestionReadModel(QuestionReadModel):
+    """
+    QuestionReadModel for the questions of one test, with the answers in the order the
+    test shows them. The queryset must go through test_questions, filtered to one test.
+    """
+    fields = QuestionReadModel.fields + ('test_questions__answer_order',)
+
+    def row_answers(self, row, answers):
+        answer_order = row['test_questions__answer_order']
+        if not answer_order:
+            return answers
+        rank = {answer_id: i for i, answer_id in enumerate(answer_order)}
+        return sorted(answers, key=lambda answer: rank.get(answer['id'], len(rank)))
+
+
+class TestReadModel(ReadModel):
+    """Output of TestSerializer."""
+    fields = ('id', 'subject_id', 'instructor_id', 'group_id', 'assessment_id', 'name', 'variant', 'notes', 'instructions')
+
+
+class ReadModelListMixin:
+    """
+    List view mixin that builds the response with self.read_model instead of the
+    serializer. The serializer_class is still used for the browsable API and schemas.
+    """
+    read_model = None
+
+    def list(self, request, *args, **kwargs):
+        if self.read_model is None:
+            return super().list(request, *args, **kwargs)
+        rows = self.read_model.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.read_model.to_representation(page))
+        return Response(self.read_model.to_representation(rows))
@@ -0,0 +1,87 @@
+"""
+Bulk regeneration of exam files, e.g. after fixing a typo in a shared question.
+
+select_tests picks the tests to refresh; regenerate_in_batches runs
+rendering.regenerate_tests over them a batch at a time (so memory stays bounded
+and one bad test only fails its batch) and reports throughput and failures.
+"""
+import logging
+import time
+
+from django.db.models import Q
+
+from .models import Answer, Question, Test
+from .rendering import regenerate_tests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+
+
+def select_tests(subject_id=None, group_id=None, question_ids=None, changed_since=None, stale=False):
+    """
+    Return the ids of the tests matching any of the given criteria:
+    - subject_id / group_id: every test of the subject or group.
+    - question_ids: tests using any of these questions.
+    - changed_since: tests using a question or answer updated at or after this datetime.
+    - stale: tests whose answer key was cleared by a question or answer edit.
+    """
+    if changed_since is not None:
+        # Looked up first, so each table is searched through its updated_at index
+        # rather than through an OR across the joins.
+        question_ids = set(question_ids or ())
+        question_ids.update(Question.objects.filter(updated_at__gte=changed_since).values_list('id', flat=True))
+        question_ids.update(Answer.objects.filter(updated_at__gte=changed_since).values_list('question_id', flat=True))
+
+    conditions = Q()
+    if subject_id is not None:
+        conditions |= Q(subject_id=subject_id)
+    if group_id is not None:
+        conditions |= Q(group_id=group_id)
+    if question_ids:
+        conditions |= Q(test_questions__question_id__in=question_ids)
+    if stale:
+        conditions |= Q(answer_key__isnull=True)
+    if not conditions:
+        return []
+    return list(Test.objects.filter(conditions).order_by('id').values_list('id', flat=True).distinct())
+
+
+def regenerate_in_batches(test_ids, batch_size=DEFAULT_BATCH_SIZE, force=False, max_workers=None, progress=None):
+    """
+    Regenerate the tests batch_size at a time. progress, if given, is called with the
+    running report after each batch. Returns the report: counts of regenerated,
+    unchanged and empty tests, the failed batches with their errors, and throughput.
+    """
+    report = {
+        "total": len(test_ids),
+        "regenerated": 0,
+        "unchanged": 0,
+        "empty": 0,
+        "failed": 0,
+        "failures": [],
+        "seconds": 0.0,
+        "tests_per_second": 0.0,
+        "rendered_per_second": 0.0,
+    }
+    started = time.perf_counter()
+    for start in range(0, len(test_ids), batch_size):
+        batch = test_ids[start:start + batch_size]
+        try:
+            result = regenerate_tests(batch, force=force, max_workers=max_workers)
+        except Exception as exc:
+            logger.exception("Regeneration failed for tests %s", batch)
+            report["failed"] += len(batch)
+            report["failures"].append({"test_ids": batch, "error": str(exc)})
+        else:
+            for outcome in ("regenerated", "unchanged", "empty"):
+                report[outcome] += len(result[outcome])
+
+        elapsed = time.perf_counter() - started
+        report["seconds"] = round(elapsed, 3)
+        done = min(start + batch_size, len(test_ids))
+        report["tests_per_second"] = round(done / elapsed, 2) if elapsed else 0.0
+        report["rendered_per_second"] = round(report["regenerated"] / elapsed, 2) if elapsed else 0.0
+        if progress is not None:
+            progress(report)
+    return report
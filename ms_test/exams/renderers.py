@@ -0,0 +1,25 @@
+"""
+JSON renderer backed by orjson, for views whose responses are large lists.
+
+orjson is pinned in requirements.txt. Should it be missing, and for anything
+orjson cannot encode or for indented output, rendering falls back to DRF's
+JSONRenderer, so the output is the same either way.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # Datetimes are passed through so they fail over to DRF's ISO 8601 format.
+            return orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,186 @@
+"""
+Rendering of the Word files of tests that already exist in the database.
+
+Each stored file records the fingerprint of the payload it was rendered from
+(see documents.payload_fingerprint), so regeneration can skip tests whose
+questions, answers and header fields have not changed since. Only pinned tests
+are given stored files; the others are rendered on download (see exams.exam_files).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .answer_keys import build_answer_key, invalidate_answer_keys
+from .documents import build_exam_payload, payload_fingerprint, render_exam, render_exams
+from .downloads import invalidate_group_zip
+from .models import Test, TestQuestion, GeneratedTestLink
+from .storage import delete_unreferenced_blobs_on_commit, put_exam_file
+
+
+def load_sorted_test_questions(test_obj):
+    """Return the (position, question, answer_order) tuples of a test with the questions' answers prefetched."""
+    return load_tests_questions([test_obj.id])[test_obj.id]
+
+
+def load_tests_questions(test_ids):
+    """Return {test_id: [(position, question, answer_order), ...]} for several tests, with the answers prefetched."""
+    sorted_by_test = defaultdict(list)
+    test_question_qs = (
+        TestQuestion.objects.filter(test_id__in=test_ids)
+        .select_related('question')
+        .prefetch_related('question__answers')
+        .order_by('test_id', 'position')
+    )
+    for tq in test_question_qs:
+        sorted_by_test[tq.test_id].append((tq.position, tq.question, tq.answer_order))
+    return sorted_by_test
+
+
+def build_test_payload(test_obj, sorted_test_questions=None):
+    """Build the render payload of test_obj (its subject should be select_related)."""
+    if sorted_test_questions is None:
+        sorted_test_questions = load_sorted_test_questions(test_obj)
+    return build_exam_payload(
+        subject_name=test_obj.subject.name,
+        assessment_id=test_obj.assessment_id,
+        test_name=test_obj.name,
+        variant=test_obj.variant,
+        sorted_test_questions=sorted_test_questions,
+    )
+
+
+def render_test_file(test_obj, sorted_test_questions=None):
+    """Render the Word file of test_obj from its TestQuestion records."""
+    return render_exam(build_test_payload(test_obj, sorted_test_questions))
+
+
+def render_payloads(payloads, max_workers=None, render=render_exam):
+    """
+    Render exam payloads (as Word files unless another render function is given),
+    fanned out over max_workers worker processes (EXAMS_RENDER_PROCESSES when None).
+    """
+    if max_workers is None:
+        max_workers = getattr(settings, 'EXAMS_RENDER_PROCESSES', 0)
+    return render_exams(payloads, max_workers=max_workers, render=render)
+
+
+def save_test_file(test_obj, word_file_bytes, content_hash=None):
+    """
+    Store word_file_bytes in the blob store and point the test's GeneratedTestLink record at it,
+    creating the record if it doesn't exist. content_hash is the fingerprint of the rendered payload.
+    """
+    generated_link = test_obj.generated_links.defer('exam_file').first()
+    if generated_link is None:
+        generated_link = GeneratedTestLink(test=test_obj)
+    previous_key = generated_link.file_key
+    generated_link.store_file(word_file_bytes)
+    generated_link.content_hash = content_hash
+    generated_link.save()
+    if previous_key != generated_link.file_key:
+        delete_unreferenced_blobs_on_commit([previous_key])
+    # The group's prebuilt ZIP no longer matches its files.
+    invalidate_group_zip(test_obj.group_id)
+    return generated_link
+
+
+def regenerate_tests(test_ids, force=False, max_workers=None):
+    """
+    Bring the Word files and answer keys of these tests up to date with their questions.
+    Tests whose payload fingerprint matches their stored file are not rendered again,
+    unless force is set. Changed tests are rendered in parallel on max_workers processes (see render_payloads)
+    before a short transaction writes all links and answer keys with bulk queries.
+    Returns {"regenerated": [...], "unchanged": [...], "empty": [...]} lists of test ids;
+    tests without questions are reported as empty and left alone. Unpinned tests without
+    a stored file only get their answer key updated and are reported as unchanged, since
+    their file is always rendered from the current questions.
+    """
+    tests = list(Test.objects.filter(id__in=test_ids).select_related('subject').order_by('id'))
+    sorted_by_test = load_tests_questions([test_obj.id for test_obj in tests])
+    links = {}
+    for link in GeneratedTestLink.objects.filter(test_id__in=[test_obj.id for test_obj in tests]).defer('exam_file').order_by('-id'):
+        # In descending id order the lowest id of each test is kept: the link save_test_file updates.
+        links[link.test_id] = link
+
+    result = {"regenerated": [], "unchanged": [], "empty": []}
+    to_render = []
+    tests_with_new_keys = []
+    for test_obj in tests:
+        sorted_test_questions = sorted_by_test.get(test_obj.id)
+        if not sorted_test_questions:
+            result["empty"].append(test_obj.id)
+            continue
+        answer_key = build_answer_key(sorted_test_questions)
+        if answer_key != test_obj.answer_key:
+            test_obj.answer_key = answer_key
+            tests_with_new_keys.append(test_obj)
+        payload = build_test_payload(test_obj, sorted_test_questions)
+        content_hash = payload_fingerprint(payload)
+        link = links.get(test_obj.id)
+        if link is None and not test_obj.pinned:
+            result["unchanged"].append(test_obj.id)
+            continue
+        if not force and link is not None and link.content_hash == content_hash:
+            result["unchanged"].append(test_obj.id)
+            continue
+        to_render.append((test_obj, payload, content_hash))
+        result["regenerated"].append(test_obj.id)
+
+    # Render and upload before the transaction, so it only covers the row updates.
+    stored_files = [put_exam_file(data) for data in render_payloads([payload for _, payload, _ in to_render], max_workers)]
+
+    now = timezone.now()
+    new_links, changed_links = [], []
+    superseded_keys = set()
+    for (test_obj, _, content_hash), stored_file in zip(to_render, stored_files):
+        link = links.get(test_obj.id)
+        if link is None:
+            link = GeneratedTestLink(test=test_obj)
+            new_links.append(link)
+        else:
+            changed_links.append(link)
+            superseded_keys.add(link.file_key)
+        for field, value in stored_file.items():
+            setattr(link, field, value)
+        link.exam_file = None
+        link.content_hash = content_hash
+        link.generated_at = now
+
+    with transaction.atomic():
+        GeneratedTestLink.objects.bulk_create(new_links)
+        GeneratedTestLink.objects.bulk_update(
+            changed_links, ['exam_file', 'file_key', 'file_size', 'checksum', 'content_hash', 'generated_at']
+        )
+        Test.objects.bulk_update(tests_with_new_keys, ['answer_key'])
+        delete_unreferenced_blobs_on_commit(superseded_keys - {link.file_key for link in changed_links})
+
+    invalidate_answer_keys([test_obj.assessment_id for test_obj in tests_with_new_keys])
+    for group_id in {test_obj.group_id for test_obj, _, _ in to_render}:
+        invalidate_group_zip(group_id)
+    return result
+
+
+def pin_tests(test_ids):
+    """
+    Pin tests, storing the Word files of those without an up-to-date one.
+    Returns the result of regenerate_tests.
+    """
+    Test.objects.filter(id__in=test_ids).update(pinned=True)
+    return regenerate_tests(test_ids)
+
+
+def unpin_tests(test_ids):
+    """
+    Unpin tests and remove their stored files; they are rendered on download from now on.
+    The blobs are deleted once the links are, unless another link points at them or they were
+    saved too recently (see storage.delete_unreferenced_blobs); `manage.py gc_exam_files` removes the rest.
+    """
+    group_ids = set(Test.objects.filter(id__in=test_ids).values_list('group_id', flat=True))
+    with transaction.atomic():
+        Test.objects.filter(id__in=test_ids).update(pinned=False)
+        links = GeneratedTestLink.objects.filter(test_id__in=test_ids)
+        delete_unreferenced_blobs_on_commit(links.values_list('file_key', flat=True))
+        links.delete()
+    for group_id in group_ids:
+        invalidate_group_zip(group_id)
@@ -0,0 +1,71 @@
+"""
+Random sampling of questions from large pools.
+
+Each pool has a compact index: the sorted ids of its questions in an
+array('q'), with their default scores in cents in a parallel array('q')
+(16 bytes per question). Every process keeps the indexes it built in an LRU,
+keyed by the pool's questions_version. Writes to a pool's questions increment
+that version in the database, in the writer's transaction, so every process
+rebuilds the index on its next draw from the pool. Sampling draws ids from the
+index, so only the chosen question rows (and their answers) are ever loaded.
+"""
+from array import array
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import F
+
+from .lru import LRUCache
+from .models import Question, QuestionPool
+
+
+PoolIndex = namedtuple('PoolIndex', ['ids', 'scores'])
+
+
+def _index_size(index):
+    return (index.ids.itemsize + index.scores.itemsize) * len(index.ids)
+
+
+_indexes = LRUCache(maxsize=getattr(settings, 'EXAMS_POOL_INDEX_CACHE_MAX_SIZE', 64 * 1024 * 1024), weigh=_index_size)
+
+
+def get_pool_indexes(pool_ids, refresh=False):
+    """
+    Return {pool id: PoolIndex} for the pools that exist among pool_ids: their question ids
+    in ascending order and their scores in cents. One query reads the pools' current
+    versions; only the indexes this process has not built at those versions are built.
+    With refresh, every index is built again.
+    """
+    versions = dict(QuestionPool.objects.filter(id__in=pool_ids).values_list('id', 'questions_version'))
+    indexes = {}
+    for pool_id, version in versions.items():
+        index = None if refresh else _indexes.get((pool_id, version))
+        if index is None:
+            index = _build_pool_index(pool_id)
+            _indexes.set((pool_id, version), index)
+        indexes[pool_id] = index
+    return indexes
+
+
+def _build_pool_index(pool_id):
+    ids, scores = array('q'), array('q')
+    for question_id, default_score in Question.objects.filter(question_pool_id=pool_id).order_by('id').values_list('id', 'default_score'):
+        ids.append(question_id)
+        scores.append(int(default_score * 100))
+    return PoolIndex(ids, scores)
+
+
+def invalidate_pool_index(*pool_ids):
+    """Increment the questions_version of these pools, as part of the current transaction."""
+    if pool_ids:
+        QuestionPool.objects.filter(id__in=pool_ids).update(questions_version=F('questions_version') + 1)
+
+
+def load_questions(sampled):
+    """
+    Load sampled questions, given as {question id: pool id it was drawn from}, with their answers.
+    Returns {id: question} without the questions that were deleted or moved to another
+    pool since their pool's index was built.
+    """
+    questions = Question.objects.filter(id__in=sampled.keys()).prefetch_related('answers')
+    return {question.id: question for question in questions if question.question_pool_id == sampled[question.id]}
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import *
+from .bulk import bulk_create_questions
+from .importers import DEFAULT_CHUNK_SIZE as DEFAULT_IMPORT_CHUNK_SIZE, FORMATS as IMPORT_FORMATS
 
 class SubjectSerializer(serializers.ModelSerializer):
     class Meta:
@@ -49,16 +51,19 @@ class BulkQuestionSerializer(serializers.Serializer):
         questions_data = validated_data.pop('questions')
         question_pool_id = self.context['question_pool']
         question_pool = QuestionPool.objects.get(id=question_pool_id)
-        questions = []
-        for question_data in questions_data:
-            answers_data = question_data.pop('answers')
-            question = Question.objects.create(question_pool=question_pool, **question_data)
-            for answer_data in answers_data:
-                Answer.objects.create(question=question, **answer_data)
-            questions.append(question)
+        # Questions and answers are written with batched inserts rather than one INSERT per row.
+        questions = bulk_create_questions(question_pool, questions_data)
         # Return a dict with questions key instead of just the list
         return {'questions': questions}
 
+class QuestionImportSerializer(serializers.Serializer):
+    # Streamed to a temporary file by Django's upload handlers when large, so it is never held in memory.
+    file = serializers.FileField()
+    # Guessed from the file name (.csv, .jsonl, .xml) when omitted.
+    format = serializers.ChoiceField(choices=IMPORT_FORMATS, required=False)
+    dry_run = serializers.BooleanField(default=False)
+    chunk_size = serializers.IntegerField(min_value=1, max_value=10000, default=DEFAULT_IMPORT_CHUNK_SIZE)
+
 class GroupIdSerializer(serializers.Serializer):
     group_id = serializers.CharField(max_length=6)
 
@@ -82,10 +87,66 @@ class TestGenerationSerializer(serializers.Serializer):
     instructor_id = serializers.IntegerField()
     name = serializers.CharField(max_length=255)
     # Variants for the test (e.g., ["A", "B"]).
-    # The first variant will use the positions as given; additional ones will have shuffled orders.
     variants = serializers.ListField(child=serializers.CharField(max_length=2))
     # List of question selections – each entry determines from which question pool to randomly
     # select questions and the positions in the test exam where they should appear.
     question_selections = TestGenerationQuestionSelectionSerializer(many=True)
     notes = serializers.CharField(max_length=255, allow_blank=True, required=False, allow_null=True)  
     instructions = serializers.CharField(max_length=255, allow_blank=True, required=False, allow_null=True) 
+    # "sync" renders the Word files inside the request; "async" queues them and answers 202 with a job id.
+    # Both pin the tests. "lazy" stores no file: each one is rendered when it is first downloaded.
+    render_mode = serializers.ChoiceField(choices=['sync', 'async', 'lazy'], default='sync')
+    # Seed of the variant draw; the same seed, options and pools reproduce the same variants.
+    seed = serializers.IntegerField(min_value=0, max_value=2 ** 63 - 1, required=False, allow_null=True)
+    # Most questions any two variants may have in common (no limit when omitted).
+    max_overlap = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    # Bring every variant's total score per question selection as close as possible to the first variant's.
+    balance_scores = serializers.BooleanField(default=False)
+    # Show the answer options of each question in a random order (the answer keys follow it).
+    shuffle_answers = serializers.BooleanField(default=False)
+
+class RegenerationSerializer(serializers.Serializer):
+    # Tests matching any of these criteria are regenerated (see exams.regeneration.select_tests).
+    subject = serializers.IntegerField(required=False)
+    group_id = serializers.CharField(max_length=6, required=False)
+    question_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, required=False)
+    changed_since = serializers.DateTimeField(required=False)
+    stale = serializers.BooleanField(default=False)
+    # Render every selected test, even if its content did not change.
+    force = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if not (attrs.get('stale') or any(field in attrs for field in ('subject', 'group_id', 'question_ids', 'changed_since'))):
+            raise serializers.ValidationError("Provide subject, group_id, question_ids, changed_since or stale.")
+        return attrs
+
+# ---------------------------------
+# Serializers for the grading service
+# ---------------------------------
+
+class AnswerKeyBatchSerializer(serializers.Serializer):
+    # Either a list of assessment IDs or a group ID (all variants of a generated test).
+    assessment_ids = serializers.ListField(child=serializers.CharField(max_length=6), allow_empty=False, required=False)
+    group_id = serializers.CharField(max_length=6, required=False)
+
+    def validate(self, attrs):
+        if ('assessment_ids' in attrs) == ('group_id' in attrs):
+            raise serializers.ValidationError("Provide either assessment_ids or group_id.")
+        return attrs
+
+class GradingSerializer(serializers.Serializer):
+    # Grade against one test, or against the variants of a group (each sheet then names its assessment_id).
+    assessment_id = serializers.CharField(max_length=6, required=False)
+    group_id = serializers.CharField(max_length=6, required=False)
+    # Each sheet: {"student_id": ..., "assessment_id": ..., "answers": {"1": "A", ...} or "AB-D..."}
+    sheets = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate(self, attrs):
+        if ('assessment_id' in attrs) == ('group_id' in attrs):
+            raise serializers.ValidationError("Provide either assessment_id or group_id.")
+        for index, sheet in enumerate(attrs['sheets']):
+            if not isinstance(sheet.get('answers'), (str, dict)):
+                raise serializers.ValidationError(f"Sheet {index} must have answers as an object or a string.")
+            if 'group_id' in attrs and not sheet.get('assessment_id'):
+                raise serializers.ValidationError(f"Sheet {index} must have an assessment_id when grading a group.")
+        return attrs
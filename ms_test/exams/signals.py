@@ -0,0 +1,49 @@
+"""
+Signal handlers keeping precomputed and cached data in line with model writes.
+"""
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from . import cache
+from .answer_keys import invalidate_question_answer_keys
+from .sampling import invalidate_pool_index
+from .models import Subject, QuestionPool, Question, Answer, Test
+
+
+@receiver(post_save, sender=Question)
+@receiver(pre_delete, sender=Question)
+def question_changed(sender, instance, created=False, **kwargs):
+    # A new question is not part of any test yet. On delete this runs before the
+    # cascade, while the TestQuestion rows pointing at the question still exist.
+    if not created:
+        invalidate_question_answer_keys(instance.id)
+    # The pool's question index holds the ids and scores of its questions.
+    invalidate_pool_index(instance.question_pool_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(pre_delete, sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    invalidate_question_answer_keys(instance.question_id)
+
+
+# The cached subject, pool and test responses (see exams.cache) do not include
+# questions or answers, so only writes to these models change them.
+
+@receiver(post_save, sender=Subject)
+@receiver(pre_delete, sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    cache.invalidate(cache.SUBJECT, instance.id)
+
+
+@receiver(post_save, sender=QuestionPool)
+@receiver(pre_delete, sender=QuestionPool)
+def question_pool_changed(sender, instance, **kwargs):
+    cache.invalidate(cache.SUBJECT_POOLS, instance.subject_id)
+
+
+@receiver(post_save, sender=Test)
+@receiver(pre_delete, sender=Test)
+def test_changed(sender, instance, **kwargs):
+    cache.invalidate(cache.TEST, instance.assessment_id)
+    cache.invalidate(cache.SUBJECT_GROUPS, instance.subject_id)
@@ -0,0 +1,202 @@
+"""
+Pluggable storage for generated exam files.
+
+GeneratedTestLink rows only keep the key, size and checksum of their file; the
+bytes live in the blob store configured by EXAMS_BLOB_STORE. Stores are
+content-addressed, so identical files are written once and rewriting a test's
+file never overwrites the blob another row points at. For the same reason a
+blob is only deleted once no row points at it (see delete_unreferenced_blobs).
+"""
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+_blob_store = None
+
+
+class BlobStore:
+    """Interface implemented by every exam file store."""
+
+    def save(self, data, checksum):
+        """Store data, whose SHA-256 hex digest is checksum, and return its key."""
+        raise NotImplementedError
+
+    def open(self, key):
+        """Return a readable binary file-like object for the blob stored under key."""
+        raise NotImplementedError
+
+    def read(self, key):
+        with self.open(key) as blob:
+            return blob.read()
+
+    def saved_at(self, key):
+        """Return when the blob under key was last saved (an aware datetime), or None if there is none."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove the blob stored under key; a missing blob is not an error."""
+        raise NotImplementedError
+
+    def keys(self):
+        """Iterate over the keys of every stored blob."""
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """Stores blobs on the local filesystem under root, at <root>/<ab>/<cd>/<checksum>."""
+
+    def __init__(self, root):
+        self.root = os.fspath(root)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def save(self, data, checksum):
+        path = self._path(checksum)
+        try:
+            # An existing blob is marked as saved again, so cleanups leave it alone (see saved_at).
+            os.utime(path)
+            return checksum
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial blob.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return checksum
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def saved_at(self, key):
+        try:
+            return datetime.fromtimestamp(os.stat(self._path(key)).st_mtime, tz=dt_timezone.utc)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                # Skips the temporary files of saves in progress.
+                if len(filename) == 64 and self._path(filename) == os.path.join(dirpath, filename):
+                    yield filename
+
+
+class S3BlobStore(BlobStore):
+    """
+    Stores blobs in an S3-compatible bucket. Requires boto3.
+    Extra options (endpoint_url, region_name, credentials, ...) are passed to boto3.client.
+    """
+
+    def __init__(self, bucket, prefix='exam-files/', **client_options):
+        try:
+            import boto3
+        except ImportError as exc:
+            raise ImproperlyConfigured("S3BlobStore requires the boto3 package.") from exc
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client('s3', **client_options)
+
+    def save(self, data, checksum):
+        key = f"{self.prefix}{checksum}"
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        return key
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def saved_at(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)['LastModified']
+        except ClientError as exc:
+            if exc.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def keys(self):
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for blob in page.get('Contents', []):
+                yield blob['Key']
+
+
+def get_blob_store():
+    """Return the blob store configured by EXAMS_BLOB_STORE, created on first use."""
+    global _blob_store
+    if _blob_store is None:
+        config = getattr(settings, 'EXAMS_BLOB_STORE', None) or {
+            'BACKEND': 'exams.storage.LocalBlobStore',
+            'OPTIONS': {'root': settings.BASE_DIR / 'exam_files'},
+        }
+        _blob_store = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return _blob_store
+
+
+def put_exam_file(data):
+    """
+    Write an exam file to the blob store.
+    Returns the GeneratedTestLink field values describing it: file_key, file_size and checksum.
+    """
+    data = bytes(data)
+    checksum = hashlib.sha256(data).hexdigest()
+    return {
+        'file_key': get_blob_store().save(data, checksum),
+        'file_size': len(data),
+        'checksum': checksum,
+    }
+
+
+def delete_unreferenced_blobs(keys, dry_run=False):
+    """
+    Delete the blobs under keys that no GeneratedTestLink points at. Blobs saved within the last
+    EXAMS_BLOB_DELETE_GRACE_PERIOD seconds are kept: the link of a file being stored right now may
+    not be committed yet. Returns the keys deleted (or that would be, with dry_run).
+    """
+    from .models import GeneratedTestLink
+
+    keys = {key for key in keys if key}
+    if not keys:
+        return []
+    keys -= set(GeneratedTestLink.objects.filter(file_key__in=keys).values_list('file_key', flat=True))
+    store = get_blob_store()
+    saved_before = timezone.now() - timedelta(seconds=getattr(settings, 'EXAMS_BLOB_DELETE_GRACE_PERIOD', 60 * 60))
+    deleted = []
+    for key in sorted(keys):
+        saved_at = store.saved_at(key)
+        if saved_at is None or saved_at >= saved_before:
+            continue
+        if not dry_run:
+            store.delete(key)
+        deleted.append(key)
+    return deleted
+
+
+def delete_unreferenced_blobs_on_commit(keys):
+    """Run delete_unreferenced_blobs on keys once the current transaction commits (at once outside of one)."""
+    keys = {key for key in keys if key}
+    if keys:
+        transaction.on_commit(lambda: delete_unreferenced_blobs(keys))
@@ -1,3 +1,1068 @@
-from django.test import TestCase
+import json
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+
+from . import answer_keys, cache, downloads, ids, importers, jobs, rendering, sampling, storage
+from .benchmarking import rolled_back
+from .bulk import bulk_create_questions
+from .documents import render_exam
+from .jobs import enqueue_render_jobs, process_pending_jobs
+from .models import Answer, GeneratedTestLink, IdSequence, RenderJob, Question, QuestionPool, Subject, Test, TestQuestion
+from .ooxml import render_ooxml
+from .pdf import render_pdf
+from .rendering import build_test_payload, pin_tests, regenerate_tests, unpin_tests
+from .urls import urlpatterns
+
+SMALL_POOL = 3
+LARGE_POOL = 60
+
+
+def create_pool(subject, question_count, answer_count=4, scores=('1.50',)):
+    """Create a question pool holding question_count questions, each with answer_count answers, scored in turn from scores."""
+    pool = QuestionPool.objects.create(subject=subject, instructor_id=1, name=f"Pool of {question_count}")
+    bulk_create_questions(pool, [
+        {
+            'text': f"Question {i}?",
+            'default_score': scores[i % len(scores)],
+            'answers': [{'text': f"Answer {j}", 'is_correct': j == i % answer_count} for j in range(answer_count)],
+        }
+        for i in range(question_count)
+    ])
+    return pool
+
+
+def create_test(subject, pool, assessment_id, answer_key=None):
+    """Create a test over every question of a pool, in reverse id order."""
+    test = Test.objects.create(
+        subject=subject, instructor_id=1, group_id=assessment_id, assessment_id=assessment_id,
+        name="Exam", variant='A', answer_key=answer_key,
+    )
+    TestQuestion.objects.bulk_create([
+        TestQuestion(test=test, question_id=question_id, position=position)
+        for position, question_id in enumerate(pool.questions.order_by('-id').values_list('id', flat=True), start=1)
+    ])
+    return test
+
+
+def use_temporary_blob_store(test_case):
+    """Point the blob store at a temporary directory for the duration of a test, and return it."""
+    blob_root = tempfile.TemporaryDirectory()
+    test_case.addCleanup(blob_root.cleanup)
+    store = storage.LocalBlobStore(blob_root.name)
+    patcher = mock.patch.object(storage, '_blob_store', store)
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+    return store
+
+
+@override_settings(EXAMS_RESPONSE_CACHE=None, EXAMS_ANSWER_KEY_CACHE=None)
+class QuestionListingQueryCountTests(TestCase):
+    """
+    The question listings and the answer key load answers in batches, so their
+    query count does not depend on the number of questions (no N+1 queries).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.small_pool = create_pool(cls.subject, SMALL_POOL)
+        cls.large_pool = create_pool(cls.subject, LARGE_POOL)
+        cls.small_test = create_test(cls.subject, cls.small_pool, '10001')
+        cls.large_test = create_test(cls.subject, cls.large_pool, '10002')
+
+    def setUp(self):
+        # Answer keys served by earlier tests must not hide the queries.
+        answer_keys._local_cache.clear()
+
+    def assertConstantQueries(self, num, url_for, items_for):
+        """Request url_for(size) for the small and the large case, each in num queries."""
+        for size in ('small', 'large'):
+            with self.subTest(size=size), self.assertNumQueries(num):
+                response = self.client.get(url_for(size))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(items_for(response.json())), SMALL_POOL if size == 'small' else LARGE_POOL)
+
+    def test_list_questions_by_question_pool(self):
+        # The questions, then the answers of all of them.
+        self.assertConstantQueries(
+            2,
+            lambda size: f"/api/test/questions/question-pool/{getattr(self, f'{size}_pool').id}/",
+            lambda data: data,
+        )
+
+    def test_list_questions_by_question_pool_page(self):
+        self.assertConstantQueries(
+            2,
+            lambda size: f"/api/test/questions/question-pool/{getattr(self, f'{size}_pool').id}/?page_size={LARGE_POOL}",
+            lambda data: data['results'],
+        )
+
+    def test_list_test_questions_by_assessment_id(self):
+        # The test's questions joined through TestQuestion, then their answers.
+        self.assertConstantQueries(
+            2,
+            lambda size: f"/api/test/tests/{getattr(self, f'{size}_test').assessment_id}/questions/",
+            lambda data: data,
+        )
+
+    def test_list_test_questions_keeps_position_order(self):
+        response = self.client.get(f"/api/test/tests/{self.large_test.assessment_id}/questions/")
+        ids = [question['id'] for question in response.json()]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertTrue(all(len(question['answers']) == 4 for question in response.json()))
+
+    def test_correct_answers_computes_missing_key(self):
+        # The test row, its questions, their answers, and storing the computed key.
+        self.assertConstantQueries(
+            4,
+            lambda size: f"/api/test/tests/{getattr(self, f'{size}_test').assessment_id}/correct_answers/",
+            lambda data: data['correct_answers'],
+        )
+
+    def test_correct_answers_serves_stored_key(self):
+        answer_keys.compute_answer_keys([self.small_test.id, self.large_test.id])
+        self.assertConstantQueries(
+            1,
+            lambda size: f"/api/test/tests/{getattr(self, f'{size}_test').assessment_id}/correct_answers/",
+            lambda data: data['correct_answers'],
+        )
+
+
+@override_settings(EXAMS_RESPONSE_CACHE=None, EXAMS_ANSWER_KEY_CACHE=None)
+class GenerateTestViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+        cls.large_pool = create_pool(cls.subject, LARGE_POOL, scores=('1.00', '2.00', '3.00', '5.00'))
+
+    def generate(self, question_pool, positions, variants=('A',), **options):
+        return self.client.post('/api/test/generate-test/', {
+            'subject': self.subject.id,
+            'instructor_id': 1,
+            'name': "Exam",
+            'variants': list(variants),
+            'question_selections': [{'question_pool': question_pool, 'positions': positions}],
+            'render_mode': 'lazy',
+            **options,
+        }, content_type='application/json')
+
+    def generated_questions(self, response):
+        """{variant: [(position, question id, answer order), ...]} of a generation response."""
+        return {
+            generated['variant']: list(
+                TestQuestion.objects.filter(test_id=generated['test_id']).order_by('position')
+                .values_list('position', 'question_id', 'answer_order')
+            )
+            for generated in response.json()['generated_tests']
+        }
+
+    def test_unknown_question_pool_is_not_found(self):
+        response = self.generate(self.pool.id + 1000, [1])
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("No QuestionPool matches the given query", response.json()['detail'])
+
+    def test_too_few_questions_is_a_bad_request(self):
+        response = self.generate(self.pool.id, list(range(1, SMALL_POOL + 2)))
+        self.assertEqual(response.status_code, 400)
+
+    def test_generate(self):
+        response = self.generate(self.pool.id, list(range(1, SMALL_POOL + 1)))
+        self.assertEqual(response.status_code, 201)
+        assessment_id = response.json()['generated_tests'][0]['assessment_id']
+        self.assertEqual(Test.objects.get(assessment_id=assessment_id).test_questions.count(), SMALL_POOL)
+
+    def test_same_seed_gives_same_variants(self):
+        positions = list(range(1, 11))
+        responses = [
+            self.generate(self.large_pool.id, positions, 'ABC', seed=seed, max_overlap=3, balance_scores=True, shuffle_answers=True)
+            for seed in (42, 42, 43)
+        ]
+        self.assertEqual([response.status_code for response in responses], [201] * 3)
+        self.assertEqual(responses[0].json()['seed'], 42)
+        first, again, other = (self.generated_questions(response) for response in responses)
+        self.assertEqual(first, again)
+        self.assertNotEqual(first, other)
+
+    def test_max_overlap_limits_shared_questions(self):
+        response = self.generate(self.large_pool.id, list(range(1, 16)), 'ABCD', max_overlap=0)
+        self.assertEqual(response.status_code, 201)
+        question_sets = [{question_id for _, question_id, _ in rows} for rows in self.generated_questions(response).values()]
+        self.assertEqual(len(set().union(*question_sets)), 4 * 15)
+
+    def test_impossible_constraints_are_a_bad_request(self):
+        response = self.generate(self.large_pool.id, list(range(1, 31)), 'ABC', max_overlap=0)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("at most 0 questions shared", response.json()['detail'])
+        self.assertFalse(Test.objects.exists())
+
+    def test_balanced_variants_have_equal_totals(self):
+        response = self.generate(self.large_pool.id, list(range(1, 6)), 'ABCD', seed=7, balance_scores=True)
+        self.assertEqual(response.status_code, 201)
+        scores = dict(Question.objects.filter(question_pool=self.large_pool).values_list('id', 'default_score'))
+        totals = {
+            variant: sum(scores[question_id] for _, question_id, _ in rows)
+            for variant, rows in self.generated_questions(response).items()
+        }
+        self.assertEqual(len(set(totals.values())), 1, totals)
+
+    def test_answer_key_follows_shuffled_answers(self):
+        response = self.generate(self.large_pool.id, list(range(1, 11)), 'AB', seed=3, shuffle_answers=True)
+        self.assertEqual(response.status_code, 201)
+        correct = dict(Answer.objects.filter(question__question_pool=self.large_pool, is_correct=True).values_list('question_id', 'id'))
+        answer_ids = {}
+        for question_id, answer_id in Answer.objects.filter(question__question_pool=self.large_pool).values_list('question_id', 'id'):
+            answer_ids.setdefault(question_id, []).append(answer_id)
+        shuffled = 0
+        for generated in response.json()['generated_tests']:
+            answer_key = Test.objects.get(id=generated['test_id']).answer_key
+            for position, question_id, answer_order in self.generated_questions(response)[generated['variant']]:
+                self.assertEqual(sorted(answer_order), sorted(answer_ids[question_id]))
+                shuffled += answer_order != sorted(answer_order)
+                self.assertEqual(answer_key['correct_answers'][str(position)], 'ABCDE'[answer_order.index(correct[question_id])])
+        self.assertGreater(shuffled, 0)
+
+
+class PoolIndexTests(TestCase):
+    """
+    Sampling indexes are kept per process but keyed by the pool's questions_version in
+    the database, so a write made through any process is seen by the next draw of all.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+
+    def setUp(self):
+        sampling._indexes.clear()
+
+    def index_ids(self):
+        return list(sampling.get_pool_indexes([self.pool.id])[self.pool.id].ids)
+
+    def test_built_index_is_reused(self):
+        ids_before = self.index_ids()
+        # Only the pool's version is read.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.index_ids(), ids_before)
+
+    def test_index_follows_question_writes(self):
+        ids_before = self.index_ids()
+        added = Question.objects.create(question_pool=self.pool, text="Added?", default_score='1.00')
+        self.assertEqual(self.index_ids(), ids_before + [added.id])
+        Question.objects.get(id=ids_before[0]).delete()
+        self.assertEqual(self.index_ids(), ids_before[1:] + [added.id])
+
+    def test_index_follows_bulk_inserts(self):
+        ids_before = self.index_ids()
+        added = bulk_create_questions(self.pool, [{'text': "Added?", 'default_score': '1.00', 'answers': []}])
+        self.assertEqual(self.index_ids(), ids_before + [added[0].id])
+
+    def test_unknown_pools_are_left_out(self):
+        self.assertEqual(set(sampling.get_pool_indexes([self.pool.id, self.pool.id + 1000])), {self.pool.id})
+
+
+@override_settings(EXAMS_BLOB_DELETE_GRACE_PERIOD=0)
+class BlobCleanupTests(TestCase):
+    """
+    Blobs are content-addressed, so one only goes away once no GeneratedTestLink points at it,
+    after the transaction that dropped the last link commits.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+        cls.test = create_test(cls.subject, cls.pool, '10001')
+
+    def setUp(self):
+        self.store = use_temporary_blob_store(self)
+
+    def pinned_file_key(self):
+        pin_tests([self.test.id])
+        return self.test.generated_links.get().file_key
+
+    def test_unpinning_deletes_the_blob(self):
+        file_key = self.pinned_file_key()
+        with self.captureOnCommitCallbacks(execute=True):
+            unpin_tests([self.test.id])
+        self.assertIsNone(self.store.saved_at(file_key))
+
+    def test_unpinning_keeps_a_shared_blob(self):
+        file_key = self.pinned_file_key()
+        other = create_test(self.subject, self.pool, '10002')
+        GeneratedTestLink.objects.create(test=other, file_key=file_key)
+        with self.captureOnCommitCallbacks(execute=True):
+            unpin_tests([self.test.id])
+        self.assertIsNotNone(self.store.saved_at(file_key))
+
+    @override_settings(EXAMS_BLOB_DELETE_GRACE_PERIOD=60 * 60)
+    def test_unpinning_keeps_a_recently_saved_blob(self):
+        file_key = self.pinned_file_key()
+        with self.captureOnCommitCallbacks(execute=True):
+            unpin_tests([self.test.id])
+        self.assertIsNotNone(self.store.saved_at(file_key))
+
+    def test_regeneration_deletes_the_superseded_blob(self):
+        file_key = self.pinned_file_key()
+        Question.objects.filter(question_pool=self.pool).update(text="Edited?")
+        with self.captureOnCommitCallbacks(execute=True):
+            regenerate_tests([self.test.id])
+        new_file_key = self.test.generated_links.get().file_key
+        self.assertNotEqual(new_file_key, file_key)
+        self.assertIsNone(self.store.saved_at(file_key))
+        self.assertIsNotNone(self.store.saved_at(new_file_key))
+
+    def test_gc_command_deletes_unlinked_blobs(self):
+        file_key = self.pinned_file_key()
+        orphan_key = storage.put_exam_file(b"orphan")['file_key']
+        call_command('gc_exam_files', '--dry-run', stdout=StringIO())
+        self.assertIsNotNone(self.store.saved_at(orphan_key))
+        call_command('gc_exam_files', stdout=StringIO())
+        self.assertIsNone(self.store.saved_at(orphan_key))
+        self.assertEqual(list(self.store.keys()), [file_key])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'exams-tests-responses'}},
+    EXAMS_RESPONSE_CACHE='responses',
+)
+class ResponseCacheTests(TestCase):
+    """Cached responses are served until a write to their resource gives it a new version."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+
+    def setUp(self):
+        caches['responses'].clear()
+        cache._local_cache.clear()
+        cache._stats.clear()
+
+    def get(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_subject_is_cached_until_edited(self):
+        path = f'/api/test/subjects/{self.subject.id}/'
+        self.assertEqual(self.get(path)['name'], "Math")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(path)['name'], "Math")
+
+        self.subject.name = "Algebra"
+        self.subject.save()
+        self.assertEqual(self.get(path)['name'], "Algebra")
+        self.assertEqual(self.get('/api/test/cache-stats/')['resources'], {
+            cache.SUBJECT: {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3},
+        })
+
+    def test_group_ids_follow_generation(self):
+        path = f'/api/test/tests/subject/{self.subject.id}/group-ids/'
+        self.assertEqual(self.get(path), [])
+        response = self.client.post('/api/test/generate-test/', {
+            'subject': self.subject.id,
+            'instructor_id': 1,
+            'name': "Exam",
+            'variants': ['A', 'B'],
+            'question_selections': [{'question_pool': self.pool.id, 'positions': list(range(1, SMALL_POOL + 1))}],
+            'render_mode': 'lazy',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        group_id = response.json()['generated_tests'][0]['group_id']
+        self.assertEqual(self.get(path), [{'group_id': group_id}])
+        self.assertEqual(self.get(path), [{'group_id': group_id}])
+        self.assertEqual(
+            self.get('/api/test/cache-stats/')['resources'][cache.SUBJECT_GROUPS],
+            {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3},
+        )
+
+
+@override_settings(
+    EXAMS_RESPONSE_CACHE=None,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'group-zips': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'exams-tests-group-zips'}},
+    EXAMS_GROUP_ZIP_CACHE='group-zips',
+)
+class ConditionalDownloadTests(TestCase):
+    """The download endpoints answer conditional requests from the files' ETags."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+        cls.test = create_test(cls.subject, cls.pool, '40001')
+        cls.other = create_test(cls.subject, cls.pool, '40002')
+        Test.objects.filter(id=cls.other.id).update(group_id=cls.test.group_id, variant='B')
+
+    def setUp(self):
+        use_temporary_blob_store(self)
+        pin_tests([self.test.id, self.other.id])
+        downloads._group_zip_cache().clear()
+
+    def download(self, path, etag=None):
+        response = self.client.get(path, **({'HTTP_IF_NONE_MATCH': etag} if etag else {}))
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def regenerate(self):
+        """Edit the questions, then regenerate the test through the API."""
+        Question.objects.filter(question_pool=self.pool).update(text="Edited?")
+        with mock.patch.object(rendering, 'invalidate_group_zip', wraps=downloads.invalidate_group_zip) as invalidate_group_zip:
+            response = self.client.post(f'/api/test/regenerate-test/{self.test.id}/')
+        self.assertEqual(response.json()['regenerated'], True)
+        invalidate_group_zip.assert_called_once_with(self.test.group_id)
+
+    def assertConditionalDownload(self, path):
+        response = self.download(path)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag)
+        self.assertEqual(self.download(path, etag).status_code, 304)
+
+        self.regenerate()
+        response = self.download(path, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.download(path, response['ETag']).status_code, 304)
+
+    def test_single_download(self):
+        path = f'/api/test/download-word/{self.test.id}/'
+        self.assertEqual(self.download(path)['ETag'], f'"{self.test.generated_links.get().checksum}"')
+        self.assertConditionalDownload(path)
+
+    def test_group_download(self):
+        self.assertConditionalDownload(f'/api/test/tests/group/{self.test.group_id}/download-link/')
+
+    def test_group_zip_cache_follows_regeneration(self):
+        path = f'/api/test/tests/group/{self.test.group_id}/download-link/'
+        etag = self.download(path)['ETag'].strip('"')
+        self.assertIsNotNone(downloads.get_cached_group_zip(self.test.group_id, etag))
+        self.regenerate()
+        self.assertIsNone(downloads.get_cached_group_zip(self.test.group_id, etag))
+
+
+@override_settings(EXAMS_RESPONSE_CACHE=None)
+class ExportFormatTests(TestCase):
+    """Downloads in the export formats chosen with ?format= (see exams.exports)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Physics & <Chemistry>", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+        Question.objects.filter(id=cls.pool.questions.first().id).update(text='Is 1 < 2 & "3" > 2?\nExplain.')
+        cls.test = create_test(cls.subject, cls.pool, '50001')
+
+    def download(self, path, export_format):
+        return self.client.get(path, {'format': export_format} if export_format else {})
+
+    def test_ooxml_matches_docx(self):
+        payload = build_test_payload(Test.objects.select_related('subject').get(id=self.test.id))
+        self.assertEqual(render_ooxml(payload), render_exam(payload))
+        path = f'/api/test/download-word/{self.test.id}/'
+        docx, ooxml = self.download(path, None), self.download(path, 'ooxml')
+        self.assertEqual((docx.status_code, ooxml.status_code), (200, 200))
+        self.assertEqual(ooxml.content, docx.content)
+        self.assertEqual(ooxml['ETag'], docx['ETag'])
+
+    def test_pdf(self):
+        payload = build_test_payload(Test.objects.select_related('subject').get(id=self.test.id))
+        self.assertTrue(render_pdf(payload).startswith(b'%PDF-'))
+        response = self.download(f'/api/test/download-word/{self.test.id}/', 'pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF-'))
+
+    def test_unknown_format_is_a_bad_request(self):
+        for path in (f'/api/test/download-word/{self.test.id}/', f'/api/test/tests/group/{self.test.group_id}/download-link/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.download(path, 'odt').status_code, 400)
+
+
+@override_settings(EXAMS_RESPONSE_CACHE=None, EXAMS_RENDER_LOCAL_WORKERS=0)
+class RenderJobTests(TestCase):
+    """Generation with render_mode "async" and the render job queue that renders its files."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+
+    def setUp(self):
+        use_temporary_blob_store(self)
+
+    def generate_async(self):
+        response = self.client.post('/api/test/generate-test/', {
+            'subject': self.subject.id,
+            'instructor_id': 1,
+            'name': "Exam",
+            'variants': ['A', 'B'],
+            'question_selections': [{'question_pool': self.pool.id, 'positions': list(range(1, SMALL_POOL + 1))}],
+            'render_mode': 'async',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        return response.json()['job_id']
+
+    def job_status(self, job_id):
+        response = self.client.get(f'/api/test/render-jobs/{job_id}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_jobs_render_the_files(self):
+        job_id = self.generate_async()
+        status = self.job_status(job_id)
+        self.assertEqual(status['status'], RenderJob.STATUS_PENDING)
+        self.assertEqual([test['ready'] for test in status['tests']], [False, False])
+        self.assertFalse(GeneratedTestLink.objects.exists())
+
+        self.assertEqual(process_pending_jobs(), 2)
+        status = self.job_status(job_id)
+        self.assertEqual(status['status'], RenderJob.STATUS_DONE)
+        self.assertEqual([(test['status'], test['ready']) for test in status['tests']], [(RenderJob.STATUS_DONE, True)] * 2)
+        for link in GeneratedTestLink.objects.all():
+            self.assertTrue(link.read_file().startswith(b'PK'))
+
+    def test_failing_render_marks_the_job_failed(self):
+        job_id = self.generate_async()
+        with mock.patch.object(jobs, 'render_exam', side_effect=RuntimeError("Rendering failed.")), \
+                self.assertLogs('exams.jobs', 'ERROR') as logs:
+            # Each job is retried until it runs out of attempts.
+            self.assertEqual(process_pending_jobs(), 2 * jobs.MAX_ATTEMPTS)
+        self.assertEqual(len(logs.records), 2 * jobs.MAX_ATTEMPTS)
+        status = self.job_status(job_id)
+        self.assertEqual(status['status'], RenderJob.STATUS_FAILED)
+        self.assertEqual(
+            [(test['status'], test['ready'], test['error']) for test in status['tests']],
+            [(RenderJob.STATUS_FAILED, False, "Rendering failed.")] * 2,
+        )
+        self.assertEqual(set(RenderJob.objects.values_list('attempts', flat=True)), {jobs.MAX_ATTEMPTS})
+
+    def test_unknown_job_is_not_found(self):
+        self.assertEqual(self.client.get('/api/test/render-jobs/00000000-0000-0000-0000-000000000000/').status_code, 404)
+
+
+class ImportQuestionsViewTests(TestCase):
+    """Imports of CSV, JSONL and Moodle XML banks through ImportQuestionsView."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = QuestionPool.objects.create(subject=cls.subject, instructor_id=1, name="Imports")
+
+    def upload(self, name, content, **data):
+        return self.client.post(f'/api/test/questions/import/{self.pool.id}/', {'file': SimpleUploadedFile(name, content), **data})
+
+    def imported(self):
+        return [
+            (question.text, question.default_score, [(answer.text, answer.is_correct) for answer in question.answers.all()])
+            for question in self.pool.questions.order_by('id').prefetch_related('answers')
+        ]
+
+    def test_csv(self):
+        content = (
+            "\ufefftext,default_score,answer_a,answer_b,answer_c,correct\n"
+            "One?,2,Yes,No,Maybe,A;c\n"
+            ",,,,,\n"
+            "Two?,,Yes,No,,2\n"
+            "Three?,1,Yes,No,,C\n"
+            "Four?,1,Yes,No,,A1\n"
+            "Five?,abc,Yes,No,,A\n"
+        ).encode()
+        response = self.upload('bank.csv', content)
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual((report['format'], report['processed'], report['imported'], report['skipped']), ('csv', 5, 2, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [5, 6, 7])
+        self.assertEqual(self.imported(), [
+            ("One?", Decimal('2.00'), [("Yes", True), ("No", False), ("Maybe", True)]),
+            ("Two?", Decimal('0.00'), [("Yes", False), ("No", True)]),
+        ])
+
+    def test_parse_correct(self):
+        self.assertEqual(importers._parse_correct("", 3), set())
+        self.assertEqual(importers._parse_correct(" a; 3,B ", 3), {0, 1, 2})
+        for value in ("D", "0", "4", "AB", "1.5"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                importers._parse_correct(value, 3)
+
+    def test_jsonl(self):
+        content = b"\n".join([
+            json.dumps({'text': "One?", 'default_score': '1.25', 'answers': [{'text': "Yes", 'is_correct': True}, {'text': "No"}]}).encode(),
+            b"",
+            b"{not json",
+            json.dumps({'text': "No correct answer?", 'answers': [{'text': "Yes"}]}).encode(),
+            json.dumps({'text': "Flag?", 'answers': [{'text': "Yes", 'is_correct': "true"}]}).encode(),
+        ])
+        response = self.upload('bank.jsonl', content)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [3, 4, 5])
+        self.assertEqual(self.imported(), [("One?", Decimal('1.25'), [("Yes", True), ("No", False)])])
+
+    def test_moodle_xml(self):
+        content = b"""<?xml version="1.0" encoding="UTF-8"?>
+<quiz>
+  <question type="category"><category><text>$course$/Imports</text></category></question>
+  <question type="multichoice">
+    <questiontext format="html"><text><![CDATA[<p>What is <b>2 + 2</b>?</p><p>Pick&nbsp;one.</p>]]></text></questiontext>
+    <defaultgrade>2.0000000</defaultgrade>
+    <answer fraction="0" format="html"><text>3</text></answer>
+    <answer fraction="100" format="html"><text><![CDATA[<span>4</span>]]></text></answer>
+  </question>
+  <question type="truefalse">
+    <questiontext format="moodle_auto_format"><text>The sky is green.</text></questiontext>
+    <answer fraction="0"><text>true</text></answer>
+    <answer fraction="100"><text>false</text></answer>
+  </question>
+  <question type="essay"><questiontext><text>Discuss.</text></questiontext></question>
+</quiz>
+"""
+        response = self.upload('quiz.xml', content)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['errors'], [{'row': 3, 'error': "Unsupported question type: 'essay'."}])
+        self.assertEqual(self.imported(), [
+            ("What is 2 + 2? Pick one.", Decimal('2.00'), [("3", False), ("4", True)]),
+            ("The sky is green.", Decimal('0.00'), [("true", False), ("false", True)]),
+        ])
+
+    def test_dry_run_writes_nothing(self):
+        response = self.upload('bank.csv', b"text,answer_a,correct\nOne?,Yes,A\n", dry_run=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['dry_run'], response.json()['imported']), (True, 1))
+        self.assertFalse(self.pool.questions.exists())
+
+    def test_chunks_bump_the_questions_version(self):
+        content = b"text,answer_a,correct\nOne?,Yes,A\nTwo?,Yes,A\nThree?,Yes,A\n"
+        response = self.upload('bank.csv', content, chunk_size=2)
+        self.assertEqual(response.json()['imported'], 3)
+        # One bump per chunk written.
+        self.pool.refresh_from_db()
+        self.assertEqual(self.pool.questions_version, 2)
+
+    def test_unreadable_files_are_bad_requests(self):
+        malformed = b'<?xml version="1.0"?><quiz><question type="truefalse"><questiontext><text>Yes?</text></questiontext>'
+        for name, content, data in (
+            ('quiz.xml', malformed, {}),
+            ('bank.csv', "text,answer_a,correct\nCaf\u00e9?,Yes,A\n".encode('latin-1'), {}),
+            ('bank.csv', b"question,answer_a\nOne?,Yes\n", {}),
+            ('bank.txt', b"text\n", {}),
+            ('bank.csv', b"text\n", {'format': 'docx'}),
+        ):
+            with self.subTest(name=name, data=data):
+                response = self.upload(name, content, **data)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.pool.questions.exists())
+
+
+@override_settings(EXAMS_ANSWER_KEY_CACHE=None)
+class BatchAnswerKeyTests(TestCase):
+    """Answer keys of many tests from BatchCorrectAnswersView, as JSON or NDJSON."""
+    STORED_KEY = {"correct_answers": {"1": "D"}, "points": {"1": 4.0}}
+    # create_test puts the pool's questions in reverse id order; question i has answer i % 4 correct.
+    COMPUTED_KEY = {"correct_answers": {"1": "C", "2": "B", "3": "A"}, "points": {"1": 1.5, "2": 1.5, "3": 1.5}}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+        cls.stored = create_test(cls.subject, cls.pool, '60001', answer_key=cls.STORED_KEY)
+        cls.computed = create_test(cls.subject, cls.pool, '60002')
+        Test.objects.filter(id=cls.computed.id).update(group_id=cls.stored.group_id)
+        cls.other = create_test(cls.subject, cls.pool, '60003', answer_key=cls.STORED_KEY)
+
+    def setUp(self):
+        answer_keys._local_cache.clear()
+
+    def ndjson(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_group(self):
+        response = self.client.get('/api/test/answer-keys/', {'group_id': self.stored.group_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "answer_keys": {'60001': self.STORED_KEY, '60002': self.COMPUTED_KEY},
+            "missing": [],
+        })
+        # The key computed on demand is stored for the next read.
+        self.assertEqual(Test.objects.get(id=self.computed.id).answer_key, self.COMPUTED_KEY)
+
+    def test_assessment_ids(self):
+        response = self.client.post(
+            '/api/test/answer-keys/', {'assessment_ids': ['60003', '69999', '60002']}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "answer_keys": {'60003': self.STORED_KEY, '60002': self.COMPUTED_KEY},
+            "missing": ['69999'],
+        })
+        response = self.client.get('/api/test/answer-keys/', {'assessment_ids': '60001,60003'})
+        self.assertEqual(set(response.json()['answer_keys']), {'60001', '60003'})
+
+    def test_ndjson(self):
+        response = self.client.get('/api/test/answer-keys/', {'group_id': self.stored.group_id, 'output': 'ndjson'})
+        self.assertEqual(self.ndjson(response), [
+            {"assessment_id": '60001', **self.STORED_KEY},
+            {"assessment_id": '60002', **self.COMPUTED_KEY},
+        ])
+        response = self.client.get('/api/test/answer-keys/', {'assessment_ids': '60002,69999', 'output': 'ndjson'})
+        self.assertEqual(self.ndjson(response), [{"assessment_id": '60002', **self.COMPUTED_KEY}])
+
+    def test_invalid_selections(self):
+        self.assertEqual(self.client.get('/api/test/answer-keys/').status_code, 400)
+        self.assertEqual(
+            self.client.get('/api/test/answer-keys/', {'group_id': self.stored.group_id, 'assessment_ids': '60001'}).status_code, 400,
+        )
+        self.assertEqual(self.client.get('/api/test/answer-keys/', {'group_id': '69999'}).status_code, 404)
+
+
+@override_settings(EXAMS_ANSWER_KEY_CACHE=None)
+class GradeSheetsViewTests(TestCase):
+    """Scores of GradeSheetsView, checked against answer keys stored on the tests."""
+    ANSWER_KEY = {
+        "correct_answers": {"1": "A", "2": "C", "3": "N/A"},
+        "points": {"1": 1.0, "2": 2.0, "3": 1.5},
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(institution_id=1, name="Math", created_by=1)
+        cls.pool = create_pool(cls.subject, SMALL_POOL)
+        cls.test = create_test(cls.subject, cls.pool, '30001', answer_key=cls.ANSWER_KEY)
+        cls.other = create_test(cls.subject, cls.pool, '30002', answer_key={
+            "correct_answers": {"1": "B", "2": "B"},
+            "points": {"1": 1.0, "2": 1.0},
+        })
+        Test.objects.filter(id=cls.other.id).update(group_id=cls.test.group_id)
+
+    def setUp(self):
+        answer_keys._local_cache.clear()
+
+    def grade(self, data):
+        return self.client.post('/api/test/grade/', data, content_type='application/json')
+
+    def test_grade_assessment(self):
+        response = self.grade({'assessment_id': '30001', 'sheets': [
+            # Padded with blanks to the three positions.
+            {'student_id': 1, 'answers': "AC"},
+            # Lower case letters count; "?" and the non-ASCII character are blanks, the rest is cut off.
+            {'student_id': 2, 'answers': "ca\u00e9XB"},
+            # Unknown positions and letters are ignored; "N/A" at position 3 never matches.
+            {'student_id': 3, 'answers': {"1": "a", "2": "Z", "3": "B", "9": "A"}},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'student_id': 1, 'assessment_id': '30001', 'max_score': 4.5, 'score': 3.0, 'correct': 2, 'answered': 2},
+            {'student_id': 2, 'assessment_id': '30001', 'max_score': 4.5, 'score': 0.0, 'correct': 0, 'answered': 2},
+            {'student_id': 3, 'assessment_id': '30001', 'max_score': 4.5, 'score': 1.0, 'correct': 1, 'answered': 2},
+        ])
+        questions = response.json()['questions']['30001']
+        self.assertEqual(
+            [(question['position'], question['correct_count'], question['answered_count']) for question in questions],
+            [(1, 2, 3), (2, 1, 2), (3, 0, 1)],
+        )
+        self.assertAlmostEqual(questions[0]['correct_rate'], 2 / 3)
+        self.assertEqual(questions[0]['choices'], {'A': 2, 'B': 0, 'C': 1, 'D': 0, 'E': 0})
+        self.assertEqual(questions[1]['choices'], {'A': 1, 'B': 0, 'C': 1, 'D': 0, 'E': 0})
+        self.assertEqual(questions[2]['choices'], {'A': 0, 'B': 1, 'C': 0, 'D': 0, 'E': 0})
+
+    def test_grade_group(self):
+        response = self.grade({'group_id': self.test.group_id, 'sheets': [
+            {'student_id': 1, 'assessment_id': '30002', 'answers': "BB"},
+            {'student_id': 2, 'assessment_id': '30001', 'answers': "A-"},
+            {'student_id': 3, 'assessment_id': '30002', 'answers': {"2": "b"}},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        # Results keep the order of the sheets.
+        self.assertEqual(
+            [(result['student_id'], result['assessment_id'], result['score'], result['max_score'])
+             for result in response.json()['results']],
+            [(1, '30002', 2.0, 2.0), (2, '30001', 1.0, 4.5), (3, '30002', 1.0, 2.0)],
+        )
+        questions = response.json()['questions']
+        self.assertEqual(set(questions), {'30001', '30002'})
+        self.assertEqual([question['correct_count'] for question in questions['30002']], [1, 2])
+
+    def test_invalid_requests_are_bad_requests(self):
+        sheet = {'answers': "A"}
+        for data in (
+            {'sheets': [sheet]},
+            {'assessment_id': '30001', 'group_id': self.test.group_id, 'sheets': [sheet]},
+            {'assessment_id': '30001', 'sheets': []},
+            {'assessment_id': '30001', 'sheets': [{'answers': ["A"]}]},
+            {'group_id': self.test.group_id, 'sheets': [sheet]},
+            {'group_id': self.test.group_id, 'sheets': [{'assessment_id': '39999', 'answers': "A"}]},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.grade(data).status_code, 400)
+
+    def test_unknown_tests_are_not_found(self):
+        self.assertEqual(self.grade({'assessment_id': '39999', 'sheets': [{'answers': "A"}]}).status_code, 404)
+        self.assertEqual(self.grade({'group_id': '39999', 'sheets': [{'assessment_id': '39999', 'answers': "A"}]}).status_code, 404)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+@override_settings(EXAMS_ID_BLOCK_SIZE=5)
+class IdAllocationLoadTests(TransactionTestCase):
+    """
+    Load test of exams.ids: workers reserving ID blocks at the same time never get the
+    same ID, and the cost of an allocation does not grow as the ID space fills up.
+    """
+    WORKERS = 8
+    ALLOCATIONS = 200
+
+    def setUp(self):
+        # Every test starts with the state of a freshly started process.
+        patcher = mock.patch.multiple(ids, _block=[0, 0], _keys={}, _legacy_ids=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_concurrently(self, work):
+        def run(_):
+            try:
+                return work()
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.WORKERS) as executor:
+            return [allocated for result in executor.map(run, range(self.WORKERS)) for allocated in result]
+
+    def test_concurrent_workers_get_distinct_ids(self):
+        # Each thread plays a separate worker process with its own blocks.
+        def worker():
+            allocated = []
+            while len(allocated) < self.ALLOCATIONS:
+                start, end, keys = ids._reserve_block()
+                allocated.extend(ids._counter_to_id(counter, keys) for counter in range(start, end))
+            return allocated
+
+        allocated = self.run_concurrently(worker)
+        self.assertEqual(len(allocated), self.WORKERS * self.ALLOCATIONS)
+        self.assertEqual(len(set(allocated)), len(allocated))
+        self.assertEqual(IdSequence.objects.get(name=ids.SEQUENCE_NAME).next_value, len(allocated))
+
+    def test_concurrent_threads_get_distinct_ids(self):
+        allocated = self.run_concurrently(lambda: [ids.allocate_id() for _ in range(self.ALLOCATIONS)])
+        self.assertEqual(len(set(allocated)), self.WORKERS * self.ALLOCATIONS)
+
+    def test_allocation_cost_is_constant_as_the_space_fills(self):
+        ids.allocate_id()
+        five_digit_ids = 9 * 10 ** 4
+        queries, seconds = [], []
+        # Empty, half full, and about to widen to 6 digits.
+        for start in (0, five_digit_ids // 2, five_digit_ids - self.ALLOCATIONS // 2):
+            IdSequence.objects.filter(name=ids.SEQUENCE_NAME).update(next_value=start)
+            ids._block[:] = [0, 0]
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                allocated = [ids.allocate_id() for _ in range(self.ALLOCATIONS)]
+                seconds.append(time.perf_counter() - started)
+            # Transaction control statements are logged on some backends; count the others.
+            queries.append(sum(1 for query in captured if not query['sql'].startswith(('BEGIN', 'COMMIT'))))
+            self.assertEqual(len(set(allocated)), self.ALLOCATIONS)
+        # One locked read and one update per block of EXAMS_ID_BLOCK_SIZE, whatever the occupancy.
+        self.assertEqual(queries, [2 * self.ALLOCATIONS // 5] * 3)
+        self.assertEqual({len(allocated_id) for allocated_id in allocated}, {5, 6})
+        self.assertLess(max(seconds), 5 * min(seconds))
+
+
+@skipUnless(connection.vendor == 'postgresql', "Query plans are checked on PostgreSQL.")
+@override_settings(EXAMS_RESPONSE_CACHE=None, EXAMS_ANSWER_KEY_CACHE=None)
+class QueryPlanTests(TestCase):
+    """
+    Every endpoint of exams/urls.py is requested against a seeded dataset, and the
+    plan of each query it runs is checked with EXPLAIN: none may read a table in full
+    to find its rows (a Seq Scan, or an index walked end to end under a Filter that
+    no LIMIT cuts short). The planner is left to its own costs: every table is seeded
+    and analyzed at a size where the lookups of one subject, pool, question or group
+    are selective, so a full scan means no index serves the lookup better.
+    """
+    SUBJECTS = 2000
+    CREATORS = 200
+    POOLS = 500
+    QUESTIONS_PER_POOL = 100
+    GROUPS = 1000
+    VARIANTS = 4
+    QUESTIONS_PER_TEST = 20
+    # Tables that only ever hold a handful of rows, which a sequential scan reads best.
+    SMALL_TABLES = {IdSequence._meta.db_table}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.blob_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.blob_root.cleanup)
+        # The ID allocator starts as in a fresh process: a block reserved by an earlier test
+        # was rolled back with its IdSequence row, and its IDs would be handed out again.
+        for patcher in (
+            mock.patch.object(storage, '_blob_store', storage.LocalBlobStore(cls.blob_root.name)),
+            mock.patch.multiple(ids, _block=[0, 0], _keys={}, _legacy_ids=None),
+        ):
+            patcher.start()
+            cls.addClassCleanup(patcher.stop)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        subjects = Subject.objects.bulk_create([
+            Subject(institution_id=1, name=f"Subject {i}", created_by=i % cls.CREATORS) for i in range(cls.SUBJECTS)
+        ])
+        cls.subject = subjects[0]
+        cls.pools = [create_pool(subjects[i % cls.SUBJECTS], cls.QUESTIONS_PER_POOL, answer_count=2) for i in range(cls.POOLS)]
+        question_ids = list(Question.objects.filter(question_pool__in=cls.pools).values_list('id', flat=True))
+        # IDs come from the allocator, so tests generated by the requests cannot collide with them.
+        tests = Test.objects.bulk_create([
+            Test(
+                subject=subjects[group % cls.SUBJECTS], instructor_id=1, group_id=group_id,
+                assessment_id=ids.allocate_id(), name="Exam", variant='ABCD'[variant],
+            )
+            for group, group_id in enumerate(ids.allocate_id() for _ in range(cls.GROUPS))
+            for variant in range(cls.VARIANTS)
+        ])
+        TestQuestion.objects.bulk_create([
+            TestQuestion(test=test, question_id=question_ids[(index * 7 + position) % len(question_ids)], position=position)
+            for index, test in enumerate(tests) for position in range(1, cls.QUESTIONS_PER_TEST + 1)
+        ])
+        cls.test = tests[0]
+        cls.question = cls.test.test_questions.get(position=1).question
+        # tests[1] stays lazy; the others share the stored file of the first one.
+        pin_tests([cls.test.id])
+        link = cls.test.generated_links.get()
+        GeneratedTestLink.objects.bulk_create([
+            GeneratedTestLink(test=test, file_key=link.file_key, file_size=link.file_size, checksum=link.checksum)
+            for test in tests[2:]
+        ])
+        # Few tests wait for their answer key to be recomputed at any time.
+        Test.objects.exclude(id__in=[test.id for test in tests[:cls.VARIANTS]]).update(answer_key={})
+        cls.batch_id = [
+            enqueue_render_jobs(tests[start:start + cls.VARIANTS]) for start in range(0, len(tests), cls.VARIANTS)
+        ][0]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def endpoint_requests(self):
+        """Representative requests per URL name: (method, path, data)."""
+        test, pool, question = self.test, self.pools[0], self.question
+        group_id, assessment_id = test.group_id, test.assessment_id
+        new_question = {'question_pool': pool.id, 'text': "New?", 'default_score': '1.00',
+                        'answers': [{'text': "Yes", 'is_correct': True}, {'text': "No", 'is_correct': False}]}
+        return {
+            'create_subject': [('post', '/api/test/subjects/', {'institution_id': 1, 'name': "New", 'created_by': 1})],
+            'list_subjects': [
+                ('get', '/api/test/subjects/list/?created_by=1', None),
+                ('get', '/api/test/subjects/list/?page_size=5', None),
+            ],
+            'retrieve_subject': [('get', f'/api/test/subjects/{self.subject.id}/', None)],
+            'create_question_with_answers': [('post', '/api/test/questions/', new_question)],
+            'list_questions_by_question_pool': [
+                ('get', f'/api/test/questions/question-pool/{pool.id}/', None),
+                ('get', f'/api/test/questions/question-pool/{pool.id}/?page_size=10', None),
+            ],
+            'create_question_pool': [('post', '/api/test/question-pools/', {'subject': self.subject.id, 'instructor_id': 1, 'name': "New"})],
+            'list_question_pools_by_subject': [('get', f'/api/test/question-pools/subject/{self.subject.id}/', None)],
+            'generate_test': [('post', '/api/test/generate-test/', {
+                'subject': self.subject.id, 'instructor_id': 1, 'name': "Exam", 'variants': ['A', 'B'],
+                'question_selections': [{'question_pool': pool.id, 'positions': [1, 2, 3]}], 'render_mode': mode,
+            }) for mode in ('sync', 'lazy', 'async')],
+            'render_job_status': [('get', f'/api/test/render-jobs/{self.batch_id}/', None)],
+            'list_tests_by_subject': [
+                ('get', f'/api/test/tests/subject/{self.subject.id}/', None),
+                ('get', f'/api/test/tests/subject/{self.subject.id}/?page_size=2', None),
+            ],
+            'retrieve_test_by_assessment_id': [('get', f'/api/test/tests/{assessment_id}/', None)],
+            'list_test_questions_by_assessment_id': [('get', f'/api/test/tests/{assessment_id}/questions/', None)],
+            'list_group_ids_by_subject': [('get', f'/api/test/tests/subject/{self.subject.id}/group-ids/', None)],
+            'list_tests_by_group_id': [('get', f'/api/test/tests/group/{group_id}/', None)],
+            'get_download_link_by_group_id': [('get', f'/api/test/tests/group/{group_id}/download-link/', None)],
+            'regenerate_test_file': [('post', f'/api/test/regenerate-test/{test.id}/?force=true', None)],
+            'pin_test': [('post', f'/api/test/pin-test/{test.id + 1}/', None), ('delete', f'/api/test/pin-test/{test.id}/', None)],
+            'regenerate_exams': [
+                ('post', '/api/test/regenerate-tests/', {'group_id': group_id}),
+                ('post', '/api/test/regenerate-tests/', {'question_ids': [question.id]}),
+                ('post', '/api/test/regenerate-tests/', {'changed_since': '2100-01-01T00:00:00Z'}),
+                ('post', '/api/test/regenerate-tests/', {'stale': True}),
+            ],
+            'regenerate_question_tests': [('post', f'/api/test/questions/{question.id}/regenerate-tests/', None)],
+            'download_word_file': [('get', f'/api/test/download-word/{test.id}/', None), ('get', f'/api/test/download-word/{test.id + 1}/', None)],
+            'correct_answers': [('get', f'/api/test/tests/{assessment_id}/correct_answers/', None)],
+            'batch_correct_answers': [
+                ('get', f'/api/test/answer-keys/?group_id={group_id}', None),
+                ('get', f'/api/test/answer-keys/?assessment_ids={assessment_id}', None),
+            ],
+            'grade_sheets': [('post', '/api/test/grade/', {'group_id': group_id, 'sheets': [{'assessment_id': assessment_id, 'answers': 'ABCD'}]})],
+            'response_cache_stats': [('get', '/api/test/cache-stats/', None)],
+            'import_questions': [('post', f'/api/test/questions/import/{pool.id}/', {
+                'file': SimpleUploadedFile('bank.csv', b"text,answer_a,answer_b,correct\nImported?,Yes,No,A\n"),
+            })],
+            'create_many_questions': [('post', f'/api/test/questions/bulk/{pool.id}/', {'questions': [new_question]})],
+            'delete_question_from_pool': [('delete', f'/api/test/questions/question-pool/{pool.id}/delete/{question.id}/', None)],
+        }
+
+    def leading_columns(self):
+        """{index name: (its first column, whether it is a partial index)}."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT i.relname, a.attname, x.indpred IS NOT NULL FROM pg_index x "
+                "JOIN pg_class i ON i.oid = x.indexrelid "
+                "JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = x.indkey[0]"
+            )
+            return {name: (column, partial) for name, column, partial in cursor.fetchall()}
+
+    def full_scans(self, sql, leading_columns):
+        """The relations and indexes the plan of sql reads in full, other than those of SMALL_TABLES."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+        scans, nodes = [], [(plan[0]['Plan'], False, None)]
+        while nodes:
+            node, limited, relation = nodes.pop()
+            limited = limited or node['Node Type'] == 'Limit'
+            relation = node.get('Relation Name', relation)
+            nodes.extend((child, limited, relation) for child in node.get('Plans', ()))
+            if relation in self.SMALL_TABLES:
+                continue
+            if node['Node Type'] == 'Seq Scan':
+                scans.append(f"Seq Scan on {relation}")
+            elif 'Index Name' in node and not limited:
+                # An index searched without its first column is walked from end to end, unless a
+                # LIMIT (a page of a listing) stops it early; a partial index is narrowed by its predicate.
+                column, partial = leading_columns[node['Index Name']]
+                if not partial and not re.search(rf'(?<![\w.]){column}(?!\w)', node.get('Index Cond', '')):
+                    scans.append(f"{node['Node Type']} on {relation} using {node['Index Name']}")
+        return scans
+
+    def test_endpoints_use_indexes(self):
+        requests = self.endpoint_requests()
+        self.assertEqual(set(requests), {pattern.name for pattern in urlpatterns}, "Every endpoint needs a request here.")
+        leading_columns = self.leading_columns()
+        for name, calls in requests.items():
+            for method, path, data in calls:
+                with self.subTest(endpoint=name, method=method, path=path), rolled_back():
+                    with CaptureQueriesContext(connection) as captured:
+                        if data is None:
+                            response = getattr(self.client, method)(path)
+                        elif name == 'import_questions':
+                            response = self.client.post(path, data)
+                        else:
+                            response = getattr(self.client, method)(path, data, content_type='application/json')
+                        if response.streaming:
+                            b''.join(response.streaming_content)
+                    self.assertLess(response.status_code, 400)
+                    for query in captured:
+                        if query['sql'].startswith(('SELECT', 'UPDATE', 'DELETE', 'WITH')):
+                            self.assertEqual(self.full_scans(query['sql'], leading_columns), [], query['sql'])
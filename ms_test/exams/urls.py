@@ -10,6 +10,7 @@ urlpatterns = [
     path('question-pools/', CreateQuestionPoolView.as_view(), name='create_question_pool'),
     path('question-pools/subject/<int:subject_id>/', ListQuestionPoolsBySubjectView.as_view(), name='list_question_pools_by_subject'),
     path('generate-test/', GenerateTestView.as_view(), name='generate_test'),
+    path('render-jobs/<uuid:job_id>/', RenderJobStatusView.as_view(), name='render_job_status'),
     path('tests/subject/<int:subject_id>/', ListTestsBySubjectView.as_view(), name='list_tests_by_subject'),
     path('tests/<str:assessment_id>/', RetrieveTestByAssessmentIdView.as_view(), name='retrieve_test_by_assessment_id'),
     path('tests/<str:assessment_id>/questions/', ListTestQuestionsByAssessmentIdView.as_view(), name='list_test_questions_by_assessment_id'),  # New URL pattern
@@ -17,8 +18,15 @@ urlpatterns = [
     path('tests/group/<str:group_id>/', ListTestsByGroupIdView.as_view(), name='list_tests_by_group_id'),
     path('tests/group/<str:group_id>/download-link/', GetDownloadLinkByGroupIdView.as_view(), name='get_download_link_by_group_id'),  # Updated URL pattern
     path('regenerate-test/<int:test_id>/', RegenerateTestFileView.as_view(), name='regenerate_test_file'),
+    path('pin-test/<int:test_id>/', PinTestView.as_view(), name='pin_test'),
+    path('regenerate-tests/', RegenerateExamsView.as_view(), name='regenerate_exams'),
+    path('questions/<int:question_id>/regenerate-tests/', RegenerateQuestionTestsView.as_view(), name='regenerate_question_tests'),
     path('download-word/<int:test_id>/', download_word_file, name='download_word_file'),
     path('tests/<str:assessment_id>/correct_answers/', correct_answers_view, name='correct_answers'),
+    path('answer-keys/', BatchCorrectAnswersView.as_view(), name='batch_correct_answers'),
+    path('grade/', GradeSheetsView.as_view(), name='grade_sheets'),
+    path('cache-stats/', ResponseCacheStatsView.as_view(), name='response_cache_stats'),
+    path('questions/import/<int:question_pool>/', ImportQuestionsView.as_view(), name='import_questions'),
     path('questions/bulk/<int:question_pool>/', CreateManyQuestionsView.as_view(), name='create_many_questions'),
     path('questions/question-pool/<int:question_pool>/delete/<int:id>/', DeleteQuestionFromPoolView.as_view(), name='delete_question_from_pool'),
 ]
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Seeded, constrained construction of test variants.
+
+All variants of a generation are drawn in one pass from a single random.Random
+seeded with the generation seed (stored on every Test as generation_seed), so
+the same seed, options and pool contents always give the same variants. The
+draw can enforce:
+- max_overlap: the most questions any two variants may have in common.
+- balance_scores: every variant's total default_score per question selection
+  is brought as close as possible to the first variant's.
+Answer options can also be shuffled per test question (see shuffle_answer_orders).
+"""
+import random
+
+# How many candidate draws per requested question are tried before giving up on a constraint.
+MAX_DRAWS_PER_QUESTION = 50
+# How many candidate swaps per requested question are tried when balancing scores.
+MAX_SWAPS_PER_QUESTION = 20
+
+
+class VariantConstraintError(Exception):
+    """Raised when the pools are too small to satisfy the requested constraints."""
+
+
+def new_seed():
+    # Kept below 2**53 so the seed survives JSON clients that read numbers as doubles.
+    return random.SystemRandom().randrange(1 << 53)
+
+
+class VariantBuilder:
+    """
+    Builds the question ids of every variant.
+    indexes: {pool_id: PoolIndex} (see exams.sampling.get_pool_indexes).
+    """
+
+    def __init__(self, indexes, seed, max_overlap=None, balance_scores=False):
+        self.indexes = indexes
+        self.rng = random.Random(seed)
+        self.max_overlap = max_overlap
+        self.balance_scores = balance_scores
+        # question id -> indexes of the variants already using it
+        self.holders = {}
+
+    def build(self, variant_count, question_selections):
+        """Return one {position: question_id} mapping per variant."""
+        plans = []
+        targets = {}
+        for variant_index in range(variant_count):
+            # Questions shared with each earlier variant so far.
+            overlaps = [0] * variant_index
+            # Question ids already in this variant (selections may share a pool).
+            used = set()
+            mapping = {}
+            for selection_index, qs in enumerate(question_selections):
+                index = self.indexes[qs['question_pool']]
+                chosen = self._draw(index, len(qs['positions']), overlaps, used)
+                if self.balance_scores:
+                    if variant_index == 0:
+                        targets[selection_index] = sum(index.scores[i] for i in chosen)
+                    else:
+                        self._balance(index, chosen, targets[selection_index], overlaps, used)
+                self.rng.shuffle(chosen)
+                mapping.update(zip(qs['positions'], (index.ids[i] for i in chosen)))
+            for question_id in mapping.values():
+                self.holders.setdefault(question_id, []).append(variant_index)
+            plans.append(mapping)
+        return plans
+
+    def _allowed(self, question_id, overlaps):
+        if self.max_overlap is None:
+            return True
+        return all(overlaps[holder] < self.max_overlap for holder in self.holders.get(question_id, ()))
+
+    def _take(self, question_id, overlaps, step=1):
+        for holder in self.holders.get(question_id, ()):
+            overlaps[holder] += step
+
+    def _candidates(self, size, wanted):
+        """Yield distinct random positions of an index of this size, lazily."""
+        if size <= 4 * wanted:
+            yield from self.rng.sample(range(size), size)
+            return
+        seen = set()
+        for _ in range(MAX_DRAWS_PER_QUESTION * wanted):
+            position = self.rng.randrange(size)
+            if position not in seen:
+                seen.add(position)
+                yield position
+
+    def _draw(self, index, k, overlaps, used):
+        """Draw k index positions of questions not yet used in the variant that respect max_overlap."""
+        chosen = []
+        for position in self._candidates(len(index.ids), k):
+            question_id = index.ids[position]
+            if question_id not in used and self._allowed(question_id, overlaps):
+                chosen.append(position)
+                used.add(question_id)
+                self._take(question_id, overlaps)
+                if len(chosen) == k:
+                    return chosen
+        if self.max_overlap is None:
+            raise VariantConstraintError(f"Cannot pick {k} distinct questions from a pool of {len(index.ids)}.")
+        raise VariantConstraintError(
+            f"Cannot pick {k} questions from a pool of {len(index.ids)} with at most "
+            f"{self.max_overlap} questions shared between variants."
+        )
+
+    def _balance(self, index, chosen, target, overlaps, used):
+        """Swap chosen questions for unused ones while that brings the score total closer to target."""
+        total = sum(index.scores[i] for i in chosen)
+        for _ in range(MAX_SWAPS_PER_QUESTION * len(chosen)):
+            if total == target:
+                return
+            slot = self.rng.randrange(len(chosen))
+            outgoing, incoming = chosen[slot], self.rng.randrange(len(index.ids))
+            if index.ids[incoming] in used:
+                continue
+            new_total = total - index.scores[outgoing] + index.scores[incoming]
+            if abs(target - new_total) >= abs(target - total):
+                continue
+            self._take(index.ids[outgoing], overlaps, step=-1)
+            if not self._allowed(index.ids[incoming], overlaps):
+                self._take(index.ids[outgoing], overlaps)
+                continue
+            self._take(index.ids[incoming], overlaps)
+            used.discard(index.ids[outgoing])
+            used.add(index.ids[incoming])
+            chosen[slot] = incoming
+            total = new_total
+
+
+def shuffle_answer_orders(seed, plans, questions):
+    """
+    Return one {position: [answer ids]} mapping per variant with the answer options shuffled.
+    Uses its own generator derived from seed, so shuffling answers does not change which
+    questions were drawn.
+    """
+    rng = random.Random(f"{seed}:answers")
+    orders = []
+    for mapping in plans:
+        variant_orders = {}
+        for position in sorted(mapping):
+            answer_ids = [answer.id for answer in questions[mapping[position]].answers.all()]
+            rng.shuffle(answer_ids)
+            variant_orders[position] = answer_ids
+        orders.append(variant_orders)
+    return orders
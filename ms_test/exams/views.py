@@ -1,26 +1,43 @@
-import random
-import zipfile
-from io import BytesIO
+import json
 import os
 from django.conf import settings
 
-from django.http import JsonResponse, HttpResponse, Http404, FileResponse
+from django.http import JsonResponse, HttpResponse, Http404, FileResponse, StreamingHttpResponse
 from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
 from rest_framework import generics, status
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from docx import Document
-from docx.shared import Inches
-from docx.enum.section import WD_SECTION
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.section import WD_ORIENTATION
-
-
 from .models import *
 from .serializers import *
+from . import cache
+from .answer_keys import get_answer_key, iter_answer_keys
+from .cache import CachedResponseMixin
+from .documents import build_exam_payload, payload_fingerprint
+from .downloads import cache_group_zip, get_cached_group_zip, should_cache_group_zip
+from .exam_files import (
+    group_zip_etag, group_zip_last_modified, render_missing, request_format, request_group_files,
+    request_test_file, test_file_etag, test_file_last_modified,
+)
+from .exports import FORMATS
+from .generation import GenerationError, QuestionPoolNotFound, plan_variants, save_generated_tests
+from .grading import grade_sheets, max_score
+from .ids import allocate_id
+from .importers import ImportFormatError, detect_format, import_questions
+from .jobs import batch_status, enqueue_render_jobs
+from .pagination import OptionalCursorPagination
+from .read_models import QuestionReadModel, ReadModelListMixin, TestQuestionReadModel, TestReadModel
+from .renderers import FastJSONRenderer
+from .regeneration import regenerate_in_batches, select_tests
+from .rendering import pin_tests, regenerate_tests, render_payloads, unpin_tests
+from .storage import put_exam_file
+from .variants import new_seed
+from .zipstream import stream_zip
 
 from .models import Subject, QuestionPool, Question
 from .serializers import SubjectSerializer, QuestionPoolSerializer, QuestionSerializer
@@ -32,6 +49,7 @@ class CreateSubjectView(generics.CreateAPIView):
 
 class ListSubjectsView(generics.ListAPIView):
     serializer_class = SubjectSerializer
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
         created_by = self.request.query_params.get('created_by')
@@ -39,19 +57,27 @@ class ListSubjectsView(generics.ListAPIView):
             return Subject.objects.filter(created_by=created_by)
         return Subject.objects.all()
 
-class ListTestQuestionsByAssessmentIdView(generics.ListAPIView):
+class ListTestQuestionsByAssessmentIdView(ReadModelListMixin, generics.ListAPIView):
     serializer_class = QuestionSerializer
+    read_model = TestQuestionReadModel()
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     def get_queryset(self):
         assessment_id = self.kwargs['assessment_id']
-        test_questions = TestQuestion.objects.filter(assessment_id=assessment_id)
-        question_ids = test_questions.values_list('question_id', flat=True)
-        return Question.objects.filter(id__in=question_ids)
+        # One join from the unique Test.assessment_id index to the test's questions, in test order.
+        return (
+            Question.objects.filter(test_questions__test__assessment_id=assessment_id)
+            .order_by('test_questions__position')
+            .prefetch_related('answers')
+        )
 
-class RetrieveSubjectView(generics.RetrieveAPIView):
+class RetrieveSubjectView(CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
 
+    def get_cache_resource(self):
+        return cache.SUBJECT, self.kwargs['pk']
+
 # Endpoint: Create Question (with nested Answers)
 class CreateQuestionWithAnswersView(generics.CreateAPIView):
     queryset = Question.objects.all()
@@ -72,6 +98,32 @@ class CreateManyQuestionsView(generics.CreateAPIView):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+class ImportQuestionsView(APIView):
+    """
+    Imports a question bank file (CSV, JSONL or Moodle XML; see exams.importers) into a
+    question pool. The upload is parsed as a stream and written in chunks, so very large
+    banks use bounded memory. Invalid questions are skipped and listed in the report;
+    with dry_run the file is only validated.
+    """
+    serializer_class = QuestionImportSerializer
+
+    def post(self, request, question_pool, *args, **kwargs):
+        pool = get_object_or_404(QuestionPool, id=question_pool)
+        serializer = QuestionImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        upload = data['file']
+        import_format = data.get('format') or detect_format(upload.name)
+        if import_format is None:
+            return Response({"detail": "Cannot tell the file format from its name; pass format (csv, jsonl or moodle)."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            report = import_questions(pool, upload, import_format, chunk_size=data['chunk_size'], dry_run=data['dry_run'])
+        except ImportFormatError as exc:
+            return Response({"detail": str(exc), **(exc.report or {})}, status=status.HTTP_400_BAD_REQUEST)
+        created = report['imported'] and not report['dry_run']
+        return Response(report, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
 class DeleteQuestionFromPoolView(generics.DestroyAPIView):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
@@ -81,168 +133,150 @@ class DeleteQuestionFromPoolView(generics.DestroyAPIView):
         question_id = self.kwargs['id']
         return get_object_or_404(Question, id=question_id, question_pool_id=question_pool_id)
 
-class ListQuestionsByQuestionPoolView(generics.ListAPIView):
+class ListQuestionsByQuestionPoolView(ReadModelListMixin, generics.ListAPIView):
     serializer_class = QuestionSerializer
+    read_model = QuestionReadModel()
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
         question_pool_id = self.kwargs['question_pool_id']
-        return Question.objects.filter(question_pool_id=question_pool_id)
+        return Question.objects.filter(question_pool_id=question_pool_id).prefetch_related('answers')
 
 # Endpoint: Create Question Pool
 class CreateQuestionPoolView(generics.CreateAPIView):
     queryset = QuestionPool.objects.all()
     serializer_class = QuestionPoolSerializer
 
-class ListQuestionPoolsBySubjectView(generics.ListAPIView):
+class ListQuestionPoolsBySubjectView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = QuestionPoolSerializer
+    pagination_class = OptionalCursorPagination
+
+    def get_cache_resource(self):
+        # Only the full (unpaginated) list is cached.
+        if self.request.query_params:
+            return None
+        return cache.SUBJECT_POOLS, self.kwargs['subject_id']
 
     def get_queryset(self):
         subject_id = self.kwargs['subject_id']
         return QuestionPool.objects.filter(subject_id=subject_id)
     
-class RetrieveTestByAssessmentIdView(generics.RetrieveAPIView):
+class RetrieveTestByAssessmentIdView(CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Test.objects.all()
     serializer_class = TestSerializer
     lookup_field = 'assessment_id'
 
-class ListTestsBySubjectView(generics.ListAPIView):
+    def get_cache_resource(self):
+        return cache.TEST, self.kwargs['assessment_id']
+
+class ListTestsBySubjectView(ReadModelListMixin, generics.ListAPIView):
     serializer_class = TestSerializer
+    read_model = TestReadModel()
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
         subject_id = self.kwargs['subject_id']
         return Test.objects.filter(subject_id=subject_id)
     
-class ListGroupIdsBySubjectView(generics.ListAPIView):
+class ListGroupIdsBySubjectView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = GroupIdSerializer
 
+    def get_cache_resource(self):
+        return cache.SUBJECT_GROUPS, self.kwargs['subject_id']
+
     def get_queryset(self):
         subject_id = self.kwargs['subject_id']
         return Test.objects.filter(subject_id=subject_id).values('group_id').distinct()
     
-class ListTestsByGroupIdView(generics.ListAPIView):
+class ListTestsByGroupIdView(ReadModelListMixin, generics.ListAPIView):
     serializer_class = TestSerializer
+    read_model = TestReadModel()
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
         group_id = self.kwargs['group_id']
         return Test.objects.filter(group_id=group_id)
 
 class GetDownloadLinkByGroupIdView(APIView):
+    """
+    Downloads a ZIP file of the files of a group's tests, in the export format
+    given by ?format= (docx, ooxml or pdf; see exams.exports).
+    """
+    def perform_content_negotiation(self, request, force=False):
+        # `format` selects the export format here, not a DRF renderer.
+        return super().perform_content_negotiation(request, force=True)
+
+    @method_decorator(condition(etag_func=group_zip_etag, last_modified_func=group_zip_last_modified))
     def get(self, request, *args, **kwargs):
         group_id = self.kwargs.get('group_id')
+        export_format = request_format(request)
+        if export_format is None:
+            return Response({"detail": f"Unknown format. Choose one of: {', '.join(FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
         
-        # Retrieve all generated links associated with the group_id
-        generated_links = GeneratedTestLink.objects.filter(test__group_id=group_id)
-        if not generated_links.exists():
+        # Stored files of pinned tests, and files rendered on demand for the others
+        exam_files = request_group_files(request, group_id)
+        if not exam_files:
             return Response(
                 {"detail": "No tests found for the given group ID."},
                 status=404
             )
         
-        # Create a ZIP file in memory
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-            for generated_link in generated_links:
-                test = generated_link.test
-                file_name = f"{test.name}_Variant_{test.variant}.docx"
-                
-                # If exam_file is a FileField, read its content
-                if hasattr(generated_link.exam_file, 'read'):
-                    file_content = generated_link.exam_file.read()
-                else:
-                    file_content = generated_link.exam_file
-                
-                zip_file.writestr(file_name, file_content)
+        etag = group_zip_etag(request, group_id)
+        cached_zip = get_cached_group_zip(group_id, etag, export_format.kind)
+        if cached_zip is not None:
+            response = HttpResponse(cached_zip, content_type='application/zip')
+            response['Content-Disposition'] = f'attachment; filename="{group_id}_tests.zip"'
+            return response
         
-        # Reset buffer pointer to the beginning
-        zip_buffer.seek(0)
-        
-        # Create the HTTP response with the zip file
-        response = HttpResponse(zip_buffer.getvalue(), content_type='application/zip')
+        # Files that are not stored are rendered together up front (in parallel when
+        # EXAMS_RENDER_PROCESSES allows), then the ZIP file is streamed as it is written.
+        # Stored files are only read when their entry is written.
+        render_missing(exam_files)
+        entries = (
+            (f"{exam_file.test.name}_Variant_{exam_file.test.variant}.{export_format.extension}", exam_file.open)
+            for exam_file in exam_files
+        )
+        if should_cache_group_zip(etag):
+            zip_bytes = b''.join(stream_zip(entries))
+            cache_group_zip(group_id, etag, zip_bytes, export_format.kind)
+            response = HttpResponse(zip_bytes, content_type='application/zip')
+        else:
+            response = StreamingHttpResponse(stream_zip(entries), content_type='application/zip')
         response['Content-Disposition'] = f'attachment; filename="{group_id}_tests.zip"'
         return response
 
-def generate_unique_id():
-    """Generate a unique 5-digit id as a string."""
-    while True:
-        unique_id = str(random.randint(10000, 99999))
-        if not Test.objects.filter(group_id=unique_id).exists() and not Test.objects.filter(assessment_id=unique_id).exists():
-            return unique_id
-
 def generate_unique_group_id():
-    """Generate a unique 5-digit group id as a string."""
-    return generate_unique_id()
+    """Allocate a unique group id as a string."""
+    return allocate_id()
 
 def generate_unique_assessment_id():
-    """Generate a unique 5-digit assessment id as a string."""
-    return generate_unique_id()
-
-def create_word_file(subject_name, assessment_id, test_name, variant, sorted_test_questions, answer_sheet_image_path):
-    """
-    Create a Word document with the given header and test questions.
-    sorted_test_questions: list of tuples (position, question) in order.
-    Each question's answers are labeled from A to E (up to 5 answers).
-    The question text will also show the point value at the end.
-    """
-    document = Document()
-
-    # Header
-    document.add_heading(f"{subject_name} - {test_name}", level=0)
-    document.add_paragraph(f"Assessment ID: {assessment_id}")
-    document.add_paragraph(f"Variant: {variant}")
-    document.add_paragraph("")  # empty line
-
-    # For each test question, add the question text and its answers.
-    for pos, question in sorted_test_questions:
-        # Append the point cost to the question text.
-        # For example: "1. What is 2 + 2? (1 pt.)"
-        question_text_with_points = f"{pos}. {question.text} ({question.default_score} pt.)"
-        document.add_paragraph(question_text_with_points)
-        
-        # Retrieve answers and label them A, B, C, etc.
-        answers = list(question.answers.all())
-        letters = ['A', 'B', 'C', 'D', 'E']
-        for idx, answer in enumerate(answers[:5]):
-            document.add_paragraph(f"   ({letters[idx]}) {answer.text}")
-
-    # Add a new section for the answer sheet image
-    section = document.add_section(WD_SECTION.NEW_PAGE)
-    section.orientation = WD_ORIENTATION.PORTRAIT
-    section.page_width = Inches(8.5)
-    section.page_height = Inches(11)
-    # Set margins to zero so the image covers the entire page
-    section.top_margin = Inches(0)
-    section.bottom_margin = Inches(0)
-    section.left_margin = Inches(0)
-    section.right_margin = Inches(0)
-
-    # Add the answer sheet image
-    paragraph = document.add_paragraph()
-    run = paragraph.add_run()
-    run.add_picture(answer_sheet_image_path, width=Inches(8.5), height=Inches(11))
-    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-    # Save document to a BytesIO stream and return the bytes
-    file_stream = BytesIO()
-    document.save(file_stream)
-    file_stream.seek(0)
-    return file_stream.read()
+    """Allocate a unique assessment id as a string."""
+    return allocate_id()
 
+@condition(etag_func=test_file_etag, last_modified_func=test_file_last_modified)
 def download_word_file(request, test_id):
     """
-    Retrieve the generated Word file for a given test and serve it as a downloadable file.
+    Retrieve the file for a given test and serve it as a downloadable file, as a Word
+    document by default or in the export format given by ?format= (see exams.exports).
+    Pinned tests' Word files are served from storage; everything else is rendered on
+    first access and kept in a per-process cache (see exams.exam_files).
+    The file's checksum or content fingerprint is its ETag, so conditional requests
+    are answered with 304 Not Modified.
     """
-    try:
-        # Assuming there is only one GeneratedTestLink per test.
-        generated_link = GeneratedTestLink.objects.get(test__id=test_id)
-    except GeneratedTestLink.DoesNotExist:
+    export_format = request_format(request)
+    if export_format is None:
+        return JsonResponse({"detail": f"Unknown format. Choose one of: {', '.join(FORMATS)}."}, status=400)
+    exam_file = request_test_file(request, test_id)
+    if exam_file is None:
         raise Http404("Word file not found for this test.")
 
     # Prepare the HTTP response with the binary file.
-    response = HttpResponse(
-        generated_link.exam_file,
-        content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-    )
-    response['Content-Disposition'] = f'attachment; filename="test_{test_id}.docx"'
+    response = HttpResponse(exam_file.read(), content_type=export_format.content_type)
+    response['Content-Disposition'] = f'attachment; filename="test_{test_id}.{export_format.extension}"'
     return response
 
 class GenerateTestView(APIView):
@@ -251,13 +285,17 @@ class GenerateTestView(APIView):
     The instructor provides the subject, instructor_id, test name,
     a list of variants, and a list of question selections.
     Each question selection is a dict with a question_pool id and a list of positions.
-    For the first variant the questions will be assigned per the given positions;
-    for additional variants the questions from each pool are shuffled.
-    A Word file is generated and stored.
+    Variants are drawn from a seed (random unless given, and returned in the response),
+    optionally limiting the questions any two variants share (max_overlap), evening out
+    their total scores (balance_scores) and shuffling the answer options (shuffle_answers).
+    A Word file is generated and stored. With render_mode "async" the tests are
+    saved right away and the Word files are rendered by the render job queue;
+    the response is a 202 carrying the job id to poll at render-jobs/<job_id>/.
+    With render_mode "lazy" no file is rendered or stored: each test's file is
+    rendered when it is first downloaded, until the test is pinned (see PinTestView).
     """
     serializer_class = TestGenerationSerializer
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
         serializer = TestGenerationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -272,134 +310,150 @@ class GenerateTestView(APIView):
         notes = data.get('notes')
         instructions = data.get('instructions')
 
-        results = []
+        # Draw all variants in one seeded pass, loading only the chosen questions.
+        seed = data['seed'] if data.get('seed') is not None else new_seed()
+        try:
+            plans = plan_variants(
+                variants,
+                question_selections,
+                seed,
+                max_overlap=data.get('max_overlap'),
+                balance_scores=data['balance_scores'],
+                shuffle_answers=data['shuffle_answers'],
+            )
+        except QuestionPoolNotFound as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_404_NOT_FOUND)
+        except GenerationError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
         # Generate a unique group ID once for all variants
         group_id = generate_unique_group_id()
 
-        # For each variant, build a test
-        for variant in variants:
-            # Generate a unique assessment ID for each variant
-            assessment_id = generate_unique_assessment_id()
-
-            # Dictionary mapping question position -> Question instance.
-            test_questions_mapping = {}
-
-            # For each question selection, pick questions from the indicated pool.
-            for qs in question_selections:
-                qp_id = qs['question_pool']
-                positions = qs['positions']  # list of desired positions
-                # Retrieve the QuestionPool instance
-                question_pool = get_object_or_404(QuestionPool, id=qp_id)
-                available_questions = list(question_pool.questions.all())
-                if len(available_questions) < len(positions):
-                    return Response(
-                        {"detail": f"Not enough questions in QuestionPool {qp_id} to fill positions {positions}"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                # Randomly sample distinct questions for the count required
-                selected_questions = random.sample(available_questions, len(positions))
-                # For the base variant, assign in the order provided.
-                # For additional variants, shuffle the selected questions.
-                if variant != variants[0]:
-                    random.shuffle(selected_questions)
-                # Assign each question to its corresponding position.
-                for pos, question in zip(positions, selected_questions):
-                    if pos in test_questions_mapping:
-                        return Response(
-                            {"detail": f"Duplicate position {pos} specified across question selections."},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-                    test_questions_mapping[pos] = question
-
-            # Ensure questions are sorted by their position
-            sorted_test_questions = sorted(test_questions_mapping.items(), key=lambda x: x[0])
-
-            # Create a Test record with the generated group ID and assessment ID.
-            test_obj = Test.objects.create(
-                subject=subject,
-                instructor_id=instructor_id,
-                group_id=group_id,
-                assessment_id=assessment_id,
-                name=test_name,
-                variant=variant,
-                notes=notes,
-                instructions=instructions,
-            )
-
-            # Create TestQuestion records
-            for pos, question in sorted_test_questions:
-                TestQuestion.objects.create(
-                    test=test_obj,
-                    question=question,
-                    position=pos,
-                    assessment_id=assessment_id  # Add this line
-                )
-
-            # Generate the Word file for this test
-            word_file_bytes = create_word_file(
-                subject_name=subject.name,
-                assessment_id=assessment_id,
-                test_name=test_name,
-                variant=variant,
-                sorted_test_questions=sorted_test_questions,
-                answer_sheet_image_path="./exams/img/blank_sheet.jpg"
-            )
-
-            # Save the generated Word file
-            GeneratedTestLink.objects.create(
-                test=test_obj,
-                exam_file=word_file_bytes,
-                assessment_id=assessment_id
-            )
+        render_async = data['render_mode'] == 'async'
+        pinned = data['render_mode'] != 'lazy'
 
-            results.append({
-                "test_id": test_obj.id,
-                "group_id": group_id,
-                "assessment_id": assessment_id,
+        # Render the Word files before opening the transaction so it only covers the inserts.
+        # In async mode rendering is left to the render job queue, in lazy mode to the downloads.
+        generated = []
+        for variant, sorted_test_questions in plans:
+            generated.append({
                 "variant": variant,
+                "assessment_id": generate_unique_assessment_id(),
+                "sorted_test_questions": sorted_test_questions,
+                "stored_file": None,
             })
+        if pinned and not render_async:
+            payloads = [
+                build_exam_payload(subject.name, item['assessment_id'], test_name, item['variant'], item['sorted_test_questions'])
+                for item in generated
+            ]
+            # Variants are independent, so they can be rendered in parallel.
+            for item, payload, word_file_bytes in zip(generated, payloads, render_payloads(payloads)):
+                item['stored_file'] = {**put_exam_file(word_file_bytes), 'content_hash': payload_fingerprint(payload)}
+
+        with transaction.atomic():
+            tests = save_generated_tests(subject, instructor_id, group_id, test_name, notes, instructions, generated, seed, pinned)
+            if render_async:
+                job_id = enqueue_render_jobs(tests)
+
+        results = [
+            {
+                "test_id": test_obj.id,
+                "group_id": group_id,
+                "assessment_id": test_obj.assessment_id,
+                "variant": test_obj.variant,
+            }
+            for test_obj in tests
+        ]
+        if render_async:
+            return Response({"job_id": str(job_id), "seed": seed, "generated_tests": results}, status=status.HTTP_202_ACCEPTED)
+        return Response({"seed": seed, "generated_tests": results}, status=status.HTTP_201_CREATED)
 
-        return Response({"generated_tests": results}, status=status.HTTP_201_CREATED)
+class RenderJobStatusView(APIView):
+    """
+    Reports the progress of the render jobs queued by an async test generation.
+    Each test is marked ready once its Word file has been stored.
+    """
+    def get(self, request, job_id, *args, **kwargs):
+        summary = batch_status(job_id)
+        if summary is None:
+            raise Http404("Render job not found.")
+        return Response(summary)
 
 class RegenerateTestFileView(APIView):
     """
     Regenerates the Word file for an already created test.
     The test is identified by test_id.
-    The new file is generated using the existing TestQuestion records.
+    The new file is generated using the existing TestQuestion records, unless the
+    stored file was built from the same content; pass ?force=true to render it anyway.
     """
-    @transaction.atomic
     def post(self, request, test_id, *args, **kwargs):
         # Retrieve the test record.
         test_obj = get_object_or_404(Test, id=test_id)
-        
-        # Retrieve associated test questions, sorted by their position.
-        test_question_qs = TestQuestion.objects.filter(test=test_obj).order_by('position')
-        if not test_question_qs.exists():
+
+        result = regenerate_tests([test_obj.id], force=_is_truthy(request.query_params.get('force')))
+        if result["empty"]:
             return Response({"detail": "No test questions found for this test."},
                             status=status.HTTP_400_BAD_REQUEST)
-        
-        # Build a list of (position, question) tuples.
-        sorted_test_questions = [(tq.position, tq.question) for tq in test_question_qs]
-        
-        # Generate a new Word file using the same helper function.
-        word_file_bytes = create_word_file(
-            subject_name=test_obj.subject.name,
-            assessment_id=test_obj.assessment_id,
-            test_name=test_obj.name,
-            variant=test_obj.variant,
-            sorted_test_questions=sorted_test_questions,
+        if result["unchanged"]:
+            return Response({"detail": "Test is up to date.", "regenerated": False}, status=status.HTTP_200_OK)
+        return Response({"detail": "Test regenerated successfully.", "regenerated": True}, status=status.HTTP_200_OK)
+
+class PinTestView(APIView):
+    """
+    POST pins a test: its Word file is rendered (unless already stored) and kept in
+    the blob store from then on. DELETE unpins it: the stored file is removed (its
+    blob once no other link uses it) and the test is rendered on download again, like
+    tests generated with render_mode "lazy".
+    """
+    def post(self, request, test_id, *args, **kwargs):
+        test_obj = get_object_or_404(Test, id=test_id)
+        result = pin_tests([test_obj.id])
+        if result["empty"]:
+            return Response({"detail": "No test questions found for this test."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"detail": "Test pinned.", "pinned": True}, status=status.HTTP_200_OK)
+
+    def delete(self, request, test_id, *args, **kwargs):
+        test_obj = get_object_or_404(Test, id=test_id)
+        unpin_tests([test_obj.id])
+        return Response({"detail": "Test unpinned.", "pinned": False}, status=status.HTTP_200_OK)
+
+class RegenerateQuestionTestsView(APIView):
+    """
+    Regenerates the Word files of every test that uses a question, e.g. after fixing its text.
+    Tests whose content did not change are skipped unless ?force=true is given.
+    """
+    def post(self, request, question_id, *args, **kwargs):
+        question = get_object_or_404(Question, id=question_id)
+        test_ids = list(Test.objects.filter(test_questions__question=question).values_list('id', flat=True).distinct())
+        result = regenerate_tests(test_ids, force=_is_truthy(request.query_params.get('force')))
+        return Response(result, status=status.HTTP_200_OK)
+
+class RegenerateExamsView(APIView):
+    """
+    Regenerates the Word files of the tests of a subject or group, or of the tests using
+    given or recently changed questions, and reports what was done (the API counterpart of
+    `manage.py regenerate_exams`, which is better suited to very large selections).
+    """
+    serializer_class = RegenerationSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = RegenerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        test_ids = select_tests(
+            subject_id=data.get('subject'),
+            group_id=data.get('group_id'),
+            question_ids=data.get('question_ids'),
+            changed_since=data.get('changed_since'),
+            stale=data['stale'],
         )
-        
-        # Update the existing GeneratedTestLink record, or create one if it doesn't exist.
-        generated_link = test_obj.generated_links.first()
-        if generated_link:
-            generated_link.exam_file = word_file_bytes
-            generated_link.save()
-        else:
-            GeneratedTestLink.objects.create(test=test_obj, exam_file=word_file_bytes)
-        
-        return Response({"detail": "Test regenerated successfully."}, status=status.HTTP_200_OK)
+        report = regenerate_in_batches(test_ids, force=data['force'])
+        return Response(report, status=status.HTTP_200_OK)
+
+def _is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes')
     
 def correct_answers_view(request, assessment_id):
     """
@@ -425,45 +479,125 @@ def correct_answers_view(request, assessment_id):
             }
         }
     """
-    # Retrieve the Test object using its unique assessment_id.
-    test_obj = get_object_or_404(Test, assessment_id=assessment_id)
+    # The answer key is precomputed at generation time and served from cache.
+    answer_key = get_answer_key(assessment_id)
+    if answer_key is None:
+        raise Http404("No Test matches the given query.")
     
-    # Retrieve TestQuestion records for this test, ordered by the position field.
-    test_questions = test_obj.test_questions.all().order_by('position')
+    return JsonResponse(answer_key)
+
+class BatchCorrectAnswersView(APIView):
+    """
+    Endpoint: GET/POST /api/test/answer-keys/
     
-    correct_answers_mapping = {}
-    points_mapping = {}
+    Returns the answer keys of many tests in one response, identified either by
+    a list of assessment IDs or by a group ID. GET takes them as query parameters
+    (?assessment_ids=12345,67890 or ?group_id=12345); POST takes a JSON body.
     
-    # Define letters to label answers (up to 5 possible answers)
-    letters = ['A', 'B', 'C', 'D', 'E']
+    Example response:
+    {
+        "answer_keys": {
+            "12345": {"correct_answers": {"1": "B", ...}, "points": {"1": 1.0, ...}},
+            // ...
+        },
+        "missing": ["67890"]
+    }
     
-    for tq in test_questions:
-        position_key = str(tq.position)  # Convert position to string for the JSON mapping keys.
-        question = tq.question
-        
-        # Retrieve answers ordered by id (as ensured by Answer.Meta.ordering)
-        answers_list = list(question.answers.all())
-        correct_letter = None
-        
-        # Determine which answer is marked as correct.
-        for idx, answer in enumerate(answers_list):
-            if answer.is_correct:
-                if idx < len(letters):
-                    correct_letter = letters[idx]
-                else:
-                    correct_letter = "?"  # Fallback if more than 5 answers exist.
-                break
-        
-        # If no correct answer is found, mark as "N/A".
-        if correct_letter is None:
-            correct_letter = "N/A"
-        
-        correct_answers_mapping[position_key] = correct_letter
-        points_mapping[position_key] = float(question.default_score)
+    With ?output=ndjson the keys are streamed as one JSON object per line instead,
+    each with its "assessment_id", "correct_answers" and "points".
+    """
+    # Number of tests resolved per query when streaming NDJSON.
+    stream_chunk_size = 500
+
+    def get(self, request, *args, **kwargs):
+        data = {}
+        if request.query_params.get('assessment_ids'):
+            data['assessment_ids'] = [aid for aid in request.query_params['assessment_ids'].split(',') if aid]
+        if request.query_params.get('group_id'):
+            data['group_id'] = request.query_params['group_id']
+        return self.answer_keys(request, data)
+
+    def post(self, request, *args, **kwargs):
+        return self.answer_keys(request, request.data)
+
+    def answer_keys(self, request, data):
+        serializer = AnswerKeyBatchSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        assessment_ids = serializer.validated_data.get('assessment_ids')
+        group_id = serializer.validated_data.get('group_id')
+
+        if request.query_params.get('output') == 'ndjson':
+            lines = (
+                json.dumps({"assessment_id": assessment_id, **answer_key}) + "\n"
+                for assessment_id, answer_key in iter_answer_keys(assessment_ids, group_id, self.stream_chunk_size)
+            )
+            return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+        answer_keys = dict(iter_answer_keys(assessment_ids, group_id))
+        missing = [aid for aid in assessment_ids if aid not in answer_keys] if assessment_ids else []
+        if group_id and not answer_keys:
+            return Response({"detail": "No tests found for the given group ID."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"answer_keys": answer_keys, "missing": missing})
+
+class GradeSheetsView(APIView):
+    """
+    Endpoint: POST /api/test/grade/
     
-    response_data = {
-        "correct_answers": correct_answers_mapping,
-        "points": points_mapping,
+    Scores a batch of student response sheets against the precomputed answer keys,
+    for one assessment_id or for all variants of a group_id.
+    Returns the total of every sheet (in the order given) and per-question statistics
+    for each graded assessment:
+    {
+        "results": [{"student_id": ..., "assessment_id": "12345", "score": 7.5, "max_score": 10.0, "correct": 5, "answered": 6}, ...],
+        "questions": {"12345": [{"position": 1, "correct_count": 40, "answered_count": 52, "correct_rate": 0.74, "choices": {"A": 3, ...}}, ...]}
     }
-    
-    return JsonResponse(response_data)
+    """
+    def post(self, request, *args, **kwargs):
+        serializer = GradingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        sheets = data['sheets']
+
+        if 'assessment_id' in data:
+            answer_key = get_answer_key(data['assessment_id'])
+            if answer_key is None:
+                raise Http404("No Test matches the given query.")
+            answer_keys = {data['assessment_id']: answer_key}
+            sheet_assessment_ids = [data['assessment_id']] * len(sheets)
+        else:
+            answer_keys = dict(iter_answer_keys(group_id=data['group_id']))
+            if not answer_keys:
+                return Response({"detail": "No tests found for the given group ID."}, status=status.HTTP_404_NOT_FOUND)
+            sheet_assessment_ids = [str(sheet['assessment_id']) for sheet in sheets]
+            unknown = sorted(set(sheet_assessment_ids) - set(answer_keys))
+            if unknown:
+                return Response(
+                    {"detail": f"Assessment IDs not in group {data['group_id']}: {unknown}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        # Grade the sheets of each assessment together, then restore the original order.
+        rows_by_assessment = {}
+        for row, assessment_id in enumerate(sheet_assessment_ids):
+            rows_by_assessment.setdefault(assessment_id, []).append(row)
+
+        results = [None] * len(sheets)
+        questions = {}
+        for assessment_id, rows in rows_by_assessment.items():
+            answer_key = answer_keys[assessment_id]
+            scores, questions[assessment_id] = grade_sheets(answer_key, [sheets[row] for row in rows])
+            total = max_score(answer_key)
+            for row, score in zip(rows, scores):
+                results[row] = {
+                    "student_id": sheets[row].get('student_id'),
+                    "assessment_id": assessment_id,
+                    "max_score": total,
+                    **score,
+                }
+
+        return Response({"results": results, "questions": questions})
+
+class ResponseCacheStatsView(APIView):
+    def get(self, request, *args, **kwargs):
+        # Counts are per process: each worker reports its own hits and misses.
+        return Response({"resources": cache.stats()})
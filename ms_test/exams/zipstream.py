@@ -0,0 +1,53 @@
+"""
+Incremental ZIP writer used to stream archives of exam files to the client.
+"""
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkBuffer:
+    """Write-only file object that collects what ZipFile writes until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries, compression=zipfile.ZIP_STORED):
+    """
+    Yield a ZIP archive chunk by chunk.
+    entries: iterable of (file name, callable returning a readable binary file object).
+    Entries are consumed lazily, so only the file currently being written is open at a time.
+    They are stored by default: Word and PDF files are compressed already, and deflating
+    them again costs far more time than the few percent it saves.
+    """
+    buffer = _ChunkBuffer()
+    # The buffer cannot seek, so ZipFile writes each entry's sizes in a trailing data descriptor.
+    with zipfile.ZipFile(buffer, 'w', compression=compression) as zip_file:
+        for name, open_file in entries:
+            with open_file() as source, zip_file.open(name, 'w') as dest:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Central directory
+    yield buffer.drain()
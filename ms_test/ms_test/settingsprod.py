@@ -131,3 +131,76 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Exams service tuning
+
+# Bulk question imports of at least this many questions use PostgreSQL COPY
+# instead of batched INSERTs. Set to None to always use batched INSERTs.
+EXAMS_BULK_COPY_THRESHOLD = 5000
+
+# Number of background threads each web process starts to drain the render job
+# queue after an async generation. With 0, run `manage.py process_render_jobs`.
+EXAMS_RENDER_LOCAL_WORKERS = 0
+
+# Size of the process pool the Word files of a generation's variants are
+# rendered on. 0 or 1 renders them one after another in the request process.
+EXAMS_RENDER_PROCESSES = 0
+
+# Where generated exam files are kept. LocalBlobStore stores them in a
+# content-addressed directory tree; exams.storage.S3BlobStore takes 'bucket',
+# 'prefix' and boto3 client options such as 'endpoint_url' instead.
+EXAMS_BLOB_STORE = {
+    'BACKEND': 'exams.storage.LocalBlobStore',
+    'OPTIONS': {'root': BASE_DIR / 'exam_files'},
+}
+
+# Cache alias used to keep prebuilt group ZIP downloads, and the largest
+# archive (in bytes) worth keeping. None streams every group download.
+EXAMS_GROUP_ZIP_CACHE = None
+EXAMS_GROUP_ZIP_CACHE_MAX_SIZE = 50 * 1024 * 1024
+
+# Answer keys served to the grading service are cached per process (an LRU of
+# EXAMS_ANSWER_KEY_LRU_SIZE entries kept for up to EXAMS_ANSWER_KEY_LRU_TTL
+# seconds), optionally in front of the cache alias EXAMS_ANSWER_KEY_CACHE. Edits
+# clear that alias for every process, so it must be shared by all of them
+# (Redis or Memcached, not the default LocMemCache). With None, a process may
+# serve an outdated key for up to EXAMS_ANSWER_KEY_LRU_TTL seconds after an edit.
+EXAMS_ANSWER_KEY_LRU_SIZE = 10000
+EXAMS_ANSWER_KEY_LRU_TTL = 30
+EXAMS_ANSWER_KEY_CACHE = None
+
+# Number of group/assessment IDs each process reserves from the shared counter
+# at a time. IDs of a reserved block that are not used before the process exits
+# are skipped, so keep this small relative to the 5-digit ID space.
+EXAMS_ID_BLOCK_SIZE = 20
+
+# Page size of the list endpoints when a client asks for pages (with `cursor`
+# or `page_size`), and the largest `page_size` a client may request.
+EXAMS_PAGE_SIZE = 100
+EXAMS_MAX_PAGE_SIZE = 1000
+
+# Subject, question pool, group id and test responses can be cached in the
+# cache alias EXAMS_RESPONSE_CACHE for up to EXAMS_RESPONSE_CACHE_TIMEOUT
+# seconds, behind a per-process LRU of EXAMS_RESPONSE_CACHE_LRU_SIZE entries.
+# Writes invalidate them by replacing version tokens kept in that alias, so it
+# must be shared by every process (Redis or Memcached, not the default
+# LocMemCache): otherwise the other processes serve outdated responses until
+# the timeout. None (the default) disables the cache.
+EXAMS_RESPONSE_CACHE = None
+EXAMS_RESPONSE_CACHE_TIMEOUT = 300
+EXAMS_RESPONSE_CACHE_LRU_SIZE = 1000
+
+# Files of unpinned tests (render_mode "lazy") are rendered on download and kept
+# in a per-process LRU holding at most this many bytes of rendered files.
+EXAMS_RENDERED_FILE_CACHE_MAX_SIZE = 64 * 1024 * 1024
+
+# Question id indexes of the pools tests are drawn from (16 bytes per question)
+# are kept in a per-process LRU holding at most this many bytes. They are keyed
+# by the pool's questions_version in the database, so no shared cache is needed.
+EXAMS_POOL_INDEX_CACHE_MAX_SIZE = 64 * 1024 * 1024
+
+# Blobs of exam files no test links to any more are deleted (on unpinning and
+# regeneration, or by `manage.py gc_exam_files`) only once they were last saved
+# this many seconds ago, since a file being stored may not be linked yet.
+EXAMS_BLOB_DELETE_GRACE_PERIOD = 60 * 60